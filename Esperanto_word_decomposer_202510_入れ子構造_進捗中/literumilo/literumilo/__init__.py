@@ -1,4 +1,27 @@
 from .literumilo import analyze_file
 from .literumilo import analyze_string
+from .literumilo import analyze_chunks
+from .literumilo_document import analyze_document
+from .literumilo_batch import analyze_directory
 from .literumilo_check_word import check_word
+from .literumilo_check_word import warm_up
+from .literumilo_check_word import analyze_nbest
 from .literumilo_utils import x_to_accent
+from .literumilo_tokenizer import word_spans
+from .literumilo_cache import set_cache_size
+from .literumilo_cache import cache_statistics
+from .literumilo_cache import clear_cache
+from .literumilo_disk_cache import enable_disk_cache
+from .literumilo_disk_cache import disable_disk_cache
+from .literumilo_lattice import set_search_budget
+from .literumilo_lattice import search_statistics
+
+# The async functions are imported when first used, so that programs which
+# do not use them do not import asyncio.
+_ASYNC_NAMES = ("analyze_text_async", "analyze_stream", "check_word_async", "set_executor", "close_executor")
+
+def __getattr__(name):
+    if name in _ASYNC_NAMES:
+        from . import literumilo_async
+        return getattr(literumilo_async, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -12,8 +12,11 @@
 from __future__ import print_function
 
 import os, sys
-from .literumilo_utils import is_word_char, x_to_accent
+from .literumilo_utils import x_to_accent
+from .literumilo_tokenizer import word_spans, trailing_word_start, leading_word_end
+from .literumilo_parallel import default_jobs, new_pool, whitespace_chunks, analyze_parallel
 from .literumilo_check_word import check_word
+from .literumilo_cache import export_cache_size
 
 HOW_TO_USE = """\nLiterumilo   version: 1.0.8\n
     ----- (Esperanto sekvas.)\n
@@ -21,42 +24,82 @@ HOW_TO_USE = """\nLiterumilo   version: 1.0.8\n
     To list misspelled words from a file: python literumilo.py file.txt
     To divide words from a file into morphemes: python literumilo.py -m file.txt
     To check the spelling of a single word: python literumilo.py ĉiutage
+    To analyze a large file with 4 processes: python literumilo.py -j 4 -m file.txt
+    (-j without a number: one process per processor)
+    To cache more words (default 20000) and compound stems (default 10000):
+        python literumilo.py -c 100000 -s 30000 -m file.txt
+    (also LITERUMILO_CACHE_SIZE and LITERUMILO_STEM_CACHE_SIZE; 0 disables a cache)
     Accents can be represented by 'x': python literumilo.py cxiutage\n
     -----\n
     Ĉi tiu programo estas literumilo kaj analizilo de morfemoj por Esperanto.\n
     Por listigi misliterumitajn vortojn de dosiero: python literumilo.py file.txt
     Por dividi vortojn de dosiero laŭ morfemoj: python literumilo.py -m file.txt
     Por kontroli la literumadon de unu vorto: python literumilo.py ĉiutage
+    Por analizi grandan dosieron per 4 procezoj: python literumilo.py -j 4 -m file.txt
+    (-j sen nombro: unu procezo por ĉiu procesoro)
+    Por konservi pli da vortoj (defaŭlte 20000) kaj kunmetitaj radikoj (defaŭlte 10000):
+        python literumilo.py -c 100000 -s 30000 -m file.txt
+    (ankaŭ LITERUMILO_CACHE_SIZE kaj LITERUMILO_STEM_CACHE_SIZE; 0 malŝaltas la kaŝmemoron)
     Oni povas anstataŭigi supersignon per 'x': python literumilo.py cxiutage\n
     Klivo <indriko@yahoo.com> 2020
 """
 
-def analyze_file(filename, mode):
+CHUNK_SIZE = 1 << 16   # characters read at a time by analyze_file()
+MAX_PARTIAL_WORD = 1000   # characters of a word cut by chunks (see analyze_chunks())
+
+def read_chunks(file, size = CHUNK_SIZE):
     """
-    This function reads text from a file and calls analyze_string(),
+    Reads a text file in chunks, so that a large file need not fit in memory.
+    Params:
+        file - a file opened in text mode
+        size - number of characters per chunk
+    Return:
+        generator of strings
+    """
+    while True:
+        chunk = file.read(size)
+        if not chunk: return
+        yield chunk
+
+# ------------------------ read_chunks
+
+
+def analyze_file(filename, mode, output = None, jobs = 1):
+    """
+    This function reads text from a file, chunk by chunk, and calls analyze_chunks(),
     which does a morphological analysis or spell check on the text.
+    With jobs > 1, the chunks are analyzed by several processes (see
+    literumilo_parallel.py). The result is the same.
     Params:
         file name
         mode - True = morphological analyzer, False = spell checker
+        output - a text file (eg. sys.stdout) to write the result to, piece
+                 by piece, or None to return it
+        jobs - number of processes (None = one per processor)
     Return:
-        analyzed text, or list of misspelled words  (str)
+        analyzed text, or list of misspelled words  (str), or None if output is given
     """
 
     if not os.path.exists(filename):   # If there is no file.
         print("Cannot find file: {}".format(filename))
         sys.exit(0)
 
-    # Read the file into a string.
-    fin = open(filename, 'r')
-    if not fin:
-        print("Could not open {}.".format(file_or_word))
-        sys.exit(0)
+    if jobs is None:
+        jobs = default_jobs()
+    with open(filename, 'r') as fin:
+        if jobs > 1:
+            with new_pool(jobs) as pool:
+                pieces = analyze_parallel(whitespace_chunks(fin), mode, pool, jobs)
+                return _write(pieces, output)
+        return _write(analyze_chunks(read_chunks(fin), mode), output)
 
-    # Read the file into a string.
-    s = fin.read()
-    fin.close()
-
-    return analyze_string(s, mode)
+def _write(pieces, output):
+    """Write the pieces of a result to output, or return them joined if output is None."""
+    if output is None:
+        return "".join(pieces)
+    for piece in pieces:
+        output.write(piece)
+    return None
 
 # ------------------------ analyze_file
 
@@ -73,47 +116,121 @@ def analyze_string(text, mode):
     Return:
         analyzed text, or list of misspelled words (str)
     """
+    return "".join(analyze_chunks((text,), mode))
+
+# ------------------------ analyze_string
 
-    bad_words = set()    # To output list of misspelled words in spell-check mode.
-    new_text = ""   # To output analyzed text in morphological analysis mode (-m).
 
-    in_word = False
-    collected_chars = ""
-    for ch in text:   # Iterate over each character.
-        if is_word_char(ch):
-            in_word = True
-            collected_chars += ch
+def analyze_chunks(chunks, mode, counts = None):
+    """
+    Analyzes a stream of Esperanto text, given in chunks of any size. A word
+    which is cut by the end of a chunk is completed with the next chunk.
+    In morpheme mode, the analyzed text is produced chunk by chunk. In spell
+    checker mode, each misspelled word is produced once, followed by a new
+    line, in the order in which the misspelled words first appear.
+    Memory use depends on the size of the chunks, not of the whole text.
+    (The spell checker remembers the misspelled words which it has seen.)
+    Only the new chunk is searched for the end of the word which it
+    completes. A run of word characters longer than MAX_PARTIAL_WORD, which
+    is no real word, is not kept: it is invalid, output unchanged in
+    morpheme mode, and reported by its beginning in spell checker mode.
+    Params:
+        chunks - iterable of strings
+        morpheme mode: True = morphological analyzer, False = spell checker
+        counts - None, or a dictionary in which the numbers of words
+                 ("tokens") and of misspelled words ("unknown") are counted
+    Return:
+        generator of strings (analyzed text, or misspelled words)
+    """
+    if counts is not None:
+        counts.setdefault("tokens", 0)
+        counts.setdefault("unknown", 0)
+    misspelled = set()
+    partial = ""        # the beginning of a word cut by the end of the previous chunk
+    overlong = False    # True while the rest of an overlong word is skipped
+    for chunk in chunks:
+        if overlong:
+            cut = leading_word_end(chunk)
+            if mode and cut: yield chunk[:cut]
+            if cut == len(chunk): continue
+            overlong = False
+            chunk = chunk[cut:]
+        # A word at the end of the chunk may continue in the next one.
+        start = trailing_word_start(chunk)
+        if start == 0:     # the whole chunk continues the word
+            partial += chunk
         else:
-            if in_word:
-                result = check_word(collected_chars);
-                if mode:
-                    new_text += result.word
-                else:
-                    if not result.valid:
-                        bad_words.add(collected_chars)
-                collected_chars = ""
-            in_word = False
-            if mode:
-                new_text += ch
-
-    if in_word:
-        result = check_word(collected_chars)
+            text = partial + chunk if partial else chunk
+            end = len(partial) + start
+            partial = chunk[start:]
+            pieces = _analyze_text(text, end, mode, misspelled, counts)
+            if pieces: yield "".join(pieces)
+        if len(partial) > MAX_PARTIAL_WORD:
+            piece = _overlong_word(partial, mode, misspelled, counts)
+            if piece: yield piece
+            partial = ""
+            overlong = True
+    if partial:
+        pieces = _analyze_text(partial, len(partial), mode, misspelled, counts)
+        yield "".join(pieces)
+
+# ------------------------ analyze_chunks
+
+
+def _analyze_text(text, end, mode, misspelled, counts = None):
+    """
+    Analyzes text[:end]. The words are found by the tokenizer (see
+    literumilo_tokenizer.py); they and the text between them are sliced
+    from the text.
+    Params:
+        text
+        end - position after the last character to analyze
+        morpheme mode
+        misspelled - the set of misspelled words already reported
+        counts - None, or the counts of analyze_chunks()
+    Return:
+        list of strings to output
+    """
+    pieces = []
+    position = 0       # start of the text which has not been output
+    tokens = unknown = 0
+    for word_start, word_end in word_spans(text, 0, end):
+        word = text[word_start:word_end]
+        result = check_word(word)
+        tokens += 1
+        if not result.valid: unknown += 1
         if mode:
-            new_text += result.word
-        else:
-            if not result.valid:
-                bad_words.add(collected_chars)
-        collected_chars = ""
+            if word_start > position: pieces.append(text[position:word_start])
+            pieces.append(result.word)
+            position = word_end
+        elif not result.valid and word not in misspelled:
+            misspelled.add(word)
+            pieces.append(word + "\n")
+    if mode and position < end:
+        pieces.append(text[position:end])
+    if counts is not None:
+        counts["tokens"] += tokens
+        counts["unknown"] += unknown
+    return pieces
 
+# ------------------------ _analyze_text
+
+def _overlong_word(word, mode, misspelled, counts = None):
+    """
+    Returns the output of a word which is too long to analyze (see
+    analyze_chunks()). It is counted as a misspelled word.
+    """
+    if counts is not None:
+        counts["tokens"] += 1
+        counts["unknown"] += 1
     if mode:
-        return new_text
-    else:
-        bad_str = ""
-        for word in bad_words:
-            bad_str += "{}\n".format(word)
-        return bad_str
+        return word
+    if word in misspelled:
+        return ""
+    misspelled.add(word)
+    return word + "\n"
 
-# ------------------------ analyze_string
+# ------------------------ _overlong_word
 
 def main(params):
 
@@ -128,21 +245,37 @@ def main(params):
         print("Ĉi tiu programo bezonas 'Python 3'. Via versio estas {}.{}.".format(major, minor))
         sys.exit(0)
     
+    # Options: -m (morpheme mode), -j [N] (N processes, or one per processor),
+    # -c N and -s N (sizes of the caches of words and of compound stems).
+    # The last parameter is the file or word.
     morpheme_mode = False;
-    first_arg = params[1]
-    second_arg = ""
-    if (len(params) > 2):
-        second_arg = params[2]
-
-    file_or_word = first_arg
-    if len(params) > 2:
-        if first_arg == "-m":
+    jobs = 1
+    args = params[1:]
+    while len(args) > 1 and args[0] in ("-m", "-j", "-c", "-s"):
+        if args[0] == "-m":
             morpheme_mode = True
-            file_or_word = second_arg
+            args = args[1:]
+        elif args[0] in ("-c", "-s"):
+            if len(args) < 3 or not args[1].isdigit():
+                print(HOW_TO_USE)
+                sys.exit(1)
+            if args[0] == "-c":
+                export_cache_size(int(args[1]))
+            else:
+                export_cache_size(stems = int(args[1]))
+            args = args[2:]
+        elif len(args) > 2 and args[1].isdigit():
+            jobs = max(1, int(args[1]))
+            args = args[2:]
+        else:
+            jobs = None
+            args = args[1:]
+
+    file_or_word = args[0]
 
     if os.path.exists(file_or_word):   # If there is a file.
-        result = analyze_file(file_or_word, morpheme_mode)
-        print(result)
+        analyze_file(file_or_word, morpheme_mode, sys.stdout, jobs)
+        print()
 
     else: # If not a file, must be a word.
         word = x_to_accent(file_or_word)
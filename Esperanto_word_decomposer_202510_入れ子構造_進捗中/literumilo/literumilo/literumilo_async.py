@@ -0,0 +1,258 @@
+#! -*- coding: utf-8
+# literumilo_async.py
+#
+# Analysis for asyncio programs, such as web services. The analysis of a
+# long text takes processor time, which would block the event loop, so the
+# text is divided into chunks which end with white space (see
+# cut_at_whitespace() in literumilo_parallel.py), and each chunk is analyzed
+# by an executor:
+#
+#     "process" - a pool of worker processes, which analyze chunks in
+#                 parallel; each worker loads the dictionary once
+#     "thread"  - a pool of threads (the default); the event loop stays
+#                 responsive, but the threads share one processor (the GIL)
+#     "inline"  - the event loop itself, a small chunk at a time
+#                 (INLINE_CHUNK_SIZE); other tasks run between two chunks
+#
+# The chunks in progress wait in a bounded queue. When it is full, no more
+# input is read until the consumer takes a result, so a slow consumer does
+# not make memory grow: the reader (eg. a network connection) is not read,
+# and its own flow control applies.
+#
+#     text = await analyze_text_async(text)
+#     async for piece in analyze_stream(reader):
+#         ...
+#
+# Last edit date: 2026-10-16
+#
+
+import asyncio
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+
+from .literumilo_check_word import check_word, warm_up
+from .literumilo_parallel import CHUNKS_PER_WORKER, analyze_piece, cut_at_whitespace, \
+                                 default_jobs, new_misspelled, new_pool
+
+ASYNC_CHUNK_SIZE = 1 << 14   # characters (or bytes) read at a time
+INLINE_CHUNK_SIZE = 1 << 11  # characters analyzed between two yields to the loop (inline)
+PROCESS = "process"
+THREAD = "thread"
+INLINE = "inline"
+EXECUTOR_KINDS = (PROCESS, THREAD, INLINE)
+
+
+class _AsyncExecutor:
+    """The executor of the async functions (see set_executor())."""
+
+    def __init__(self):
+        self.kind = THREAD
+        self.jobs = None
+        self.pool = None
+
+    def get(self):
+        """Return (executor or None for inline, number of workers). The pool
+        is started when it is first needed."""
+        if self.kind == INLINE:
+            return None, 1
+        jobs = self.jobs or default_jobs()
+        if self.pool is None:
+            if self.kind == PROCESS:
+                self.pool = new_pool(jobs)
+            else:
+                self.pool = ThreadPoolExecutor(max_workers = jobs, thread_name_prefix = "literumilo",
+                                               initializer = warm_up)
+        return self.pool, jobs
+
+    def close(self):
+        pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait = True)
+
+async_executor = _AsyncExecutor()
+
+
+def set_executor(kind = THREAD, jobs = None):
+    """Choose the executor of the async functions, unless they are given
+    one. The previous pool, if any, is shut down.
+    Params:
+        kind - "process", "thread" or "inline" (see above)
+        jobs - number of workers (None = one per processor)
+    Return:
+        None
+        (ValueError is raised if kind is unknown)
+    """
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError("unknown executor: {} (expected one of {})".format(kind, ", ".join(EXECUTOR_KINDS)))
+    async_executor.close()
+    async_executor.kind = kind
+    async_executor.jobs = jobs
+
+
+def close_executor():
+    """Shut down the pool of the async functions (eg. when a service stops).
+    Another pool is started if they are called again."""
+    async_executor.close()
+
+
+def _executor(executor, jobs = None):
+    """Return (executor or None for inline, number of chunks in progress).
+    The workers of an executor which is given are not inspected: 'jobs' is
+    their number (None = one per processor)."""
+    if executor is None:
+        executor, jobs = async_executor.get()
+    elif executor == INLINE:
+        executor, jobs = None, 1
+    else:
+        jobs = jobs or default_jobs()
+    return executor, max(1, jobs * CHUNKS_PER_WORKER)
+
+
+async def check_word_async(word, executor = None):
+    """Check the spelling of a word (see check_word()) in the executor.
+    Params:
+        word
+        executor - None (see set_executor()), "inline", or a
+                   concurrent.futures.Executor
+    Return:
+        AnalysisResult
+    """
+    executor, _ = _executor(executor)
+    if executor is None:
+        return check_word(word)
+    return await asyncio.get_running_loop().run_in_executor(executor, check_word, word)
+
+
+async def analyze_text_async(text, mode = True, executor = None, jobs = None):
+    """
+    Analyzes a string of Esperanto text without blocking the event loop.
+    The result is the same as that of analyze_string().
+    Params:
+        text
+        morpheme mode: True = morphological analyzer, False = spell checker
+        executor - None (see set_executor()), "inline", or a
+                   concurrent.futures.Executor
+        jobs - number of workers of a given executor (None = one per processor)
+    Return:
+        analyzed text, or list of misspelled words (str)
+    """
+    pieces = [piece async for piece in _analyze_async(_text_chunks(text, ASYNC_CHUNK_SIZE), mode, executor, jobs)]
+    return "".join(pieces)
+
+
+def analyze_stream(reader, mode = True, executor = None, chunk_size = ASYNC_CHUNK_SIZE, jobs = None):
+    """
+    Analyzes a stream of Esperanto text without blocking the event loop.
+    The pieces are produced in order; joined, they are the same as the
+    result of analyze_string() for the whole text. Input is read only while
+    fewer than CHUNKS_PER_WORKER chunks per worker are in progress.
+    Params:
+        reader - an object with a coroutine read(size), such as an
+                 asyncio.StreamReader, or an async iterable; it gives
+                 strings, or bytes in UTF-8
+        morpheme mode: True = morphological analyzer, False = spell checker
+        executor - None (see set_executor()), "inline", or a
+                   concurrent.futures.Executor
+        chunk_size - characters (or bytes) read at a time
+        jobs - number of workers of a given executor (None = one per processor)
+    Return:
+        async generator of strings (analyzed text, or misspelled words)
+        (UnicodeDecodeError is raised if bytes are not UTF-8)
+    """
+    return _analyze_async(_reader_chunks(reader, chunk_size), mode, executor, jobs)
+
+
+def _slices(text, size):
+    """Divide a text into chunks of about 'size' characters which end with
+    white space (or at the end of the text)."""
+    rest = ""
+    for start in range(0, len(text), size):
+        chunk, rest = cut_at_whitespace(rest, text[start:start + size])
+        if chunk: yield chunk
+    if rest:
+        yield rest
+
+
+async def _text_chunks(text, size):
+    for chunk in _slices(text, size):
+        yield chunk
+
+
+async def _reader_chunks(reader, size):
+    decoder = None
+    rest = ""
+    async for block in _read_blocks(reader, size):
+        if isinstance(block, (bytes, bytearray)):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder("utf-8")()
+            block = decoder.decode(block)
+        chunk, rest = cut_at_whitespace(rest, block)
+        if chunk: yield chunk
+    if decoder is not None:
+        rest += decoder.decode(b"", final = True)
+    if rest:
+        yield rest
+
+
+async def _read_blocks(reader, size):
+    if hasattr(reader, "read"):
+        while True:
+            block = await reader.read(size)
+            if not block:
+                return
+            yield block
+    else:
+        async for block in reader:
+            yield block
+
+
+async def _analyze_async(chunks, mode, executor, jobs = None):
+    """
+    Analyzes chunks which do not cut words. A producer task reads the
+    chunks and submits them to the executor; their futures wait in a
+    bounded queue, and are taken in order. In spell checker mode, each
+    misspelled word is produced once, as in analyze_parallel().
+    Params:
+        chunks - async iterable of strings
+        morpheme mode
+        executor, jobs - see analyze_stream()
+    Return:
+        async generator of strings
+    """
+    executor, window = _executor(executor, jobs)
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize = window)
+    producer = loop.create_task(_produce(chunks, mode, executor, queue, loop))
+    misspelled = set()
+    try:
+        while True:
+            future = await queue.get()
+            if future is None:     # end of the chunks, or an error
+                break
+            result = await future
+            if not mode:
+                result = new_misspelled(result, misspelled)
+            if result: yield result
+        await producer             # raises the producer's error, if any
+    finally:
+        producer.cancel()
+        while not queue.empty():
+            future = queue.get_nowait()
+            if future is not None: future.cancel()
+
+
+async def _produce(chunks, mode, executor, queue, loop):
+    try:
+        async for chunk in chunks:
+            if executor is None:
+                for piece in _slices(chunk, INLINE_CHUNK_SIZE):
+                    future = loop.create_future()
+                    future.set_result(analyze_piece(piece, mode))
+                    await queue.put(future)
+                    await asyncio.sleep(0)     # let other tasks run
+            else:
+                await queue.put(loop.run_in_executor(executor, analyze_piece, chunk, mode))
+    except Exception:
+        await queue.put(None)
+        raise
+    await queue.put(None)
@@ -0,0 +1,245 @@
+#! -*- coding: utf-8
+# literumilo_batch.py
+#
+# Analyze all the text files of a directory (or of a glob pattern) in one
+# run, with one pool of worker processes, which load the dictionary once.
+# Each file gets its own output file, at the same relative path in the
+# output directory, and a manifest (manifest.json, in the output directory)
+# records, for each file, the sha256 digest of its content, the number of
+# words and of misspelled words, and the time of its analysis.
+#
+# When the batch is run again, a file is skipped if its digest is the one in
+# the manifest, its output exists, and the manifest was made in the same
+# mode from the same data: the digest of vortaro.tsv and PEJVO.txt (see
+# sources_key() in literumilo_disk_cache.py). If the dictionary did not
+# come unmodified from those files, nothing is skipped.
+#
+# Usage:
+#     python -m literumilo.literumilo_batch -m -j 8 articles/ analyzed/
+#     python -m literumilo.literumilo_batch "articles/**/*.txt" analyzed/
+#
+# As in literumilo.py, -m divides words into morphemes; without it, the
+# misspelled words of each file are listed.
+#
+# Last edit date: 2026-10-16
+#
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import as_completed
+
+from .literumilo import analyze_chunks, read_chunks
+from .literumilo_check_word import warm_up
+from .literumilo_disk_cache import sources_key
+from .literumilo_cache import DEFAULT_CACHE_SIZE, DEFAULT_STEM_CACHE_SIZE, export_cache_size
+from .literumilo_parallel import default_jobs, new_pool
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+BATCH_PATTERN = "*.txt"    # files of a directory which are analyzed
+
+
+def batch_files(source, pattern = BATCH_PATTERN):
+    """Find the files of a batch.
+    Params:
+        source - a directory (its files which match pattern, in all
+                 subdirectories), or a glob pattern (** matches subdirectories)
+        pattern - file name pattern, for a directory
+    Return:
+        (base directory, sorted list of absolute paths); output paths are
+        relative to the base directory
+    """
+    if os.path.isdir(source):
+        base = source
+        paths = glob.glob(os.path.join(glob.escape(source), "**", pattern), recursive = True)
+    else:
+        paths = glob.glob(source, recursive = True)
+        directories = [os.path.dirname(os.path.abspath(path)) for path in paths]
+        base = os.path.commonpath(directories) if directories else os.getcwd()
+    paths = sorted(os.path.abspath(path) for path in paths if os.path.isfile(path))
+    return os.path.abspath(base), paths
+
+
+def file_digest(path):
+    """Return the sha256 digest of a file (hexadecimal)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def analyze_batch_file(source, target, mode):
+    """
+    Analyze one file of a batch (in a worker process), and write the result
+    to the target file, chunk by chunk. The result is the same as that of
+    analyze_file(). The target is replaced only when it is complete; if the
+    analysis fails, the partial output is deleted.
+    Params:
+        source, target - paths of the text and of the result
+        morpheme mode: True = morphological analyzer, False = spell checker
+    Return:
+        (number of words, number of misspelled words, seconds)
+    """
+    began = time.perf_counter()
+    counts = {}
+    os.makedirs(os.path.dirname(target), exist_ok = True)
+    temporary = target + ".tmp"
+    try:
+        with open(source, encoding = "utf-8") as fin, open(temporary, "w", encoding = "utf-8") as fout:
+            for piece in analyze_chunks(read_chunks(fin), mode, counts):
+                fout.write(piece)
+        os.replace(temporary, target)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+    return counts["tokens"], counts["unknown"], time.perf_counter() - began
+
+
+def read_manifest(path):
+    """Return the manifest of an output directory, or None."""
+    try:
+        with open(path, encoding = "utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(path, manifest):
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding = "utf-8") as file:
+        json.dump(manifest, file, ensure_ascii = False, indent = 1)
+        file.write("\n")
+    os.replace(temporary, path)
+
+
+def analyze_directory(source, target, mode = True, jobs = None, pattern = BATCH_PATTERN):
+    """
+    Analyze the files of a batch (see batch_files()) with a shared pool of
+    worker processes, write one output file per file, and the manifest.
+    Unchanged files which were analyzed by an earlier run are skipped.
+    A file which cannot be analyzed (for example, if it is not UTF-8) is
+    recorded in the manifest with its error, and the batch continues. If the
+    batch itself fails (for example, a worker process dies), the manifest is
+    still written, with the files which were finished, and the error is raised.
+    Params:
+        source - a directory or a glob pattern
+        target - output directory (not the source directory)
+        morpheme mode: True = morphological analyzer, False = spell checker
+        jobs - number of worker processes (None = one per processor)
+        pattern - file name pattern, if source is a directory
+    Return:
+        the manifest (dict): "files" maps each relative path to its "sha256",
+        "tokens", "unknown" and "seconds" (or "error"); "analyzed",
+        "skipped", "failed" and "seconds" describe this run
+        (ValueError is raised if target is the source directory)
+    """
+    began = time.perf_counter()
+    base, paths = batch_files(source, pattern)
+    target = os.path.abspath(target)
+    if target == base:
+        raise ValueError("the output directory must not be the source directory: {}".format(target))
+    paths = [path for path in paths if not path.startswith(target + os.sep)]
+    manifest_path = os.path.join(target, MANIFEST_NAME)
+    lexicon = sources_key()
+    mode_name = "morph" if mode else "spell"
+
+    previous = read_manifest(manifest_path)
+    reusable = {}
+    if previous and lexicon is not None and previous.get("lexicon") == lexicon and \
+       previous.get("mode") == mode_name:
+        reusable = previous.get("files", {})
+
+    entries = {}
+    work = []     # (relative path, source, target, digest)
+    for path in paths:
+        relative = os.path.relpath(path, base)
+        output = os.path.join(target, relative)
+        digest = file_digest(path)
+        entry = reusable.get(relative)
+        if entry and "error" not in entry and entry.get("sha256") == digest and os.path.exists(output):
+            entries[relative] = entry
+        else:
+            work.append((relative, path, output, digest))
+
+    def record(relative, digest, outcome):
+        try:
+            tokens, unknown, seconds = outcome()
+            entries[relative] = {"sha256": digest, "tokens": tokens, "unknown": unknown,
+                                 "seconds": round(seconds, 6)}
+        except (OSError, ValueError) as error:    # UnicodeDecodeError is a ValueError
+            entries[relative] = {"sha256": digest, "error": str(error)}
+
+    if jobs is None:
+        jobs = default_jobs()
+    jobs = max(1, min(jobs, len(work)))
+    try:
+        if jobs > 1:
+            with new_pool(jobs) as pool:
+                futures = {pool.submit(analyze_batch_file, path, output, mode): (relative, digest)
+                           for relative, path, output, digest in work}
+                for future in as_completed(futures):
+                    relative, digest = futures[future]
+                    record(relative, digest, future.result)
+        else:
+            if work: warm_up()
+            for relative, path, output, digest in work:
+                record(relative, digest, lambda: analyze_batch_file(path, output, mode))
+    finally:
+        done = [relative for relative, _, _, _ in work if relative in entries]
+        failed = sum(1 for relative in done if "error" in entries[relative])
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "lexicon": lexicon,
+            "mode": mode_name,
+            "analyzed": len(done) - failed,
+            "skipped": len(paths) - len(work),
+            "failed": failed,
+            "seconds": round(time.perf_counter() - began, 6),
+            "files": dict(sorted(entries.items())),
+        }
+        os.makedirs(target, exist_ok = True)
+        _write_manifest(manifest_path, manifest)
+    return manifest
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description = "Analyze all the text files of a directory "
+                                     "or glob pattern, and write one output per file, and a manifest.")
+    parser.add_argument("source", help = "directory, or glob pattern (eg. 'articles/**/*.txt')")
+    parser.add_argument("target", help = "output directory")
+    parser.add_argument("-m", "--morphemes", action = "store_true",
+                        help = "divide words into morphemes (default: list misspelled words)")
+    parser.add_argument("-j", "--jobs", type = int, default = None,
+                        help = "number of worker processes (default: one per processor)")
+    parser.add_argument("--pattern", default = BATCH_PATTERN,
+                        help = "file names, if source is a directory (default: %(default)s)")
+    parser.add_argument("--cache-size", type = int, default = None, metavar = "WORDS",
+                        help = "words in the analysis cache of each process "
+                               "(default: {})".format(DEFAULT_CACHE_SIZE))
+    parser.add_argument("--stem-cache-size", type = int, default = None, metavar = "STEMS",
+                        help = "compound stems in the cache of each process "
+                               "(default: {})".format(DEFAULT_STEM_CACHE_SIZE))
+    args = parser.parse_args(argv)
+    export_cache_size(args.cache_size, args.stem_cache_size)
+    manifest = analyze_directory(args.source, args.target, args.morphemes, args.jobs, args.pattern)
+    tokens = sum(entry.get("tokens", 0) for entry in manifest["files"].values())
+    print("{} files analyzed, {} skipped, {} failed, {} words, {:.2f} s. Manifest: {}".format(
+          manifest["analyzed"], manifest["skipped"], manifest["failed"], tokens,
+          manifest["seconds"], os.path.join(os.path.abspath(args.target), MANIFEST_NAME)))
+    return 1 if manifest["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,273 @@
+#! -*- coding: utf-8
+# literumilo_cache.py
+#
+# A bounded cache of word analyses, used by check_word().
+#
+# Real text is dominated by a few hundred word forms ('la', 'de', 'kaj',
+# 'estas'...), so analyze_string() would analyze the same words again and
+# again. check_word() keeps the analyses of the most recently used words in
+# a WordCache, which evicts approximately the least recently used entries
+# first (it keeps two generations of words, see WordCache). Words are
+# cached in their normalized form (lower case, without hyphens), so 'Hundo'
+# and 'hundo' share one entry; capitals are restored on every call.
+#
+# Every analysis is stored with the version of the lexicon which produced it
+# (see lexicon_version() below). When the dictionary or the PEJVO map is
+# replaced or modified, the version changes, and the cache is emptied on its
+# next use.
+#
+# The number of cached words can be set with set_cache_size(), or with the
+# environment variable LITERUMILO_CACHE_SIZE. A size of 0 disables the cache.
+# A text whose vocabulary is larger than the cache gains little from it
+# (the words are evicted before they recur), so the size may be raised:
+# 71,000 words take about 20 MB.
+#
+# A second cache, stem_cache, holds the divisions of compound stems, keyed
+# by (stem, part of speech of the ending). The synthesis rules only read the
+# part of speech of the ending (MorphemeList.type_of_ending()), so 'birdejo',
+# 'birdejoj', 'birdejon' and 'birdejojn' share one division. Its size is set
+# by the parameter stems of set_cache_size(), or by LITERUMILO_STEM_CACHE_SIZE.
+#
+# The command line options which set the sizes (literumilo.py -c and -s,
+# literumilo_batch.py --cache-size and --stem-cache-size) use
+# export_cache_size(), which also sets the variables, so that the worker
+# processes started later use the same sizes.
+#
+# Last edit date: 2026-10-16
+#
+
+import os
+import sys
+import threading
+
+from .literumilo_load import get_dictionary, dictionary_generation
+from .literumilo_pejvo import pejvo_generation
+
+DEFAULT_CACHE_SIZE = 20000
+DEFAULT_STEM_CACHE_SIZE = 10000
+CACHE_SIZE_VARIABLE = "LITERUMILO_CACHE_SIZE"
+STEM_CACHE_SIZE_VARIABLE = "LITERUMILO_STEM_CACHE_SIZE"
+
+# Approximate size of one entry of a dict (hash table slot and entry),
+# in bytes, for memory estimates.
+_ENTRY_OVERHEAD = 50
+
+
+class WordCache:
+    """A thread-safe cache of word analyses, which evicts the least
+    recently used words first (approximately).
+
+    The words are kept in two generations, two plain dictionaries: 'recent'
+    and 'older'. A word is stored in 'recent'; a word found in 'older' is
+    moved back to 'recent'. When 'recent' holds half of the capacity (or the
+    cache is full), the words of 'older', which were not used since the
+    previous turn, are evicted, and 'recent' becomes 'older'. A hit in
+    'recent' is thus a single dictionary lookup, without reordering, and
+    without a lock: a single operation on a dictionary is atomic in CPython.
+    The lock is only taken when the generations turn, or the cache is
+    emptied. (The counters of the statistics may miss a few updates when
+    threads race.)
+    """
+
+    def __init__(self, capacity = DEFAULT_CACHE_SIZE):
+        """
+        Params:
+            capacity - maximum number of words (0 disables the cache)
+        """
+        self.capacity = max(0, capacity)
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._recent = {}
+        self._older = {}
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        with self._lock:
+            if version != self.version:
+                if self._recent or self._older:
+                    self._recent, self._older = {}, {}
+                    self.invalidations += 1
+                self.version = version
+
+    def get(self, word, version):
+        """Return the cached analysis of a word, or None.
+        Params:
+            normalized word
+            version of the lexicon
+        Return:
+            cached value or None
+        """
+        if self.capacity == 0:
+            self.misses += 1
+            return None
+        if version is not self.version and version != self.version:
+            self._check_version(version)
+        value = self._recent.get(word)
+        if value is None:
+            value = self._older.pop(word, None)
+            if value is None:
+                self.misses += 1
+                return None
+            self._store(word, value)
+        self.hits += 1
+        return value
+
+    def put(self, word, value, version):
+        """Store the analysis of a word, evicting the least recently used
+        words if the cache is full.
+        Params:
+            normalized word
+            value - analysis (not None)
+            version of the lexicon which produced the analysis
+        """
+        if self.capacity == 0:
+            return
+        if version is not self.version and version != self.version:
+            self._check_version(version)
+        self._store(word, value)
+
+    def _store(self, word, value):
+        recent = self._recent
+        recent[word] = value
+        if len(recent) > self.capacity // 2 or len(recent) + len(self._older) > self.capacity:
+            self._turn(recent)
+
+    def _turn(self, recent):
+        # The words of 'older' are evicted, and 'recent' becomes 'older'.
+        with self._lock:
+            if self._recent is recent:     # not already turned by another thread
+                self.evictions += len(self._older)
+                self._recent, self._older = {}, recent
+
+    def resize(self, capacity):
+        """Change the maximum number of words."""
+        with self._lock:
+            self.capacity = max(0, capacity)
+            if len(self) > self.capacity:
+                self.evictions += len(self._older)
+                self._recent, self._older = {}, self._recent
+                if len(self._older) > self.capacity:
+                    self.evictions += len(self._older)
+                    self._older = {}
+
+    def clear(self):
+        """Remove all words, and reset the statistics."""
+        with self._lock:
+            self._recent, self._older = {}, {}
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def __len__(self):
+        return len(self._recent) + len(self._older)
+
+    def __contains__(self, word):
+        return word in self._recent or word in self._older
+
+    def memory_usage(self):
+        """Estimate the memory used by the cached words and analyses, in bytes.
+        Return:
+            size in bytes (int)
+        """
+        with self._lock:
+            size = 0
+            for entries in (self._recent, self._older):
+                size += sys.getsizeof(entries) + _ENTRY_OVERHEAD * len(entries)
+                for word, value in list(entries.items()):
+                    size += sys.getsizeof(word) + sys.getsizeof(value)
+                    size += sum(sys.getsizeof(item) for item in value)
+            return size
+
+    def statistics(self):
+        """Return the statistics of the cache, as a dictionary:
+        size, capacity, hits, misses, hit_rate (0.0 to 1.0), evictions,
+        invalidations and memory (estimated bytes).
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "memory": self.memory_usage(),
+        }
+
+
+_version = (None, None, None)   # the last lexicon_version()
+
+
+def lexicon_version():
+    """Return the version of the data which check_word() uses: the
+    dictionary and the PEJVO map. It changes whenever one of them is
+    replaced or modified, which invalidates the analysis cache.
+    Return:
+        tuple of int
+    """
+    global _version
+    generation = dictionary_generation()
+    version = getattr(get_dictionary(), "version", 0)
+    pejvo = pejvo_generation()
+    current = _version
+    if current[0] != generation or current[1] != version or current[2] != pejvo:
+        current = _version = (generation, version, pejvo)   # a new tuple only on a change
+    return current
+
+
+def cache_size_from_environment(variable = CACHE_SIZE_VARIABLE, default = DEFAULT_CACHE_SIZE):
+    """Return the cache size set by an environment variable
+    (LITERUMILO_CACHE_SIZE by default), or the default size if the
+    variable is not set or invalid."""
+    value = os.environ.get(variable)
+    try:
+        return int(value) if value else default
+    except ValueError:
+        return default
+
+
+word_cache = WordCache(cache_size_from_environment())
+stem_cache = WordCache(cache_size_from_environment(STEM_CACHE_SIZE_VARIABLE, DEFAULT_STEM_CACHE_SIZE))
+
+
+def set_cache_size(capacity, stems = None):
+    """Set the maximum number of words in the analysis cache of check_word().
+    Params:
+        capacity - number of words (0 disables the cache)
+        stems - number of compound stems (None = unchanged)
+    """
+    word_cache.resize(capacity)
+    if stems is not None:
+        stem_cache.resize(stems)
+
+
+def export_cache_size(capacity = None, stems = None):
+    """Set the sizes of the analysis caches, in this process and in the
+    worker processes which it starts later (through LITERUMILO_CACHE_SIZE
+    and LITERUMILO_STEM_CACHE_SIZE).
+    Params:
+        capacity - number of words (None = unchanged)
+        stems - number of compound stems (None = unchanged)
+    """
+    if capacity is not None:
+        os.environ[CACHE_SIZE_VARIABLE] = str(capacity)
+        word_cache.resize(capacity)
+    if stems is not None:
+        os.environ[STEM_CACHE_SIZE_VARIABLE] = str(stems)
+        stem_cache.resize(stems)
+
+
+def cache_statistics(cache = "words"):
+    """Return the statistics of the analysis cache of check_word(),
+    or, if cache is "stems", of the cache of compound stems.
+    See WordCache.statistics().
+    """
+    return (stem_cache if cache == "stems" else word_cache).statistics()
+
+
+def clear_cache():
+    """Empty the analysis caches of check_word(), and reset their statistics."""
+    word_cache.clear()
+    stem_cache.clear()
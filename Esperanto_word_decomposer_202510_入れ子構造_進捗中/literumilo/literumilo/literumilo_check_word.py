@@ -7,44 +7,192 @@
 # Last edit date: 2020-05-01
 #
 
-import os, sys
+import os, sys, threading
+from functools import partial
 from .literumilo_entry import *
 from .literumilo_ending import *
-from .literumilo_suffix import check_suffix
+from .literumilo_rules import check_affix
+from .literumilo_suffix import MODIFIED_SUFFIXES
 from .literumilo_morpheme_list import MorphemeList
 from .literumilo_scan_morphemes import scan_morphemes
 from .literumilo_utils import *
-from .literumilo_load import load_dictionary
-from .literumilo_pejvo import lookup_pejvo
-
-esperanto_dictionary = load_dictionary()
+from .literumilo_load import get_dictionary
+from .literumilo_lexicon import probe_morphemes_at
+from .literumilo_pejvo import lookup_pejvo, load_pejvo_decompositions
+from .literumilo_cache import word_cache, stem_cache, lexicon_version
+from .literumilo_disk_cache import active_disk_cache
+from .literumilo_lattice import find_division, best_divisions, search_steps, \
+                                SearchBudgetExceeded, SearchQuotaSpent
+
+# find_morpheme_at() calls before a compound word is given to the lattice search
+# (see divide_compound()). Almost all words take fewer than 20.
+BACKTRACKING_STEPS = 64
+
+# The step counter and morpheme list of divide_compound(), reused for
+# every stem which a thread divides.
+_backtracking = threading.local()
+
+# Reading a member of an Enum class is slow, so the search reads these.
+_NO_SYNTHESIS = Synthesis.No
+_SUFFIX = Synthesis.Suffix
+
+# The dictionary is loaded lazily, on the first call to check_word() or
+# warm_up(). The name 'esperanto_dictionary' is still available as a module
+# attribute, for code which reads it directly.
+
+def __getattr__(name):
+    if name == "esperanto_dictionary":
+        return get_dictionary()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 # AnalysisResult
 # 'word' has the original word divided into morphemes, eg. 'mis.dir.it.a'.
 # valid is True if the word is a valid Esperanto word. (correctly spelled)
+# status is VALID, INVALID, or BUDGET_EXCEEDED if the search for a division
+# was abandoned (see set_search_budget() in literumilo_lattice.py); such a
+# word is not valid, and is not cached.
+# The capitals of the original word are restored in 'word' when it is first
+# read, so a spell check, which only reads 'valid', does not build it.
+
+VALID = "valid"
+INVALID = "invalid"
+BUDGET_EXCEEDED = "budget_exceeded"
 
 class AnalysisResult:
-    def __init__(self, original, word, valid):
+
+    __slots__ = ("_original", "_divided", "_word", "valid", "status")
+
+    def __init__(self, original, word, valid, status = None):
         """
         Params:
             original word
             word - divided into morphemes
             valid - True or False
+            status - VALID, INVALID or BUDGET_EXCEEDED (None = from valid)
         """
-        self.word = restore_capitals(original, word)
+        self._original = original
+        self._divided = word
+        self._word = None
         self.valid = valid
+        self.status = status if status else (VALID if valid else INVALID)
+
+    @property
+    def word(self):
+        word = self._word
+        if word is None:
+            word = self._word = restore_capitals(self._original, self._divided)
+        return word
+
+# ScoredAnalysis
+# One of the analyses returned by analyze_nbest(). 'word' has the word divided
+# into morphemes, and 'cost' is the sum of the rarity of its morphemes.
+# (Common morphemes have a low rarity, so a low cost is better.)
+
+class ScoredAnalysis:
+    def __init__(self, original, word, cost):
+        """
+        Params:
+            original word
+            word - divided into morphemes
+            cost - sum of rarity (int)
+        """
+        self.word = restore_capitals(original, word)
+        self.cost = cost
+
+    def __repr__(self):
+        return "ScoredAnalysis({!r}, {})".format(self.word, self.cost)
+
+# Exceptions.
+# A few words cause difficulties for the algorithm, especially accusative pronouns.
+# For example, the pronoun 'vin' means 'you' (accusative), but it is also the root for 'wine' (vino).
+# I want the pronoun to divided as 'vi.n' and the beverage to be 'vin.o' (not vi.n.o). The dictionary
+# has 'vin' as a key, but the keys in a dictionary must be unique. To solve this problem, some
+# pronouns (etc.) will be excluded from the dictionary, and handled as exceptions here.
+
+EXCEPTIONS = {
+    "ĝin": "ĝi.n",
+    "lin": "li.n",
+    "min": "mi.n",
+    "sin": "si.n",
+    "vin": "vi.n",
+    "lian": "li.an",
+    "cian": "ci.an",
+}
+
+ENDING_TOKENS = {
+    "o","on","oj","ojn","a","an","aj","ajn","e","en",
+    "i","is","as","os","u","us"
+}
+
+def score_segmentation(segmentation, dictionary):
+    """Assign a score to a morpheme segmentation: lower is better.
+    Sum dictionary rarity for known morphemes; penalize unknowns lightly.
+    Ignore grammatical endings.
+    Params:
+        segmentation - eg. 'mis.dir.it.a'
+        dictionary
+    Return:
+        score (int)
+    """
+    score = 0
+    if not segmentation:
+        return 1_000_000
+    parts = [p for p in segmentation.split('.') if p]
+    for p in parts:
+        if p in ENDING_TOKENS:
+            continue
+        entry = dictionary.get(p)
+        if entry:
+            score += getattr(entry, 'rarity', 3)
+        else:
+            score += 5  # mild penalty for unknown piece
+    return score
+
+def choose_segmentation(segmentation, valid, pejvo_segmentation, dictionary):
+    """Choose between the division found by analyze_word() and the one
+    given by PEJVO. Preference order to uphold uniqueness and common usage:
+    1) If only one of algorithm/PEJVO is valid, choose the valid one.
+    2) If both exist and differ, prefer the one with lower rarity score.
+    3) If tie, prefer algorithmic segmentation.
+    Params:
+        segmentation - found by the algorithm
+        valid - True if the segmentation is valid
+        pejvo_segmentation - from lookup_pejvo(), or None
+        dictionary
+    Return:
+        tuple (word divided into morphemes, valid)
+    """
+    if not pejvo_segmentation:
+        return (segmentation, valid)
+
+    if not valid:
+        return (pejvo_segmentation, True)
+
+    if segmentation == pejvo_segmentation:
+        return (segmentation, True)
+
+    alg_score = score_segmentation(segmentation, dictionary)
+    pjv_score = score_segmentation(pejvo_segmentation, dictionary)
+    if pjv_score < alg_score:
+        return (pejvo_segmentation, True)
+    else:
+        return (segmentation, True)
 
-def check_synthesis(rest_of_word, dictionary, index, morpheme_list, last_morpheme):
+def check_synthesis(word, start, dictionary, index, morpheme_list, last_morpheme, steps = None):
     """check_synthesis (kontrolu sintezon)
     This method checks the synthesis of suffixes when they are found,
     and other morphemes (prefixes, roots) after the word has been
-    completely divided, by calling scan_morphemes().
+    completely divided, by calling scan_morphemes(). (find_morpheme_at()
+    makes the same checks for the morphemes which it finds, without calling
+    this function.)
     Params:
-        rest of word
+        word
+        start of the rest of the word (position in word)
         dictionary
         index of morpheme (int)
         list of morphemes
         last_morpheme (t/f)
+        steps - see find_morpheme_at()
     Return:
         True if valid, False otherwise
     """
@@ -53,14 +201,13 @@ def check_synthesis(rest_of_word, dictionary, index, morpheme_list, last_morphem
     if not entry: return False
 
     syn = entry.synthesis
-    morph = entry.morpheme
 
-    if syn == Synthesis.Suffix and not check_suffix(morph, index, morpheme_list):
+    if syn == _SUFFIX and not check_affix(entry, index, morpheme_list):
         return False
 
     if not last_morpheme:
         # Divide the rest of the word into morphemes.
-        if find_morpheme(rest_of_word, dictionary, index + 1, morpheme_list):
+        if find_morpheme_at(word, start, dictionary, index + 1, morpheme_list, steps):
             return True
         return False
 
@@ -77,7 +224,8 @@ def check_synthesis(rest_of_word, dictionary, index, morpheme_list, last_morphem
 def find_morpheme(rest_of_word, dictionary, index, morpheme_list):
     """find_morpheme (trovu_radikon)
     This function divides a (presumably) compound word into morphemes,
-    while checking synthesis. It is recursive.
+    while checking synthesis. (The search is done by find_morpheme_at(),
+    which takes the position of the remainder in the word.)
     Params:
         rest_of_word - the remainder to be analyzed
         dictionary - a map of word data
@@ -86,61 +234,262 @@ def find_morpheme(rest_of_word, dictionary, index, morpheme_list):
     Return:
         True for valid synthesis, False for invalid.
     """
+    return find_morpheme_at(rest_of_word, 0, dictionary, index, morpheme_list)
+
+
+def find_morpheme_at(word, start, dictionary, index, morpheme_list, steps = None):
+    """This function divides a (presumably) compound word into morphemes,
+    while checking synthesis. It is recursive. The rest of the word to
+    be analyzed is word[start:]; no substrings are made. Candidate
+    morphemes are found with one walk through the dictionary's trie
+    (see Lexicon.morphemes_at(); a plain mapping of entries is probed
+    with every substring, see probe_morphemes_at()).
+    Backtracking is fast for most words, but some words have very many
+    divisions; see divide_compound().
+    Params:
+        word - the word (without ending) being divided
+        start - position of the remainder to be analyzed
+        dictionary - a map of word data
+        index of morpheme (indekso de radiko)
+        morpheme_list - holds a list of previously collected morphemes
+        steps - counts each call (see search_steps() in
+                literumilo_lattice.py), or None
+    Return:
+        True for valid synthesis, False for invalid.
+        (SearchBudgetExceeded or SearchQuotaSpent may be raised by steps)
+    """
 
-    if len(rest_of_word) == 0:
+    if steps is not None:
+        # steps.take(), without a call: this is the innermost loop of the search.
+        steps.count += 1
+        if steps.count >= steps.check:
+            steps.checkpoint()
+
+    word_end = len(word)
+    length_of_word = word_end - start   # length of the remainder
+    if length_of_word <= 0:
         return False
 
     if index >= MorphemeList.MAX_MORPHEMES:
         return False
 
-    if index > 0:
-        entry = dictionary.get(rest_of_word)
-        if entry:
-            # Do we allow this morpheme to join with others?
-            if entry.synthesis != Synthesis.No:
-                morpheme_list.put(index, entry)
-                valid = check_synthesis(rest_of_word, dictionary, index, morpheme_list, True)
-                if valid: return True
-
-    length_of_word = len(rest_of_word)
     min_length = 2;  # minimum length of a morpheme
     max_length = length_of_word - 2
 
-    # Try to find a valid morpheme, by dividing the rest of the word.
-    for size in range(max_length, min_length - 1, -1):
-        morpheme = rest_of_word[0:size]
-        entry = dictionary.get(morpheme)
-        if entry:
-            # Do we allow this morpheme to join with others?
-            if entry.synthesis != Synthesis.No:
-                rest_of_word2 = rest_of_word[size:]  # Careful, rest_of_word != rest_of_word2
-                morpheme_list.put(index, entry)
-                valid = check_synthesis(rest_of_word2, dictionary, index, morpheme_list, False)
-                if valid: return True
+    # All morphemes which begin at 'start', longest first. If there is one
+    # which covers the rest of the word, it comes first.
+    try:
+        morphemes_at = dictionary.morphemes_at
+    except AttributeError:     # a plain mapping of entries, or a lexicon image
+        morphemes_at = partial(probe_morphemes_at, dictionary, min_length = min_length)
+    if index > 0:
+        matches = morphemes_at(word, start, length_of_word)
+    else:
+        matches = morphemes_at(word, start, max_length)
+
+    for length, entry in matches:
+        if length < min_length:
+            break
+        end = start + length
+        # Do we allow this morpheme to join with others?
+        synthesis = entry.synthesis
+        if synthesis == _NO_SYNTHESIS:
+            continue
+        if synthesis == _SUFFIX and entry.morpheme in MODIFIED_SUFFIXES:
+            # The suffix rule modifies it; the dictionary entry is shared.
+            entry = EntryOverlay(entry)
+        # The checks of check_synthesis() are made here, without the call.
+        if end == word_end:
+            # The morpheme covers the rest of the word.
+            morpheme_list.put(index, entry)
+            if synthesis == _SUFFIX and not check_affix(entry, index, morpheme_list):
+                continue
+            if scan_morphemes(morpheme_list): return True
+        elif length <= max_length:
+            # Try to find a valid morpheme, by dividing the rest of the word.
+            morpheme_list.put(index, entry)
+            if synthesis == _SUFFIX and not check_affix(entry, index, morpheme_list):
+                continue
+            if find_morpheme_at(word, end, dictionary, index + 1, morpheme_list, steps): return True
 
     # Sometimes there is a separator (a grammatical ending) between morphemes.
     # This is usually done to aid pronunciation. Instead of 'fingr.montri.', most would
     # write 'fingr.o.montr.i'. Other examples are: ĝust.a.temp.e, unu.a.foj.e, etc.
     # This algorithm will accept one separator per word. It must be 'o', 'a' or 'e'.
     if index == 0 or length_of_word < 3: return False
-    separator_entry = EspDictEntry.new_separator(rest_of_word[0])
+    separator_entry = EspDictEntry.new_separator(word[start])
     if separator_entry:
         morpheme_list.put(index, separator_entry)
-        rest_of_word2 = rest_of_word[1:]
-        valid = check_synthesis(rest_of_word2, dictionary, index, morpheme_list, False)
+        valid = check_synthesis(word, start + 1, dictionary, index, morpheme_list, False, steps)
         if valid: return True
 
     return False
 
+def analyze_word(word, esperanto_dictionary, version = None):
+    """Divide a normalized word (lower case, without hyphens) into morphemes.
+    check_word() caches the result.
+    Params:
+        word - normalized word
+        esperanto_dictionary - a map of word data
+        version - lexicon_version(), if the caller has it (see divide_stem())
+    Return:
+        tuple (word divided into morphemes, valid)
+        (SearchBudgetExceeded is raised if the division of a compound word
+        exceeds the search budget)
+    """
+
+    # Most words are a single root with an ending, or a word without ending.
+    # They are divided with one lookup in the table of full forms (see
+    # Lexicon.full_form()). PEJVO is only preferred if its score is lower
+    # (see choose_segmentation()), so it need not be consulted for the most
+    # common morphemes, whose score is 0.
+    full_form = None
+    lookup_full_form = getattr(esperanto_dictionary, "full_form", None)
+    if word not in EXCEPTIONS:
+        if lookup_full_form:
+            found = lookup_full_form(word)
+            if found is not None:
+                full_form, common = found
+                if common:
+                    return (full_form, True)
+
+    length_of_word = len(word)
+    pejvo_segmentation = lookup_pejvo(word)
+
+    if full_form is not None:
+        return choose_segmentation(full_form, True, pejvo_segmentation, esperanto_dictionary)
+
+    # Exceptions, such as 'vin' (vi.n). See EXCEPTIONS above.
+    exception = EXCEPTIONS.get(word)
+    if exception:
+        return choose_segmentation(exception, True, pejvo_segmentation, esperanto_dictionary)
+
+    # First, check the dictionary for words which have no
+    # grammatical ending, eg. 'ne', 'dum', 'post', and for roots
+    # with an ending. The table of full forms has all of them, so
+    # after a miss, the dictionary need not be read.
+    if not lookup_full_form:
+        entry = esperanto_dictionary.get(word)
+        if entry:
+            if entry.without_ending == WithoutEnding.Yes:
+                return choose_segmentation(entry.morpheme, True, pejvo_segmentation, esperanto_dictionary)
+
+    ending = get_ending(word)
+    if ending == None:
+        return choose_segmentation(word, False, pejvo_segmentation, esperanto_dictionary)
+    else:
+        length = length_of_word - ending.length
+        word_without_ending = word[0:length]
+        if word_without_ending in esperanto_dictionary:
+            if not lookup_full_form:
+                entry = esperanto_dictionary.get(word_without_ending)
+                if entry.with_ending == WithEnding.Yes:
+                    word_with_ending = entry.morpheme + "." + ending.ending
+                    return choose_segmentation(word_with_ending, True, pejvo_segmentation, esperanto_dictionary)
+        else:
+            # The root was not found. Maybe it's a compound word.
+            # Do a morphological analysis.
+
+            # The division needs the ending for later analysis.
+            # (See divide_stem() below.)
+            stem_form = divide_stem(word_without_ending, esperanto_dictionary, ending, version)
+
+            if stem_form:
+                display_form = stem_form + "." + ending.ending
+                return choose_segmentation(display_form, True, pejvo_segmentation, esperanto_dictionary)
+            else:
+                return choose_segmentation(word, False, pejvo_segmentation, esperanto_dictionary)
+
+    return choose_segmentation(word, False, pejvo_segmentation, esperanto_dictionary)
+
+# analyze_word
+
+
+def stem_form(division):
+    """Join the morphemes of a division (see find_division()),
+    eg. 'bird.ej'. Return None if there is no division."""
+    if division is None:
+        return None
+    return ".".join([entry.morpheme for entry in division])
+
+
+def divide_compound(stem, dictionary, ending):
+    """Divide a compound stem (a word without its ending) into morphemes,
+    checking their synthesis. Most stems are divided by find_morpheme_at() in
+    a few calls. But backtracking takes exponential time for a word which
+    has very many divisions (eg. 'barbarbarbarbaro'), so a search which
+    takes more than BACKTRACKING_STEPS calls is abandoned, and the stem is
+    divided by find_division() (literumilo_lattice.py), which finds the same
+    division in polynomial time. Both searches count their steps against
+    the search budget.
+    Params:
+        stem - lower case, without ending
+        dictionary - a map of word data
+        ending - the grammatical ending (see get_ending())
+    Return:
+        morphemes of the stem, eg. 'bird.ej', or None if invalid
+        (SearchBudgetExceeded is raised if the search exceeds the budget)
+    """
+    try:
+        steps, morpheme_list = _backtracking.context
+    except AttributeError:     # the first search of this thread
+        steps = search_steps(stem, BACKTRACKING_STEPS)
+        morpheme_list = MorphemeList(ending)
+        _backtracking.context = steps, morpheme_list
+    else:
+        steps.begin(stem, BACKTRACKING_STEPS)
+        morpheme_list.reset(ending)
+    try:
+        found = find_morpheme_at(stem, 0, dictionary, 0, morpheme_list, steps)
+    except SearchQuotaSpent:
+        return stem_form(find_division(stem, dictionary, ending))
+    except SearchBudgetExceeded:
+        steps.record(True)
+        raise
+    steps.record()
+    return morpheme_list.stem_form() if found else None
+
+
+def divide_stem(stem, dictionary, ending, version = None):
+    """Divide a compound stem (a word without its ending) into morphemes
+    (see divide_compound()). The synthesis rules only read the part of
+    speech of the ending, so the divisions of the global dictionary are
+    cached by (stem, part of speech), and shared by all the inflections
+    of a word. (See stem_cache in literumilo_cache.py.)
+    Params:
+        stem - lower case, without ending
+        dictionary - a map of word data
+        ending - the grammatical ending (see get_ending())
+        version - lexicon_version() (computed if None)
+    Return:
+        morphemes of the stem, eg. 'bird.ej', or None if invalid
+    """
+    if stem_cache.capacity == 0 or dictionary is not get_dictionary():
+        return divide_compound(stem, dictionary, ending)
+    if version is None:
+        version = lexicon_version()
+    key = (stem, ending.part_of_speech)
+    cached = stem_cache.get(key, version)
+    if cached is None:
+        cached = (divide_compound(stem, dictionary, ending),)
+        stem_cache.put(key, cached, version)
+    return cached[0]
+
+# divide_stem
+
+
 def check_word(original_word):
     """This function tests whether a word is correctly spelled.
+    Analyses are cached by their normalized form (see literumilo_cache.py,
+    and literumilo_disk_cache.py for the optional persistent cache).
     Params:
         original word
-        dictionary - a map of word data
     Return:
         AnalysisResult
     """
 
+    esperanto_dictionary = get_dictionary()
+
     if len(original_word) == 1:   # Just a letter or hyphen.
         if is_word_char(original_word):
             return AnalysisResult(original_word, original_word, True)
@@ -159,105 +508,121 @@ def check_word(original_word):
 
     original_word = remove_hyphens(original_word)
 
-    # Lower case for analysis.
-    word = original_word.lower()
-    length_of_word = len(word)
-    pejvo_segmentation = lookup_pejvo(word)
+    # Lower case for analysis. (Most words are already in lower case.)
+    word = original_word if original_word.islower() else original_word.lower()
+    # A disabled cache is not consulted, and the version of the data is
+    # only read for the caches which are enabled.
+    if word_cache.capacity:
+        version = lexicon_version()
+        analysis = word_cache.get(word, version)
+    else:
+        version = analysis = None
+    if analysis is None:
+        disk_cache = active_disk_cache(version)
+        if disk_cache is not None:
+            analysis = disk_cache.get(word)
+        if analysis is None:
+            try:
+                analysis = analyze_word(word, esperanto_dictionary, version)
+            except SearchBudgetExceeded:
+                # Not cached: with a larger budget, the word may be divided.
+                return AnalysisResult(original_word, word, False, BUDGET_EXCEEDED)
+            if disk_cache is not None:
+                disk_cache.put(word, analysis)
+        if version is not None:
+            word_cache.put(word, analysis, version)
+    segmentation, valid = analysis
+    return AnalysisResult(original_word, segmentation, valid)
 
-    ENDING_TOKENS = {
-        "o","on","oj","ojn","a","an","aj","ajn","e","en",
-        "i","is","as","os","u","us"
-    }
+# check_word
 
-    def score_segmentation(segmentation):
-        """Assign a score to a morpheme segmentation: lower is better.
-        Sum dictionary rarity for known morphemes; penalize unknowns lightly.
-        Ignore grammatical endings.
-        """
-        score = 0
-        if not segmentation:
-            return 1_000_000
-        parts = [p for p in segmentation.split('.') if p]
-        for p in parts:
-            if p in ENDING_TOKENS:
-                continue
-            entry = esperanto_dictionary.get(p)
-            if entry:
-                score += getattr(entry, 'rarity', 3)
-            else:
-                score += 5  # mild penalty for unknown piece
-        return score
-
-    def finalize(segmentation, valid):
-        # Preference order to uphold uniqueness and common usage:
-        # 1) If only one of algorithm/PEJVO is valid, choose the valid one.
-        # 2) If both exist and differ, prefer the one with lower rarity score.
-        # 3) If tie, prefer algorithmic segmentation.
-        if not pejvo_segmentation:
-            return AnalysisResult(original_word, segmentation, valid)
-
-        if not valid:
-            return AnalysisResult(original_word, pejvo_segmentation, True)
-
-        if segmentation == pejvo_segmentation:
-            return AnalysisResult(original_word, segmentation, True)
-
-        alg_score = score_segmentation(segmentation)
-        pjv_score = score_segmentation(pejvo_segmentation)
-        if pjv_score < alg_score:
-            return AnalysisResult(original_word, pejvo_segmentation, True)
-        else:
-            return AnalysisResult(original_word, segmentation, True)
-
-    # Exceptions.
-    # A few words cause difficulties for the algorithm, especially accusative pronouns.
-    # For example, the pronoun 'vin' means 'you' (accusative), but it is also the root for 'wine' (vino).
-    # I want the pronoun to divided as 'vi.n' and the beverage to be 'vin.o' (not vi.n.o). The dictionary
-    # has 'vin' as a key, but the keys in a dictionary must be unique. To solve this problem, some
-    # pronouns (etc.) will be excluded from the dictionary, and handled as exceptions here.
-
-    if length_of_word < 5:
-        if (word == "ĝin"): return finalize("ĝi.n", True)
-        if (word == "lin"): return finalize("li.n", True)
-        if (word == "min"): return finalize("mi.n", True)
-        if (word == "sin"): return finalize("si.n", True)
-        if (word == "vin"): return finalize("vi.n", True)
-        if (word == "lian"): return finalize("li.an", True)
-        if (word == "cian"): return finalize("ci.an", True)
 
-    # First, check the dictionary for words which have no
-    # grammatical ending, eg. 'ne', 'dum', 'post'.
-    entry = esperanto_dictionary.get(word)
-    if entry:
-        if entry.without_ending == WithoutEnding.Yes:
-            return finalize(entry.morpheme, True)
+def analyze_nbest(original_word, k = 5):
+    """This function finds up to k valid divisions of a word into morphemes,
+    with their costs (the sum of the rarity of the morphemes), cheapest first.
+    The divisions of compound words are found by best-first search (see
+    best_divisions() in literumilo_lattice.py). The PEJVO decomposition, if
+    there is one, is also a candidate. Note that check_word() does not always
+    choose the cheapest division; it prefers the first one found by its
+    longest-first search. If the search exceeds the budget (see
+    set_search_budget() in literumilo_lattice.py), the divisions which do
+    not need it (the dictionary, the exceptions and PEJVO) are returned.
+    Params:
+        original word
+        k - maximum number of divisions
+    Return:
+        list of ScoredAnalysis (empty if the word is not valid)
+    """
 
-    ending = get_ending(word)
-    if ending == None:
-        return finalize(word, False)
-    else:
-        length = length_of_word - ending.length
-        word_without_ending = word[0:length]
-        entry = esperanto_dictionary.get(word_without_ending)
+    esperanto_dictionary = get_dictionary()
+    if k <= 0: return []
+
+    if len(original_word) == 1:   # Just a letter or hyphen.
+        if is_word_char(original_word):
+            return [ScoredAnalysis(original_word, original_word, 0)]
+        return []
+
+    # Abbreviations, such as n-r.oj, s-in.oj
+    if len(original_word) > 2 and is_hyphen(original_word[1]):
+        entry = esperanto_dictionary.get(original_word)
         if entry:
-            if entry.with_ending == WithEnding.Yes:
-                word_with_ending = entry.morpheme + "." + ending.ending
-                return finalize(word_with_ending, True)
-        else:
-            # The root was not found. Maybe it's a compound word.
-            # Do a morphological analysis.
+            return [ScoredAnalysis(original_word, entry.morpheme, entry.rarity)]
+        return []
 
-            # The morpheme list needs the ending for later analysis.
-            morpheme_list = MorphemeList(ending)
+    original_word = remove_hyphens(original_word)
+    word = original_word.lower()
 
-            valid_word = find_morpheme(word_without_ending, esperanto_dictionary, 0, morpheme_list)
+    candidates = []   # (cost, segmentation), in order of preference for equal costs
 
-            if valid_word:
-                display_form = morpheme_list.display_form()
-                return finalize(display_form, True)
-            else:
-                return finalize(word, False)
+    exception = EXCEPTIONS.get(word)
+    if exception:
+        candidates.append((score_segmentation(exception, esperanto_dictionary), exception))
 
-    return finalize(word, False)
+    entry = esperanto_dictionary.get(word)
+    if entry and entry.without_ending == WithoutEnding.Yes:
+        candidates.append((entry.rarity, entry.morpheme))
 
-# check_word
+    ending = get_ending(word)
+    if ending:
+        word_without_ending = word[0:len(word) - ending.length]
+        entry = esperanto_dictionary.get(word_without_ending)
+        if entry and entry.with_ending == WithEnding.Yes:
+            candidates.append((entry.rarity, entry.morpheme + "." + ending.ending))
+        try:
+            divisions = best_divisions(word_without_ending, esperanto_dictionary, ending, k)
+        except SearchBudgetExceeded:
+            divisions = []     # recorded in search_statistics()
+        for cost, morpheme_list in divisions:
+            candidates.append((cost, morpheme_list.display_form()))
+
+    pejvo_segmentation = lookup_pejvo(word)
+    if pejvo_segmentation:
+        candidates.append((score_segmentation(pejvo_segmentation, esperanto_dictionary),
+                           pejvo_segmentation))
+
+    candidates.sort(key = lambda candidate: candidate[0])   # stable
+    results = []
+    seen = set()
+    for cost, segmentation in candidates:
+        if segmentation.lower() in seen: continue
+        seen.add(segmentation.lower())
+        results.append(ScoredAnalysis(original_word, segmentation, cost))
+        if len(results) == k: break
+    return results
+
+# analyze_nbest
+
+
+def warm_up():
+    """Load the dictionary and the PEJVO decompositions, and run a word
+    through the analyzer, so that the first real request does not pay
+    for initialization. Services should call this before they accept
+    traffic. It is safe to call more than once, and from several threads.
+    """
+    dictionary = get_dictionary()
+    if hasattr(dictionary, "morphemes_at"):
+        dictionary.morphemes_at("", 0, 0)   # builds the trie
+    load_pejvo_decompositions()
+    check_word("ĉirkaŭiris")
+
+# warm_up
@@ -0,0 +1,314 @@
+#! -*- coding: utf-8
+# literumilo_disk_cache.py
+#
+# An optional, persistent cache of word analyses, stored in a SQLite file.
+#
+# Batch jobs which analyze the same corpora again and again (for example
+# the example sentences or the PIV candidate lists) spend most of their time
+# on words which were already analyzed by an earlier run. When the disk
+# cache is enabled, check_word() looks up words which are not in its memory
+# cache (see literumilo_cache.py) in the database, and stores the analyses
+# of new words there.
+#
+# Rows are keyed by the normalized word. The database also records a sources
+# key, a digest of vortaro.tsv and PEJVO.txt. When either file is edited, the
+# key changes, and the stale analyses are deleted when the cache is next
+# opened. The cache is only consulted while the dictionary and the PEJVO
+# map are the unmodified contents of those files (loaded directly, or
+# through a lexicon image, see literumilo_image.py); after set_dictionary()
+# with other data, or after an entry is added, it is bypassed.
+#
+# Usage:
+#     enable_disk_cache()              # default file, in the snapshot directory
+#     enable_disk_cache(path)
+# or set the environment variable LITERUMILO_DISK_CACHE to the path of the
+# database (or to 1, for the default file) before the first check_word().
+#
+# New analyses are written in batches; flush_disk_cache() (called at exit)
+# writes the remaining ones. Several processes may share one database. If
+# another process has replaced the sources key (it uses newer files), a batch
+# is not written, and the cache is no longer used.
+#
+# A database error (eg. 'database is locked', when another process holds
+# the write lock longer than the timeout) never stops the analysis: it is
+# counted in the statistics, a word which cannot be read is analyzed, and
+# a batch which cannot be written is kept in memory, and written with the
+# next batch. If too many analyses are waiting (_MAX_PENDING), they are
+# dropped, and the cache is no longer used.
+#
+# Last edit date: 2026-10-16
+#
+
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Optional, Tuple
+
+from .literumilo_load import get_dictionary, dictionary_path
+from .literumilo_cache import lexicon_version
+from .literumilo_pejvo import pejvo_source_digest
+from .literumilo_snapshot import snapshot_dirs
+
+DISK_CACHE_ENV = "LITERUMILO_DISK_CACHE"
+DISK_CACHE_NAME = "analyses.sqlite3"
+
+# Increment this when the analysis of words changes without any change of
+# vortaro.tsv or PEJVO.txt (for example, a new synthesis rule). The sources
+# key only covers those files and this number, not the code: a change of the
+# analyzer is not detected, and needs this manual bump.
+DISK_CACHE_VERSION = 1
+
+# Number of new analyses which are kept in memory before they are written.
+_BATCH_SIZE = 1000
+
+# Number of analyses kept in memory while the database cannot be written.
+_MAX_PENDING = 10 * _BATCH_SIZE
+
+
+def sources_key() -> Optional[str]:
+    """Return a digest of the data which check_word() currently uses
+    (vortaro.tsv, PEJVO.txt and DISK_CACHE_VERSION), or None if the
+    dictionary or the PEJVO map did not come unmodified from those files.
+    """
+    vortaro_digest = getattr(get_dictionary(), "source_digest", None)
+    pejvo_digest = pejvo_source_digest()
+    if vortaro_digest is None or pejvo_digest is None:
+        return None
+    text = "{}:{}:{}".format(DISK_CACHE_VERSION, vortaro_digest, pejvo_digest)
+    return hashlib.sha256(text.encode("ascii")).hexdigest()
+
+
+class DiskCache:
+    """Analyses (segmentation, valid) of normalized words, in a SQLite database."""
+
+    def __init__(self, path: str, key: Optional[str] = None, timeout: float = 30):
+        """
+        Params:
+            path of the database (created if necessary)
+            key - sources key (default: sources_key())
+            timeout - seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self.key = key or sources_key()
+        if self.key is None:
+            raise ValueError("the dictionary was not loaded from vortaro.tsv")
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.dropped = 0
+        self.errors = 0
+        self.replaced = False    # another process has replaced the sources key
+        self.failed = False      # too many analyses could not be written
+        self._pending = {}
+        self._next_write = _BATCH_SIZE
+        self._lock = threading.Lock()
+        self._checked_version = None
+        self._usable = False
+        self._connection = sqlite3.connect(path, timeout = timeout, check_same_thread = False)
+        with self._connection:
+            try:
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.DatabaseError:
+                pass
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sources (key TEXT NOT NULL)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS analyses (word TEXT PRIMARY KEY, "
+                "segmentation TEXT NOT NULL, valid INTEGER NOT NULL) WITHOUT ROWID")
+            row = self._connection.execute("SELECT key FROM sources").fetchone()
+            if row is None or row[0] != self.key:
+                # The analyses were made with other versions of the sources.
+                self._connection.execute("DELETE FROM analyses")
+                self._connection.execute("DELETE FROM sources")
+                self._connection.execute("INSERT INTO sources VALUES (?)", (self.key,))
+
+    def usable(self, version) -> bool:
+        """True if the cache matches the data of the given lexicon version
+        (see lexicon_version() in literumilo_cache.py). The sources key is
+        only recomputed when the version changes."""
+        if self.replaced or self.failed:
+            return False
+        if version != self._checked_version:
+            self._usable = sources_key() == self.key
+            self._checked_version = version
+        return self._usable
+
+    def get(self, word: str) -> Optional[Tuple[str, bool]]:
+        """Return the stored analysis of a normalized word, or None.
+        Return:
+            tuple (word divided into morphemes, valid), or None
+        """
+        with self._lock:
+            analysis = self._pending.get(word)
+            if analysis is None:
+                try:
+                    row = self._connection.execute(
+                        "SELECT segmentation, valid FROM analyses WHERE word = ?",
+                        (word,)).fetchone()
+                except sqlite3.Error:
+                    self.errors += 1
+                    row = None
+                if row is not None:
+                    analysis = (row[0], bool(row[1]))
+            if analysis is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return analysis
+
+    def put(self, word: str, analysis: Tuple[str, bool]) -> None:
+        """Store the analysis of a normalized word. Analyses are written
+        to the database in batches."""
+        with self._lock:
+            self._pending[word] = analysis
+            if len(self._pending) >= self._next_write:
+                self._write()
+
+    def _write(self) -> None:
+        # Called with the lock held. The sources key is read again in the
+        # transaction which writes the batch, so that analyses made from
+        # other data are never stored under a newer key. The pending
+        # analyses are only forgotten when the transaction has committed.
+        if not self._pending:
+            return
+        rows = [(word, segmentation, int(valid))
+                for word, (segmentation, valid) in self._pending.items()]
+        try:
+            with self._connection:
+                self._connection.execute("BEGIN IMMEDIATE")
+                row = self._connection.execute("SELECT key FROM sources").fetchone()
+                if row is None or row[0] != self.key:
+                    self.replaced = True
+                    self.dropped += len(rows)
+                    self._pending.clear()
+                    return
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?)", rows)
+        except sqlite3.Error:
+            self.errors += 1
+            if len(rows) >= _MAX_PENDING:
+                self.failed = True
+                self.dropped += len(rows)
+                self._pending.clear()
+                self._next_write = _BATCH_SIZE
+            else:
+                self._next_write = len(rows) + _BATCH_SIZE    # try again with the next batch
+            return
+        self._pending.clear()
+        self._next_write = _BATCH_SIZE
+        self.writes += len(rows)
+
+    def flush(self) -> None:
+        """Write the analyses which are still in memory."""
+        with self._lock:
+            self._write()
+
+    def close(self) -> None:
+        """Write the remaining analyses, and close the database."""
+        with self._lock:
+            self._write()
+            self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            row = self._connection.execute("SELECT COUNT(*) FROM analyses").fetchone()
+            return row[0] + len(self._pending)
+
+    def statistics(self) -> dict:
+        """Return the statistics of the cache, as a dictionary:
+        size (number of words), hits, misses, hit_rate, writes, dropped
+        (analyses which were not written, because another process had
+        replaced the sources key, or too many could not be written),
+        errors (database errors) and pending (analyses not yet written)."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "pending": len(self._pending),
+        }
+
+
+def default_disk_cache_path() -> str:
+    """Return the path of the default database: in the first writable
+    snapshot directory (see literumilo_snapshot.py)."""
+    directories = snapshot_dirs(dictionary_path())
+    for directory in directories:
+        try:
+            os.makedirs(directory, exist_ok = True)
+        except OSError:
+            continue
+        if os.access(directory, os.W_OK):
+            return os.path.join(directory, DISK_CACHE_NAME)
+    return os.path.join(directories[-1], DISK_CACHE_NAME)
+
+
+_disk_cache: Optional[DiskCache] = None
+_environment_checked = False
+_disk_cache_lock = threading.Lock()
+
+
+def enable_disk_cache(path: Optional[str] = None) -> DiskCache:
+    """Open a persistent cache, and use it in check_word().
+    Params:
+        path of the database (None = default file)
+    Return:
+        DiskCache
+    """
+    global _disk_cache
+    with _disk_cache_lock:
+        if _disk_cache is not None:
+            _disk_cache.close()
+        _disk_cache = DiskCache(path or default_disk_cache_path())
+        return _disk_cache
+
+
+def disable_disk_cache() -> None:
+    """Stop using the persistent cache, and close it."""
+    global _disk_cache, _environment_checked
+    with _disk_cache_lock:
+        if _disk_cache is not None:
+            _disk_cache.close()
+        _disk_cache = None
+        _environment_checked = True
+
+
+def flush_disk_cache() -> None:
+    """Write the pending analyses of the persistent cache, if it is enabled."""
+    disk_cache = _disk_cache
+    if disk_cache is not None:
+        disk_cache.flush()
+
+
+def active_disk_cache(version = None) -> Optional[DiskCache]:
+    """Return the persistent cache, if it is enabled (by enable_disk_cache()
+    or LITERUMILO_DISK_CACHE) and matches the current data. Otherwise None.
+    Params:
+        version - lexicon_version() (see literumilo_cache.py; computed if
+                  None and the cache is enabled)
+    """
+    global _disk_cache, _environment_checked
+    if not _environment_checked:
+        with _disk_cache_lock:
+            if not _environment_checked:
+                setting = os.environ.get(DISK_CACHE_ENV)
+                if setting and setting != "0" and _disk_cache is None:
+                    _disk_cache = DiskCache(default_disk_cache_path() if setting == "1" else setting)
+                _environment_checked = True
+    disk_cache = _disk_cache
+    if disk_cache is None:
+        return None
+    if version is None:
+        version = lexicon_version()
+    if not disk_cache.usable(version):
+        return None
+    return disk_cache
+
+
+atexit.register(flush_disk_cache)
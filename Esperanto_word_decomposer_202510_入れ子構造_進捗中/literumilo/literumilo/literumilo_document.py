@@ -0,0 +1,114 @@
+#! -*- coding: utf-8
+# literumilo_document.py
+#
+# Analyze a whole document at once. analyze_string() calls check_word() for
+# every occurrence of a word (token); in a document most tokens repeat a few
+# hundred words ('la', 'de', 'kaj'...). analyze_document() finds the words
+# with the tokenizer, analyzes each distinct word (type) once, and renders
+# the text again from the positions of the words. The result is identical
+# to that of analyze_string().
+#
+# Last edit date: 2026-10-16
+#
+
+import time
+
+from .literumilo_check_word import check_word
+from .literumilo_tokenizer import word_spans
+
+# Number of words which are checked again, and number of times, to estimate
+# the time which a repeated word would have cost. (See analyze_document(),
+# with measure = True.)
+_SAMPLE_SIZE = 256
+_SAMPLE_PASSES = 3
+
+
+class DocumentAnalysis:
+    """The result of analyze_document()."""
+
+    def __init__(self, text, tokens, types, analysis_seconds, render_seconds, saved_seconds):
+        """
+        Params:
+            text - analyzed text, or list of misspelled words (str)
+            tokens - number of words in the document
+            types - number of distinct words
+            analysis_seconds - time to analyze the distinct words
+            render_seconds - time to find the words and render the text
+            saved_seconds - estimated time of the check_word() calls
+                            which were not made (one per repeated word),
+                            or None if it was not measured
+        """
+        self.text = text
+        self.tokens = tokens
+        self.types = types
+        self.analysis_seconds = analysis_seconds
+        self.render_seconds = render_seconds
+        self.saved_seconds = saved_seconds
+
+    @property
+    def type_token_ratio(self):
+        return self.types / self.tokens if self.tokens else 0.0
+
+    def __repr__(self):
+        saved = "-" if self.saved_seconds is None else "{:.3f} s".format(self.saved_seconds)
+        return "DocumentAnalysis(tokens={}, types={}, ratio={:.3f}, saved={})".format(
+               self.tokens, self.types, self.type_token_ratio, saved)
+
+
+def analyze_document(text, mode = True, measure = False):
+    """
+    Analyzes a document: each distinct word is analyzed once, and the text
+    is rendered from the positions of the words. The text is the same as
+    the result of analyze_string(text, mode).
+    If measure is True, the time saved is estimated by checking a sample of
+    the words again (they are in the word cache, as repeated words would
+    have been), and multiplying the mean time (best of a few passes) by the
+    number of repeated words. The sample costs up to _SAMPLE_PASSES *
+    _SAMPLE_SIZE calls of check_word(), so it is only taken on request.
+    Params:
+        text
+        morpheme mode: True = morphological analyzer, False = spell checker
+        measure - True to estimate the time saved (saved_seconds)
+    Return:
+        DocumentAnalysis
+    """
+    began = time.perf_counter()
+    spans = list(word_spans(text))
+    analyses = dict.fromkeys(text[start:end] for start, end in spans)   # in order of appearance
+    found = time.perf_counter()
+
+    for word in analyses:
+        result = check_word(word)
+        analyses[word] = result.word if mode else result.valid
+    analyzed = time.perf_counter()
+
+    if mode:
+        pieces = []
+        position = 0
+        for start, end in spans:
+            if start > position: pieces.append(text[position:start])
+            pieces.append(analyses[text[start:end]])
+            position = end
+        pieces.append(text[position:])
+    else:
+        pieces = [word + "\n" for word, valid in analyses.items() if not valid]
+    output = "".join(pieces)
+    rendered = time.perf_counter()
+
+    sample = list(analyses)[:_SAMPLE_SIZE] if measure else []
+    saved = 0.0 if measure else None
+    if sample:
+        fastest = None
+        for _ in range(_SAMPLE_PASSES):
+            sampled = time.perf_counter()
+            for word in sample:
+                result = check_word(word)
+                if mode: result.word    # restores the capitals, as analyze_string() would
+            elapsed = time.perf_counter() - sampled
+            fastest = elapsed if fastest is None else min(fastest, elapsed)
+        saved = fastest / len(sample) * (len(spans) - len(analyses))
+
+    return DocumentAnalysis(output, len(spans), len(analyses), analyzed - found,
+                            (found - began) + (rendered - analyzed), saved)
+
+# analyze_document
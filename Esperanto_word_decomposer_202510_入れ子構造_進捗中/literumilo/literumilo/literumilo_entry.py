@@ -238,6 +238,21 @@ def is_animal(meaning):
 class EspDictEntry:
     """This class represents a dictionary entry in the Esperanto spelling dictionary."""
 
+    rule = None   # resolved from the morpheme when needed, see literumilo_rules.py
+    _separators = None   # see new_separator()
+
+    @property
+    def suffix_mask(self):
+        """The simple suffixes which may follow this morpheme (see literumilo_rules.py)."""
+        from .literumilo_rules import compatible_suffixes
+        return compatible_suffixes(self.part_of_speech, self.meaning, self.transitivity)
+
+    @property
+    def summary_bits(self):
+        """The summary bits of this morpheme (see literumilo_morpheme_list.py)."""
+        from .literumilo_morpheme_list import summary_bits
+        return summary_bits(self)
+
     def get_transitivity(self, s):
         """Transitivity of verbs."""
         if s == 'T': return Transitivity.Transitive
@@ -341,13 +356,101 @@ class EspDictEntry:
         ending placed between morphemes to aid pronunciation. For example,
         'fingr.o.montr.i'; the 'o' is a separator. For the moment, a valid separator will
         be 'o', 'a' or 'e'.
+        The three entries are made once, and shared. (The synthesis rules
+        never modify a separator.)
         Params: separator string
         Return: dictionary entry for separator
         """
-        if separator == "o": pos = "SUBST"
-        elif separator == "a": pos = "ADJ"
-        elif separator == "e": pos = "ADVERBO"
-        else: return None
+        separators = EspDictEntry._separators
+        if separators is None:
+            separators = {}
+            for ch, pos in (("o", "SUBST"), ("a", "ADJ"), ("e", "ADVERBO")):
+                separators[ch] = EspDictEntry([ch, pos, "N", "N", "N", "N", "N", 0, "separator"])
+            EspDictEntry._separators = separators
+        return separators.get(separator)
+
+
+class EntryOverlay:
+    """A copy-on-write view of a dictionary entry, made for one analysis.
+    Some suffix rules (see literumilo_suffix.py) assign to part_of_speech,
+    meaning and transitivity of the suffix; those assignments are kept in
+    the overlay, and the dictionary entry is never modified. Attributes
+    which have not been assigned are read from the entry. (The attributes
+    which the search reads most are copied, because __getattr__() is slow.)
+    """
+
+    __slots__ = ("entry", "_part_of_speech", "_meaning", "_transitivity",
+                 "morpheme", "synthesis", "flag", "rule")
+
+    def __init__(self, entry):
+        self.entry = entry
+        self._part_of_speech = None
+        self._meaning = None
+        self._transitivity = None
+        self.morpheme = entry.morpheme
+        self.synthesis = entry.synthesis
+        self.flag = entry.flag
+        self.rule = entry.rule
+
+    @property
+    def part_of_speech(self):
+        pos = self._part_of_speech
+        return self.entry.part_of_speech if pos is None else pos
+
+    @part_of_speech.setter
+    def part_of_speech(self, pos):
+        self._part_of_speech = pos
+
+    @property
+    def meaning(self):
+        meaning = self._meaning
+        return self.entry.meaning if meaning is None else meaning
+
+    @meaning.setter
+    def meaning(self, meaning):
+        self._meaning = meaning
+
+    @property
+    def transitivity(self):
+        transitivity = self._transitivity
+        return self.entry.transitivity if transitivity is None else transitivity
+
+    @transitivity.setter
+    def transitivity(self, transitivity):
+        self._transitivity = transitivity
+
+    @property
+    def suffix_mask(self):
+        """The simple suffixes which may follow this morpheme (see literumilo_rules.py)."""
+        from .literumilo_rules import compatible_suffixes
+        return compatible_suffixes(self.part_of_speech, self.meaning, self.transitivity)
+
+    @property
+    def summary_bits(self):
+        """The summary bits of this morpheme (see literumilo_morpheme_list.py)."""
+        from .literumilo_morpheme_list import summary_bits
+        return summary_bits(self)
+
+    @classmethod
+    def of(cls, entry):
+        """Make an overlay of an entry. The overlay of an overlay reads the
+        same dictionary entry, with the values assigned to the overlay."""
+        if not isinstance(entry, EntryOverlay):
+            return cls(entry)
+        overlay = cls(entry.entry)
+        overlay._part_of_speech = entry._part_of_speech
+        overlay._meaning = entry._meaning
+        overlay._transitivity = entry._transitivity
+        return overlay
+
+    def __getattr__(self, name):
+        # Attributes which the rules never assign (rarity, with_ending...).
+        return getattr(self.entry, name)
+
+    def display(self):
+        """Display key information about this entry."""
+        print("-- {} {} {} {} {}".format(self.morpheme, self.part_of_speech, self.meaning,
+                                                self.part_of_speech, self.synthesis))
 
-        data = [separator, pos, "N", "N", "N", "N", "N", 0, "separator"]
-        return EspDictEntry(data)
+    def __repr__(self):
+        return "EntryOverlay({!r})".format(self.morpheme)
@@ -0,0 +1,473 @@
+#! -*- coding: utf-8
+# literumilo_image.py
+#
+# A read-only binary image of the Esperanto dictionary (vortaro.tsv) and
+# the PEJVO decompositions, which can be memory-mapped.
+#
+# When literumilo runs in a pool of worker processes, each worker normally
+# builds its own copy of the dictionary and of the PEJVO map. With an image,
+# every worker maps the same file instead, so the operating system keeps
+# one physical copy in its page cache, and starting another worker costs
+# almost nothing.
+#
+# The image contains:
+#   - a header (JSON) with the digests of vortaro.tsv and PEJVO.txt,
+#     and the offsets of the sections below,
+#   - for the dictionary: a string table of keys, a string table of
+#     morphemes, the integer columns of the Lexicon (see literumilo_lexicon.py),
+#     an open-addressing hash table (key -> row) and the table of full forms,
+#   - for PEJVO: string tables of words and segmentations, and a hash table.
+#
+# Keys are hashed with zlib.crc32, which runs in C, so a lookup costs one
+# hash and, usually, one comparison.
+#
+# Usage:
+#     attach_image()     # build (if necessary) and map the default image
+# or, in a process pool:
+#     ProcessPoolExecutor(initializer=attach_image, initargs=(ensure_image(),))
+# or set the environment variable LITERUMILO_IMAGE to the path of an image
+# (or to 1, for the default image) before the dictionary is first used.
+#
+# Last edit date: 2026-10-16
+#
+
+import json
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import zlib
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .literumilo_lexicon import Lexicon, LexiconEntry, find_full_form, probe_prefix_matches
+from .literumilo_morpheme_list import resolve_summaries
+from .literumilo_rules import resolve_rules, resolve_suffix_masks
+from .literumilo_snapshot import file_digest, snapshot_dirs
+
+IMAGE_MAGIC = b"LITLEX01"
+IMAGE_VERSION = 3
+IMAGE_SUFFIX = ".img"
+IMAGE_ENV = "LITERUMILO_IMAGE"
+
+_COLUMN_NAMES = ("parts_of_speech", "meanings", "transitivities", "without_endings",
+                 "with_endings", "syntheses", "capitalizations", "rarities", "flags")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class _ImageWriter:
+    """Collects the sections of an image, and records their offsets."""
+
+    def __init__(self):
+        self.sections: List[bytes] = []
+        self.offsets: Dict[str, Tuple[int, int]] = {}
+        self.position = 0
+
+    def add(self, name: str, data: bytes) -> None:
+        padding = _align(self.position) - self.position
+        if padding:
+            self.sections.append(b"\0" * padding)
+            self.position += padding
+        self.offsets[name] = (self.position, len(data))
+        self.sections.append(data)
+        self.position += len(data)
+
+    def add_strings(self, name: str, strings: List[str]) -> None:
+        """Add a string table: offsets (uint32) and a blob of UTF-8 bytes."""
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = array("I", [0])
+        total = 0
+        for data in encoded:
+            total += len(data)
+            offsets.append(total)
+        self.add(name + ".offsets", offsets.tobytes())
+        self.add(name + ".blob", b"".join(encoded))
+
+    def add_hash_table(self, name: str, keys: List[str]) -> None:
+        """Add an open-addressing hash table (linear probing), which maps
+        the crc32 of a key to its row. Slots hold row + 1; 0 means empty."""
+        size = 1
+        while size < len(keys) * 2:
+            size *= 2
+        mask = size - 1
+        slots = array("I", bytes(4 * size))
+        for row, key in enumerate(keys):
+            slot = zlib.crc32(key.encode("utf-8")) & mask
+            while slots[slot]:
+                slot = (slot + 1) & mask
+            slots[slot] = row + 1
+        self.add(name + ".hash", slots.tobytes())
+
+
+def build_image(path: str, lexicon: Lexicon, pejvo_map: Dict[str, str],
+                vortaro_digest: str, pejvo_digest: str) -> None:
+    """Write an image of the given lexicon and PEJVO map to a file.
+    The file is written atomically.
+    Params:
+        path of the image file
+        lexicon (literumilo_lexicon.Lexicon)
+        PEJVO map {word: segmentation}
+        digests of the source files (stored in the header)
+    """
+    writer = _ImageWriter()
+    keys = list(lexicon.keys_by_row)
+    writer.add_strings("lexicon.keys", keys)
+    writer.add_strings("lexicon.morphemes", list(lexicon.morphemes))
+    for name in _COLUMN_NAMES:
+        writer.add("lexicon." + name, bytes(getattr(lexicon, name)))
+    writer.add_hash_table("lexicon", keys)
+    if not lexicon.full_forms:
+        lexicon.build_full_forms()
+    writer.add("lexicon.full_forms", lexicon.full_forms.tobytes())
+
+    words = list(pejvo_map)
+    writer.add_strings("pejvo.words", words)
+    writer.add_strings("pejvo.segmentations", [pejvo_map[word] for word in words])
+    writer.add_hash_table("pejvo", words)
+
+    header = json.dumps({
+        "version": IMAGE_VERSION,
+        "byteorder": sys.byteorder,
+        "vortaro_digest": vortaro_digest,
+        "pejvo_digest": pejvo_digest,
+        "lexicon_size": len(keys),
+        "pejvo_size": len(words),
+        "flag_names": lexicon.flag_names,
+        "sections": writer.offsets,
+    }).encode("utf-8")
+    prefix = IMAGE_MAGIC + len(header).to_bytes(4, "little") + header
+    start = _align(len(prefix))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(prefix)
+            handle.write(b"\0" * (start - len(prefix)))
+            for section in writer.sections:
+                handle.write(section)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _read_header(handle) -> Optional[dict]:
+    """Read the header of an image file. Return None if it is not an image."""
+    if handle.read(len(IMAGE_MAGIC)) != IMAGE_MAGIC:
+        return None
+    length = int.from_bytes(handle.read(4), "little")
+    try:
+        header = json.loads(handle.read(length).decode("utf-8"))
+    except ValueError:
+        return None
+    header["start"] = _align(len(IMAGE_MAGIC) + 4 + length)
+    return header
+
+
+class _StringTable:
+    """A sequence of strings stored in an image (decoded on access)."""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return str(self.blob[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+    def matches(self, index, data: bytes) -> bool:
+        """True if the string at index is equal to the given UTF-8 bytes."""
+        return self.blob[self.offsets[index]:self.offsets[index + 1]] == data
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class _HashIndex:
+    """Looks up rows by key, in a hash table built by _ImageWriter."""
+
+    def __init__(self, slots: memoryview, keys: _StringTable):
+        self.slots = slots
+        self.mask = len(slots) - 1
+        self.keys = keys
+
+    def find(self, key: str) -> int:
+        """Return the row of the given key, or -1."""
+        data = key.encode("utf-8")
+        slots = self.slots
+        mask = self.mask
+        slot = zlib.crc32(data) & mask
+        while True:
+            row = slots[slot] - 1
+            if row < 0:
+                return -1
+            if self.keys.matches(row, data):
+                return row
+            slot = (slot + 1) & mask
+
+
+class MappedLexicon:
+    """A Lexicon whose columns are stored in a memory-mapped image.
+    It supports the same lookups as Lexicon, but it cannot be modified.
+    """
+
+    def __init__(self, image):
+        self.keys_by_row = image.string_table("lexicon.keys")
+        self.morphemes = image.string_table("lexicon.morphemes")
+        for name in _COLUMN_NAMES:
+            setattr(self, name, image.section("lexicon." + name))
+        self.flag_names = image.header["flag_names"]
+        self.source_digest = image.header.get("vortaro_digest")
+        self._index = _HashIndex(image.section("lexicon.hash", "I"), self.keys_by_row)
+        self.full_forms = image.section("lexicon.full_forms", "I")
+        self.rules = resolve_rules(self)
+        self.suffix_masks = resolve_suffix_masks(self)
+        self.summaries = resolve_summaries(self)
+        self._entries = [None] * len(self.keys_by_row)
+
+    def entry(self, row):
+        """Return the entry of a row (see Lexicon.entry()). The entries
+        are private to each process."""
+        entry = self._entries[row]
+        if entry is None:
+            entry = self._entries[row] = LexiconEntry(self, row)
+        return entry
+
+    def get(self, key, default = None):
+        """Return the entry for the given key, or default."""
+        row = self._index.find(key)
+        if row < 0:
+            return default
+        return self.entry(row)
+
+    def __getitem__(self, key):
+        row = self._index.find(key)
+        if row < 0:
+            raise KeyError(key)
+        return self.entry(row)
+
+    def __setitem__(self, key, entry):
+        raise TypeError("a memory-mapped lexicon cannot be modified")
+
+    def prefix_matches(self, text, start, min_length, max_length):
+        """See Lexicon.prefix_matches(). A trie would be private to each
+        process, so the mapped lexicon looks up substrings instead."""
+        return probe_prefix_matches(self, text, start, min_length, max_length)
+
+    def full_form(self, word):
+        """See Lexicon.full_form(). The table is shared with other processes."""
+        return find_full_form(self, self.full_forms, word)
+
+    def __contains__(self, key):
+        return self._index.find(key) >= 0
+
+    def __len__(self):
+        return len(self.keys_by_row)
+
+    def __iter__(self):
+        return iter(self.keys_by_row)
+
+    def keys(self):
+        return list(self.keys_by_row)
+
+    def items(self):
+        return [(key, self.entry(row)) for row, key in enumerate(self.keys_by_row)]
+
+    def values(self):
+        return [self.entry(row) for row in range(len(self))]
+
+
+class MappedPejvo:
+    """The PEJVO map {word: segmentation}, stored in a memory-mapped image."""
+
+    def __init__(self, image):
+        self.words = image.string_table("pejvo.words")
+        self.segmentations = image.string_table("pejvo.segmentations")
+        self.source_digest = image.header.get("pejvo_digest")
+        self._index = _HashIndex(image.section("pejvo.hash", "I"), self.words)
+
+    def get(self, word, default = None):
+        row = self._index.find(word)
+        if row < 0:
+            return default
+        return self.segmentations[row]
+
+    def __getitem__(self, word):
+        row = self._index.find(word)
+        if row < 0:
+            raise KeyError(word)
+        return self.segmentations[row]
+
+    def __contains__(self, word):
+        return self._index.find(word) >= 0
+
+    def __len__(self):
+        return len(self.words)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.words)
+
+
+class LexiconImage:
+    """A memory-mapped image file. The mapping is read-only, so its pages
+    are shared by every process which maps the image. (The synthesis rules
+    never write into dictionary entries, see EntryOverlay.) close() unmaps
+    the file; the image can also be used in a with statement.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            header = _read_header(handle)
+            if header is None or header.get("version") != IMAGE_VERSION or \
+               header.get("byteorder") != sys.byteorder:
+                raise ValueError("not a literumilo image: {}".format(path))
+            self.header = header
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._views = []    # released by close()
+        self.lexicon = MappedLexicon(self)
+        self.pejvo = MappedPejvo(self)
+
+    def section(self, name: str, fmt: str = "B") -> memoryview:
+        offset, length = self.header["sections"][name]
+        start = self.header["start"] + offset
+        view = self._view[start:start + length]
+        self._views.append(view)
+        if fmt != "B":
+            view = view.cast(fmt)
+            self._views.append(view)
+        return view
+
+    def close(self) -> None:
+        """Unmap the image. Its lexicon and PEJVO map can no longer be used."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def string_table(self, name: str) -> _StringTable:
+        return _StringTable(self.section(name + ".offsets", "I"), self.section(name + ".blob"))
+
+
+def image_is_current(path: str, vortaro_digest: str, pejvo_digest: str) -> bool:
+    """True if the image at path exists and was built from the given sources."""
+    try:
+        with open(path, "rb") as handle:
+            header = _read_header(handle)
+    except OSError:
+        return False
+    return header is not None and header.get("version") == IMAGE_VERSION and \
+        header.get("byteorder") == sys.byteorder and \
+        header.get("vortaro_digest") == vortaro_digest and \
+        header.get("pejvo_digest") == pejvo_digest
+
+
+def ensure_image(path: Optional[str] = None) -> str:
+    """Make sure that an up-to-date image exists, and return its path.
+    If path is None, the image is kept in the snapshot directory (see
+    literumilo_snapshot.py), under a name derived from the digests of
+    vortaro.tsv and PEJVO.txt.
+    """
+    from .literumilo_load import dictionary_path, load_dictionary
+    from .literumilo_pejvo import _default_pejvo_path, _read_pejvo, _source_digest
+
+    vortaro_path = dictionary_path()
+    pejvo_path = _default_pejvo_path()
+    vortaro_digest = file_digest(vortaro_path)
+    pejvo_digest = _source_digest(pejvo_path)
+
+    candidates = [path] if path else [
+        os.path.join(directory, "lexicon.{}.{}{}".format(
+            vortaro_digest[:16], pejvo_digest[:16], IMAGE_SUFFIX))
+        for directory in snapshot_dirs(vortaro_path)]
+
+    for candidate in candidates:
+        if image_is_current(candidate, vortaro_digest, pejvo_digest):
+            return candidate
+
+    lexicon = load_dictionary()
+    pejvo_map = _read_pejvo(pejvo_path)
+    error = None
+    for candidate in candidates:
+        try:
+            build_image(candidate, lexicon, pejvo_map, vortaro_digest, pejvo_digest)
+        except OSError as exc:
+            error = exc
+            continue
+        if not path:
+            _remove_stale_images(os.path.dirname(candidate), os.path.basename(candidate))
+        return candidate
+    raise error
+
+
+def _remove_stale_images(directory: str, keep: str) -> None:
+    """Delete default images built from older versions of the sources.
+    (Processes which still map them are not affected.)"""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if name != keep and name.startswith("lexicon.") and name.endswith(IMAGE_SUFFIX):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+_attached: Optional[LexiconImage] = None
+_attach_lock = threading.Lock()
+
+
+def attach_image(path: Optional[str] = None) -> LexiconImage:
+    """Map an image, and use it as this process's dictionary and PEJVO map.
+    This is suitable as the initializer of a process pool.
+    Params:
+        path of the image (None = default image, built if necessary)
+    Return:
+        LexiconImage
+    """
+    from .literumilo_load import set_dictionary
+    from .literumilo_pejvo import set_pejvo_map
+
+    global _attached
+    with _attach_lock:
+        if _attached is None or (path and os.path.abspath(path) != os.path.abspath(_attached.path)):
+            _attached = LexiconImage(path or ensure_image())
+        set_dictionary(_attached.lexicon)
+        set_pejvo_map(_attached.pejvo)
+        return _attached
+
+
+def image_from_environment() -> Optional[LexiconImage]:
+    """If the environment variable LITERUMILO_IMAGE is set, map that image
+    (a path, or 1 for the default image) and return it. Otherwise return None.
+    """
+    global _attached
+    setting = os.environ.get(IMAGE_ENV)
+    if not setting or setting == "0":
+        return None
+    with _attach_lock:
+        if _attached is None:
+            _attached = LexiconImage(ensure_image(None if setting == "1" else setting))
+        return _attached
@@ -0,0 +1,780 @@
+#! -*- coding: utf-8
+# literumilo_lattice.py
+#
+# Division of compound words by dynamic programming over a lattice.
+#
+# find_morpheme() (literumilo_check_word.py) divides a word by backtracking.
+# When a division fails, the next candidate is tried, and the rest of the
+# word is divided again from the beginning. For words which have many
+# possible divisions, the same remainders are explored over and over, and
+# prefixes are only checked by scan_morphemes(), after each complete division.
+# That is fast for almost every word, so check_word() divides with
+# find_morpheme() first, and gives a word to this module only when
+# backtracking takes more than BACKTRACKING_STEPS calls (see
+# divide_compound()). analyze_nbest() uses best_divisions() below.
+#
+# This module builds the lattice of the word once: for every position, the
+# dictionary morphemes which begin there, and the separator (o, a, e) which
+# may stand there. The divisions are then searched in the same order as
+# find_morpheme() searches them, so the first valid division is the same,
+# but the result of every search state is memoized. A search state holds
+# everything which the synthesis rules can still read:
+#
+#   - the position in the word and the index of the next morpheme
+#   - the previous morpheme (and the one before it, if the previous morpheme
+#     is a participle or has limited synthesis, because its check needs both
+#     of its neighbours)
+#   - the number of separators
+#   - for every prefix which has not been checked yet, a summary of the
+#     morphemes which follow it (see _follow())
+#
+# Two partial divisions which arrive at the same state have the same
+# continuations, so each state is solved only once. The summaries have a
+# bounded number of values, so the number of states, and the time, are
+# polynomial in the length of the word.
+#
+# The suffix rules, separators, participles and morphemes with limited
+# synthesis are checked on the arcs of the lattice, as soon as the morphemes
+# which they read have been placed. Prefixes depend on the rest of the word,
+# so they are checked when the division is complete; but a prefix which
+# could not be valid whatever followed it (prefix_possible(), for example
+# 'mal' after another morpheme) is rejected when it is placed.
+#
+# The search never follows an arc to a position from which the rest of the
+# word cannot be covered by morphemes at all, ignoring the synthesis rules
+# (Lattice.finishes()). This is decided once for each position, with the
+# arcs of the lattice, so an invalid word fails after one walk over its
+# positions, instead of trying every division of its beginning.
+#
+# Search budget: every search state solved, and every position of the word
+# looked up in the dictionary, is a step (for find_morpheme_at(), every call,
+# see search_steps(); for best_divisions(), every state expanded). A search which takes
+# more steps, or more time, than the budget (set_search_budget()) is
+# abandoned with SearchBudgetExceeded, so that no word can hold up the
+# analysis of a text. The number of steps of every search is recorded in a
+# histogram (search_statistics()); each thread records its own searches,
+# without a lock.
+#
+# Each thread keeps one search context (_Search, with its lattice, scratch
+# morpheme list and tables), which is reset for every word instead of being
+# allocated again (see _search_context()).
+#
+# The dictionary is never modified. The suffix rules which modify the suffix
+# are applied to overlays of the entries (EntryOverlay); the others are
+# looked up in the compatibility matrix of literumilo_rules.py.
+#
+# Last edit date: 2026-10-16
+#
+
+import heapq
+import threading
+import time
+from functools import partial
+
+from .literumilo_entry import *
+from .literumilo_morpheme_list import MorphemeList
+from .literumilo_lexicon import probe_prefix_matches
+from .literumilo_rules import check_affix, affix_rule, suffix_compatible, prefix_possible, SUFFIX_BITS
+from .literumilo_scan_morphemes import check_participle, \
+                                       check_limited_synthesis, valid_separator
+
+MIN_MORPHEME_LENGTH = 2
+_SHALLOW_LENGTH = 200    # see Lattice.finishes()
+INFINITY = float("inf")
+DEFAULT_SEARCH_STEPS = 10000    # states solved and positions looked up
+_TIME_CHECK_INTERVAL = 64   # steps between two readings of the clock
+
+
+class SearchBudgetExceeded(Exception):
+    """The search for the division of a word took more steps or time
+    than the budget (see set_search_budget())."""
+
+    def __init__(self, word, steps, seconds):
+        super().__init__("search budget exceeded for {!r}: {} steps, {:.3f} s".format(
+                         word, steps, seconds))
+        self.word = word
+        self.steps = steps
+        self.seconds = seconds
+
+
+class _Tally:
+    """The statistics of the searches of one thread (see _SearchBudget)."""
+
+    __slots__ = ("generation", "exceeded", "counts")
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.exceeded = 0
+        self.counts = {}    # number of steps -> number of searches
+
+
+class _SearchBudget:
+    """The budget of every search, and the statistics of the searches.
+    Every thread records its searches in its own tally, without a lock;
+    statistics() adds up the tallies. reset() starts a new generation of
+    tallies, so it never writes to a tally which another thread is updating."""
+
+    def __init__(self):
+        self.steps = DEFAULT_SEARCH_STEPS
+        self.seconds = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._generation = 0
+        self._tallies = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._generation += 1
+            self._tallies = []
+
+    def tally(self):
+        """Return the tally of this thread (see _Steps.record())."""
+        tally = getattr(self._local, "tally", None)
+        if tally is None or tally.generation != self._generation:
+            with self._lock:
+                tally = _Tally(self._generation)
+                self._tallies.append(tally)
+            self._local.tally = tally
+        return tally
+
+    def statistics(self):
+        with self._lock:
+            tallies = list(self._tallies)
+        counts = {}
+        for tally in tallies:
+            for steps, count in list(tally.counts.items()):   # a copy: the thread may add steps
+                counts[steps] = counts.get(steps, 0) + count
+        searches = sum(counts.values())
+        histogram = {}
+        for steps, count in sorted(counts.items()):
+            bound = 1 << ((steps - 1).bit_length() if steps > 1 else 0)
+            histogram[bound] = histogram.get(bound, 0) + count
+        return {
+            "steps": self.steps,
+            "seconds": self.seconds,
+            "searches": searches,
+            "exceeded": sum(tally.exceeded for tally in tallies),
+            "mean_steps": sum(steps * count for steps, count in counts.items()) / searches if searches else 0.0,
+            "max_steps": max(counts, default = 0),
+            "histogram": histogram,
+        }
+
+
+search_budget = _SearchBudget()
+
+
+class SearchQuotaSpent(Exception):
+    """A search took the number of steps it was allowed to try (its quota,
+    see search_steps()), before the budget was spent."""
+
+
+class _Steps:
+    """The steps of one search, counted against the budget."""
+
+    __slots__ = ("word", "count", "limit", "stop", "check", "began", "deadline", "tally")
+
+    def __init__(self, word, quota = None):
+        self.tally = None
+        self.begin(word, quota)
+
+    def begin(self, word, quota = None):
+        """Start counting the steps of a new search. After 'quota' steps,
+        if the budget allows more, take() raises SearchQuotaSpent."""
+        self.word = word
+        self.count = 0
+        limit = search_budget.steps
+        if limit is None:
+            limit = INFINITY
+        self.limit = limit
+        self.stop = limit if quota is None or quota > limit else quota
+        seconds = search_budget.seconds
+        self.began = time.perf_counter()
+        if seconds is None:
+            self.deadline = None
+            self.check = self.stop + 1
+        else:
+            self.deadline = self.began + seconds
+            self.check = min(self.stop + 1, _TIME_CHECK_INTERVAL)
+
+    def take(self):
+        """Count one step; raise SearchBudgetExceeded if the budget is spent
+        (or SearchQuotaSpent, see begin()). (find_morpheme_at() counts its
+        steps the same way, without calling take().)"""
+        self.count += 1
+        if self.count >= self.check:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Called by take() at the step 'check': the first step over the
+        quota, or a step at which the clock is read (every
+        _TIME_CHECK_INTERVAL steps, if the budget has a time limit)."""
+        count = self.count
+        if count > self.stop:
+            if count <= self.limit:
+                raise SearchQuotaSpent()
+            self.exceeded()
+        if time.perf_counter() > self.deadline:
+            self.exceeded()
+        self.check = min(self.stop + 1, count + _TIME_CHECK_INTERVAL)
+
+    def exceeded(self):
+        raise SearchBudgetExceeded(self.word, self.count, time.perf_counter() - self.began)
+
+    def record(self, exceeded = False):
+        """Record the steps of the search in the statistics of this thread.
+        The tally of the thread is kept, because reading a thread-local
+        attribute for every search is slow. (The steps of a search are
+        counted by one thread; search contexts are not shared.)"""
+        tally = self.tally
+        if tally is None or tally.generation != search_budget._generation:
+            tally = self.tally = search_budget.tally()
+        counts = tally.counts
+        counts[self.count] = counts.get(self.count, 0) + 1
+        if exceeded: tally.exceeded += 1
+
+
+def search_steps(word, quota = None):
+    """Start counting the steps of a search for the division of a word (for
+    a search which is not done by this module, see divide_compound() in
+    literumilo_check_word.py). The search calls take() for every step, and
+    records its steps with record() when it ends.
+    Params:
+        word
+        quota - number of steps after which SearchQuotaSpent is raised, if
+                the budget is not spent before (None = the budget)
+    Return:
+        _Steps
+    """
+    return _Steps(word, quota)
+
+
+def set_search_budget(steps = DEFAULT_SEARCH_STEPS, seconds = None):
+    """Set the budget of the search for the division of one word.
+    Params:
+        steps - maximum number of steps: search states solved and positions
+                looked up in the dictionary (None = unlimited)
+        seconds - maximum time (None = unlimited)
+    """
+    search_budget.steps = steps
+    search_budget.seconds = seconds
+
+
+def search_statistics(reset = False):
+    """Return the statistics of the searches for divisions of compound
+    words (divide_compound() and find_division()), as a dictionary: the
+    budget (steps, seconds), the number of searches, of searches which
+    exceeded the budget, the mean and maximum number of steps, and a
+    histogram of steps: {1: n, 2: n, 4: n, ...}, where the
+    count of 2**k is the number of searches which took more than 2**(k-1)
+    and at most 2**k steps.
+    Params:
+        reset - if True, the statistics are reset after being read
+    """
+    statistics = search_budget.statistics()
+    if reset:
+        search_budget.reset()
+    return statistics
+
+
+# The three separators. They are never modified, so they are shared.
+SEPARATORS = {ch: EspDictEntry.new_separator(ch) for ch in "oae"}
+
+
+class Lattice:
+    """All the morphemes of a word. arcs(start) returns the dictionary entries
+    which begin at position 'start', as (end position, entry), longest first.
+    Morphemes which do not combine (Synthesis.No) are omitted. Each position
+    is looked up in the dictionary only once.
+    """
+
+    def __init__(self, word, dictionary, steps = None):
+        """
+        Params:
+            word - lower case, without ending
+            dictionary - Lexicon or map of entries
+            steps - the steps of the search (_Steps), or None
+        """
+        self.word = word
+        self.length = len(word)
+        self.dictionary = dictionary
+        self.steps = steps
+        self._arcs = [None] * len(word)
+        self._finishes = [None] * len(word)
+
+    def reset(self, word, dictionary, steps = None):
+        """Reuse the lattice for another word. The lists of the positions
+        grow when a word is longer than the previous ones."""
+        self.word = word
+        self.length = len(word)
+        self.dictionary = dictionary
+        self.steps = steps
+        missing = self.length - len(self._arcs)
+        if missing > 0:
+            self._arcs.extend([None] * missing)
+            self._finishes.extend([None] * missing)
+
+    def release(self):
+        """Forget the positions of the word (see reset())."""
+        arcs = self._arcs
+        finishes = self._finishes
+        for position in range(self.length):
+            arcs[position] = None
+            finishes[position] = None
+
+    def arcs(self, start):
+        arcs = self._arcs[start]
+        if arcs is None:
+            if self.steps is not None:
+                self.steps.take()
+            try:
+                prefix_matches = self.dictionary.prefix_matches
+            except AttributeError:     # a plain mapping of entries
+                prefix_matches = partial(probe_prefix_matches, self.dictionary)
+            matches = prefix_matches(self.word, start, MIN_MORPHEME_LENGTH, self.length - start)
+            arcs = [(end, entry) for end, entry in matches if entry.synthesis != Synthesis.No]
+            self._arcs[start] = arcs
+        return arcs
+
+    def separator(self, start):
+        return SEPARATORS.get(self.word[start])
+
+    def finishes(self, start):
+        """Check whether word[start:] can be divided into morphemes and
+        separators, ignoring the synthesis rules. The answer for each
+        position is kept. The arcs are tried longest first, like the search,
+        so for most valid words only the positions of their division are
+        visited.
+        Return:
+            True or False
+        """
+        if start == self.length:
+            return True
+        finishes = self._finishes[start]
+        if finishes is None:
+            if self.length - start > _SHALLOW_LENGTH:
+                # A very long word: decide the positions from the end
+                # backwards, so that the recursion stays shallow.
+                for position in range(self.length - 1, start, -1):
+                    if self._finishes[position] is None:
+                        self._decide(position)
+            finishes = self._decide(start)
+        return finishes
+
+    def _decide(self, start):
+        """See finishes(). The positions after 'start' are decided first."""
+        finishes = False
+        for end, entry in self.arcs(start):
+            if end == self.length or self.finishes(end):
+                finishes = True
+                break
+        else:
+            # A separator is not the first morpheme, and leaves at least two letters.
+            if start > 0 and self.length - start >= 3 and self.word[start] in SEPARATORS:
+                finishes = self.finishes(start + 1)
+        self._finishes[start] = finishes
+        return finishes
+
+
+# Search states are compared by identity: the entries in a state are the
+# arcs of the lattice (one object per arc), the shared separators, or
+# canonical copies made by _Search.detach() and _Search.reduce(). Two arcs
+# which end at the same position and have the same morpheme begin at the
+# same position, so they are the same object.
+#
+# Summaries of the morphemes which follow a prefix:
+# check_prefix() reads the first and second morphemes after the prefix, the
+# last morpheme of the word, and loops over all the morphemes after the
+# prefix, looking for a part of speech, meaning or transitivity (or the
+# suffixes 'ad' and 'ec', see check_ne()). A summary keeps the first and
+# second followers and the set of the others, reduced to those attributes.
+# The last follower is kept whole; it is the previous morpheme of the search
+# state, so it is not stored in the summary. A summary is a tuple:
+#     (index of prefix, prefix, first, second, others, count)
+# where count is the number of followers, up to 3.
+#
+# If the rules in literumilo_scan_morphemes.py start to read something
+# else from the followers of a prefix, reduce() must keep it.
+
+_READ_MORPHEMES = ("ad", "ec")
+
+
+class _Search:
+    """The search for the first valid division of one word."""
+
+    def __init__(self, word, dictionary, ending):
+        self.steps = _Steps(word)
+        self.lattice = Lattice(word, dictionary, self.steps)
+        self.length = len(word)
+        self.scratch = MorphemeList(ending)
+        self.memo = {}
+        self.copies = {}      # canonical copies of suffixes
+        self.reduced = {}     # canonical reduced followers
+        self.busy = False     # see _search_context()
+
+    def reset(self, word, dictionary, ending):
+        """Prepare the search context for another word."""
+        self.steps.begin(word)
+        self.lattice.reset(word, dictionary, self.steps)
+        self.length = len(word)
+        self.scratch.reset(ending)
+
+    def release(self):
+        """Drop the references to the entries of the last word."""
+        self.lattice.release()
+        self.memo.clear()
+        self.copies.clear()
+        self.reduced.clear()
+
+    def detach(self, entry, copy):
+        """Return the canonical object for a suffix copy."""
+        key = (id(entry), copy.part_of_speech, id(copy.meaning), id(copy.transitivity))
+        return self.copies.setdefault(key, copy)
+
+    def reduce(self, entry):
+        """Reduce a follower of a prefix to what check_prefix() reads from it.
+        All the followers which check_prefix() cannot tell apart share one
+        object: an overlay of the first of them."""
+        morpheme = entry.morpheme if entry.morpheme in _READ_MORPHEMES else ""
+        key = (morpheme, entry.part_of_speech, id(entry.meaning), id(entry.transitivity))
+        reduced = self.reduced.get(key)
+        if reduced is None:
+            reduced = self.reduced[key] = EntryOverlay.of(entry)
+        return reduced
+
+    def follow(self, summary, entry, previous):
+        """Add a follower to the summary of a prefix.
+        Params:
+            summary of prefix
+            entry - the new follower
+            previous - the previous follower (the last one, until now)
+        Return:
+            new summary
+        """
+        index, prefix, first, second, others, count = summary
+        if count == 0:
+            return (index, prefix, self.reduce(entry), None, others, 1)
+        if count == 1:
+            return (index, prefix, first, self.reduce(entry), others, 2)
+        if count == 3:    # The previous follower was neither first, second nor last.
+            others = others | frozenset((self.reduce(previous),))
+        return (index, prefix, first, second, others, 3)
+
+    def arrange(self, index, *entries):
+        """Put entries in the scratch morpheme list, from index onwards.
+        The last entry becomes the last morpheme of the list."""
+        for entry in entries:
+            self.scratch.put(index, entry)
+            index += 1
+        return self.scratch
+
+    def moves(self, start, index):
+        """The morphemes which may be placed at position 'start', as index-th
+        morpheme, in the order in which find_morpheme() tries them: the
+        morpheme which covers the rest of the word (except for the first
+        morpheme), the morphemes which leave at least two letters, longest
+        first, and then the separator.
+        Return:
+            iterator of (end position, entry)
+        """
+        rest = self.length - start
+        for end, entry in self.lattice.arcs(start):
+            if end == self.length:
+                if index == 0: continue
+            elif end - start > rest - 2:
+                continue
+            yield end, entry
+        if index > 0 and rest >= 3:
+            separator = self.lattice.separator(start)
+            if separator:
+                yield start + 1, separator
+
+    def solve(self, start, index, previous, before_previous, separators, pending):
+        """Find the first valid division of the rest of the word, word[start:].
+        Params:
+            start - position in the word
+            index - index of the next morpheme
+            previous, before_previous - previous morphemes (or None)
+            separators - number of separators so far
+            pending - summaries of the prefixes which have not been checked
+        Return:
+            tuple of entries, or None if there is no valid division
+        """
+        if index >= MorphemeList.MAX_MORPHEMES:
+            return None
+        state = (start, index, previous, before_previous, separators, pending)
+        if state in self.memo:
+            return self.memo[state]
+        self.steps.take()
+
+        result = None
+        for end, entry in self.moves(start, index):
+            result = self.place(entry, end, index, previous, before_previous, separators, pending)
+            if result: break
+
+        self.memo[state] = result
+        return result
+
+    def extend(self, entry, end, index, previous, before_previous, separators, pending):
+        """Place a morpheme (follow an arc of the lattice) and check the rules
+        which can be checked now. If the morpheme ends the word, the rules
+        which wait for the end of the word are checked too.
+        Return:
+            (entry, separators, pending) after the morpheme has been placed,
+            or None if it cannot be placed. (The entry may be a copy.)
+        """
+        synthesis = entry.synthesis
+
+        if synthesis == Synthesis.Suffix:
+            bit = SUFFIX_BITS[affix_rule(entry)]
+            if bit:
+                # The rule only reads the previous morpheme (see the
+                # compatibility matrix in literumilo_rules.py).
+                if not suffix_compatible(bit, index, previous):
+                    return None
+            else:
+                copy = EntryOverlay.of(entry)   # The suffix rules may modify it.
+                if index > 0:
+                    self.arrange(index - 1, previous, copy)
+                else:
+                    self.arrange(0, copy)
+                if not check_affix(copy, index, self.scratch):
+                    return None
+                entry = self.detach(entry, copy)
+
+        if entry.flag == "separator":
+            if separators > 0: return None   # Only one separator is allowed.
+            separators += 1
+            if not valid_separator(entry.part_of_speech, index, self.arrange(index - 1, previous, entry)):
+                return None
+
+        # A participle or a morpheme with limited synthesis is checked
+        # when the morpheme which follows it is known.
+        if previous is not None and not self.check_neighbours(index - 1, before_previous, previous, entry):
+            return None
+
+        if pending:
+            pending = tuple(self.follow(summary, entry, previous) for summary in pending)
+        if synthesis == Synthesis.Prefix:
+            if not prefix_possible(entry, index, self.scratch): return None
+            pending += ((index, entry, None, None, frozenset(), 0),)
+
+        if end == self.length:
+            # The division is complete.
+            if synthesis == Synthesis.Prefix: return None   # A prefix can't be last.
+            if not self.check_neighbours(index, previous, entry, None):
+                return None
+            for summary in pending:
+                if not self.check_summary(summary, entry):
+                    return None
+
+        return entry, separators, pending
+
+    def place(self, entry, end, index, previous, before_previous, separators, pending):
+        """Place a morpheme and divide the rest of the word.
+        Return:
+            tuple of entries from index onwards, or None
+        """
+        placed = self.extend(entry, end, index, previous, before_previous, separators, pending)
+        if placed is None:
+            return None
+        entry, separators, pending = placed
+        if end == self.length:
+            return (entry,)
+        if not self.lattice.finishes(end):
+            return None
+        synthesis = entry.synthesis
+        needs_before = synthesis == Synthesis.Participle or synthesis == Synthesis.Limited
+        rest = self.solve(end, index + 1, entry, previous if needs_before else None,
+                          separators, pending)
+        if rest:
+            return (entry,) + rest
+        return None
+
+    def check_neighbours(self, index, previous, entry, following):
+        """Check a participle or a morpheme with limited synthesis, which
+        is at 'index', between 'previous' and 'following' (None if it is
+        the last morpheme). Other morphemes are valid.
+        """
+        synthesis = entry.synthesis
+        if synthesis != Synthesis.Participle and synthesis != Synthesis.Limited:
+            return True
+        neighbours = (entry,) if following is None else (entry, following)
+        if index > 0:
+            self.arrange(index - 1, previous, *neighbours)
+        else:
+            self.arrange(0, *neighbours)
+        if synthesis == Synthesis.Participle:
+            return check_participle(index, self.scratch)
+        return check_limited_synthesis(entry.morpheme, index, self.scratch)
+
+    def check_summary(self, summary, last):
+        """Check a prefix against the summary of the morphemes which follow it.
+        The followers are rebuilt in a shortened morpheme list, which gives
+        check_prefix() the same answers as the complete list."""
+        index, prefix, first, second, others, count = summary
+        if count == 1:
+            followers = (last,)
+        elif count == 2:
+            followers = (first, last)
+        else:
+            followers = (first, second) + tuple(others) + (last,)
+        self.arrange(index, prefix, *followers)
+        return check_affix(prefix, index, self.scratch)
+
+
+_contexts = threading.local()
+
+
+def _search_context(word, dictionary, ending):
+    """Return the search context of this thread, reset for a word. If it is
+    already in use (a search within a search), a new one is made."""
+    search = getattr(_contexts, "search", None)
+    if search is None:
+        search = _contexts.search = _Search(word, dictionary, ending)
+    elif search.busy:
+        return _Search(word, dictionary, ending)
+    else:
+        search.reset(word, dictionary, ending)
+    search.busy = True
+    return search
+
+
+def find_division(word, dictionary, ending):
+    """Divide a compound word (without its grammatical ending) into morphemes,
+    checking their synthesis. The result is the same as that of find_morpheme().
+    Params:
+        word - lower case, without ending
+        dictionary - Lexicon or map of entries
+        ending - the grammatical ending (see get_ending())
+    Return:
+        tuple of entries (.morpheme is the morpheme), or None if invalid
+        (SearchBudgetExceeded is raised if the search exceeds the budget)
+    """
+    if len(word) == 0:
+        return None
+    search = _search_context(word, dictionary, ending)
+    exceeded = False
+    try:
+        if not search.lattice.finishes(0):
+            return None
+        return search.solve(0, 0, None, None, 0, ())
+    except SearchBudgetExceeded:
+        exceeded = True
+        raise
+    finally:
+        search.steps.record(exceeded)
+        search.release()
+        search.busy = False
+
+
+def divide_word(word, dictionary, ending):
+    """Divide a compound word (without its grammatical ending) into morphemes,
+    checking their synthesis. See find_division().
+    Params:
+        word - lower case, without ending
+        dictionary - Lexicon or map of entries
+        ending - the grammatical ending (see get_ending())
+    Return:
+        MorphemeList with the morphemes and ending, or None if invalid
+        (SearchBudgetExceeded is raised if the search exceeds the budget)
+    """
+    division = find_division(word, dictionary, ending)
+    if division is None:
+        return None
+    return _morpheme_list(division, ending)
+
+
+def best_divisions(word, dictionary, ending, k):
+    """Find the k cheapest valid divisions of a compound word, by best-first
+    (A*) search over its lattice. The cost of a division is the sum of the
+    rarity of its morphemes; separators cost nothing. The search is guided
+    by the cheapest way from each position to the end of the word, ignoring
+    the synthesis rules, so it does not need to enumerate all the divisions.
+    A search state (see _Search.solve()) is expanded at most k times, because
+    a state's (k+1)th cheapest beginning cannot be part of the k cheapest
+    divisions. Divisions of equal cost are returned in the order in which
+    find_morpheme() would find them. Every state expanded is a step of the
+    search budget.
+    Params:
+        word - lower case, without ending
+        dictionary - Lexicon or map of entries
+        ending - the grammatical ending (see get_ending())
+        k - maximum number of divisions
+    Return:
+        list of (cost, MorphemeList), cheapest first
+        (SearchBudgetExceeded is raised if the search exceeds the budget)
+    """
+    if k <= 0 or len(word) == 0:
+        return []
+    search = _Search(word, dictionary, ending)
+    exceeded = False
+    try:
+        return _best_divisions(search, ending, k)
+    except SearchBudgetExceeded:
+        exceeded = True
+        raise
+    finally:
+        search.steps.record(exceeded)
+
+
+def _best_divisions(search, ending, k):
+    """The A* search of best_divisions()."""
+    length = search.length
+    steps = search.steps
+
+    # bound[position] - the cheapest way to the end of the word.
+    bound = [INFINITY] * (length + 1)
+    bound[length] = 0
+    for start in range(length - 1, -1, -1):
+        cost = INFINITY
+        for end, entry in search.lattice.arcs(start):
+            cost = min(cost, entry.rarity + bound[end])
+        if search.lattice.separator(start):
+            cost = min(cost, bound[start + 1])
+        bound[start] = cost
+    if bound[0] == INFINITY:
+        return []
+
+    # Items of the heap: (estimated cost, order, cost, start, index, previous,
+    # before_previous, separators, pending, division). 'order' is the list of
+    # the moves taken (see _Search.moves()); it is unique for each item.
+    heap = [(bound[0], (), 0, 0, 0, None, None, 0, (), ())]
+    expanded = {}
+    divisions = []
+    while heap and len(divisions) < k:
+        item = heapq.heappop(heap)
+        estimate, order, cost, start, index, previous, before_previous, separators, pending, division = item
+        if start == length:
+            divisions.append((cost, _morpheme_list(division, ending)))
+            continue
+        state = (start, index, previous, before_previous, separators, pending)
+        times = expanded.get(state, 0)
+        if times >= k: continue
+        expanded[state] = times + 1
+        steps.take()
+
+        for move, (end, entry) in enumerate(search.moves(start, index)):
+            if end < length and index + 1 >= MorphemeList.MAX_MORPHEMES:
+                continue
+            if bound[end] == INFINITY:
+                continue
+            placed = search.extend(entry, end, index, previous, before_previous, separators, pending)
+            if placed is None:
+                continue
+            placed_entry, placed_separators, placed_pending = placed
+            synthesis = placed_entry.synthesis
+            needs_before = synthesis == Synthesis.Participle or synthesis == Synthesis.Limited
+            new_cost = cost + (0 if entry.flag == "separator" else entry.rarity)
+            heapq.heappush(heap, (new_cost + bound[end], order + (move,), new_cost, end, index + 1,
+                                  placed_entry, previous if needs_before else None,
+                                  placed_separators, placed_pending, division + (placed_entry,)))
+    return divisions
+
+
+def _morpheme_list(division, ending):
+    """Put a division (tuple of entries) into a MorphemeList."""
+    morpheme_list = MorphemeList(ending)
+    for index, entry in enumerate(division):
+        morpheme_list.put(index, entry)
+    return morpheme_list
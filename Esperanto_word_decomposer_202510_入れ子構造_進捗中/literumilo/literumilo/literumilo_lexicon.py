@@ -0,0 +1,550 @@
+#! -*- coding: utf-8
+# literumilo_lexicon.py
+#
+# Compact, column-oriented storage for the Esperanto dictionary.
+#
+# A dictionary of EspDictEntry objects costs several hundred bytes per
+# morpheme: every entry has its own __dict__, enum references and a copy of
+# the morpheme string. The Lexicon below stores the same data as parallel
+# arrays (struct of arrays). Morpheme strings are interned and shared with
+# the lookup keys, and parts of speech, meanings, transitivity, etc. are
+# stored as small integer codes.
+#
+# Lexicon.get() returns a LexiconEntry, a small read-only object with
+# __slots__, which has the same attributes as EspDictEntry (morpheme,
+# part_of_speech, meaning, transitivity, synthesis, ...), so the synthesis
+# rules do not need to know which kind of entry they are reading. The entry
+# of a row is made when the row is first looked up, and kept.
+#
+# Every prefix and suffix also has the number of its synthesis rule
+# (LexiconEntry.rule, see literumilo_rules.py), resolved when the entry is
+# added or the lexicon is loaded.
+#
+# For the division of compound words, Lexicon.morphemes_at() finds every
+# morpheme which begins at a given position of a word, with a single walk
+# through a character trie. Every node of the trie holds the entries of the
+# keys which end on the path to it, so the walk only follows the characters,
+# and returns the tuple of the node where it stops.
+#
+# Most words in a text are a single root with a grammatical ending ('hundo',
+# 'birdojn'), or a word which takes no ending ('kaj', 'post'). The table of
+# full forms holds all of them, in a compact hash table, so that
+# Lexicon.full_form() can divide such a word with a single lookup. The table
+# is built when the dictionary is compiled, and stored in the snapshot (and
+# in lexicon images, see literumilo_image.py).
+#
+# The dictionary which check_word() loads is frozen (Lexicon.freeze()): its
+# columns become immutable bytes, and entries cannot be added or replaced.
+# Entries are read-only views; the suffix rules, which change the part of
+# speech or meaning of a suffix, work on per-analysis copies (EntryOverlay).
+# So any number of threads can share one dictionary without locks.
+#
+# Last edit date: 2026-10-16
+#
+
+import sys
+import zlib
+from array import array
+from itertools import islice
+
+from .literumilo_entry import *
+from .literumilo_ending import ENDINGS, get_ending
+from .literumilo_rules import rule_id, resolve_rules, compatible_suffixes, resolve_suffix_masks
+from .literumilo_morpheme_list import summary_bits, resolve_summaries
+
+# Tables to decode the integer codes back into enumeration members.
+# (Meaning.GEOGRAFIO is an alias of Meaning.FISXO; both have the value 49.)
+
+def _decode_table(enumeration):
+    table = [None] * (max(member.value for member in enumeration) + 1)
+    for member in enumeration:
+        table[member.value] = member
+    return table
+
+_MEANINGS = _decode_table(Meaning)
+_TRANSITIVITIES = _decode_table(Transitivity)
+_SYNTHESES = _decode_table(Synthesis)
+_WITHOUT_ENDINGS = _decode_table(WithoutEnding)
+_WITH_ENDINGS = _decode_table(WithEnding)
+_CAPITALIZATIONS = _decode_table(Cap)
+
+# Codes in the table of full forms: (row << 6) | (n << 1) | common, where n
+# is 0 for a word without ending, or 1 + the index of the ending in ENDINGS,
+# and common is 1 if the morpheme is identical to its key and has rarity 0.
+# (The division of such a word has a score of 0, see score_segmentation().)
+# A slot holds the code + 1 in its low 24 bits, and the top 8 bits of the
+# crc32 of the word (its fingerprint) above them. Most words which are not in
+# the table (compound words) are rejected by the fingerprint, without reading
+# the key of the row.
+FULL_FORM_CODE_MASK = (1 << 24) - 1
+
+# In the trie, the keys which end on the path to a node (as a tuple of
+# (length, entry), longest first) are stored under this key.
+# (Real children are single characters, so it cannot collide.)
+TERMINAL = ""
+
+
+class LexiconEntry:
+    """A read-only entry of the Lexicon: one row, with the attributes of an
+    EspDictEntry. The attributes are decoded from the columns when the entry
+    is made, and the lexicon keeps the entry of every row which has been
+    looked up, so that lookups do not allocate, and the rules read plain
+    attributes. (The suffix rules, which assign to part_of_speech, meaning
+    and transitivity, are given an EntryOverlay of the entry.)
+    """
+
+    __slots__ = ("morpheme", "capitalization", "part_of_speech", "meaning", "transitivity",
+                 "without_ending", "with_ending", "synthesis", "rarity", "flag", "rule",
+                 "suffix_mask", "summary_bits")
+
+    def __init__(self, lexicon, row):
+        """
+        Params:
+            lexicon - Lexicon or MappedLexicon
+            row
+        """
+        initialize = object.__setattr__
+        initialize(self, "morpheme", lexicon.morphemes[row])
+        initialize(self, "capitalization", _CAPITALIZATIONS[lexicon.capitalizations[row]])
+        initialize(self, "part_of_speech", lexicon.parts_of_speech[row])
+        initialize(self, "meaning", _MEANINGS[lexicon.meanings[row]])
+        initialize(self, "transitivity", _TRANSITIVITIES[lexicon.transitivities[row]])
+        initialize(self, "without_ending", _WITHOUT_ENDINGS[lexicon.without_endings[row]])
+        initialize(self, "with_ending", _WITH_ENDINGS[lexicon.with_endings[row]])
+        initialize(self, "synthesis", _SYNTHESES[lexicon.syntheses[row]])
+        initialize(self, "rarity", lexicon.rarities[row])
+        initialize(self, "flag", lexicon.flag_names[lexicon.flags[row]])
+        initialize(self, "rule", lexicon.rules[row])
+        initialize(self, "suffix_mask", lexicon.suffix_masks[row])
+        initialize(self, "summary_bits", lexicon.summaries[row])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("a lexicon entry is read-only ({})".format(name))
+
+    @property
+    def length(self):
+        return len(self.morpheme)
+
+    def display(self):
+        """Display key information about this entry."""
+        print("-- {} {} {} {} {}".format(self.morpheme, self.part_of_speech, self.meaning,
+                                                self.part_of_speech, self.synthesis))
+
+    def __repr__(self):
+        return "LexiconEntry({!r})".format(self.morpheme)
+
+
+class Lexicon:
+    """The Esperanto dictionary, stored as parallel arrays. It behaves like
+    a read-only mapping from key (lower case morpheme, without periods) to
+    dictionary entry. Entries can be added with lexicon[key] = EspDictEntry,
+    until the lexicon is frozen.
+    """
+
+    def __init__(self):
+        self.keys_by_row = []          # lookup keys, one per row
+        self.index = {}                # key -> row
+        self.morphemes = []            # interned, shared with keys_by_row when equal
+        self.parts_of_speech = array('B')
+        self.meanings = array('B')
+        self.transitivities = array('B')
+        self.without_endings = array('B')
+        self.with_endings = array('B')
+        self.syntheses = array('B')
+        self.capitalizations = array('B')
+        self.rarities = array('B')
+        self.flags = array('B')
+        self.flag_names = []           # code -> flag string ('R', 'K', 'separator'...)
+        self.rules = array('B')        # synthesis rule of affixes (not stored in snapshots)
+        self.suffix_masks = array('I') # simple suffixes which may follow (not stored either)
+        self.summaries = array('H')    # summary bits, see literumilo_morpheme_list.py (nor these)
+        self._trie = None              # built on first use, see morphemes_at()
+        self._entries = None           # row -> LexiconEntry, made on first use, see entry()
+        self.full_forms = array('I')   # hash table of words, see build_full_forms()
+        self.version = 0               # incremented whenever an entry is added or replaced
+        self.source_digest = None      # digest of vortaro.tsv, while the lexicon is unmodified
+        self.frozen = False            # see freeze()
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Build a Lexicon from a map of EspDictEntry objects,
+        as produced by make_dictionary().
+        Params:
+            map of key -> EspDictEntry
+        Return:
+            Lexicon
+        """
+        lexicon = cls()
+        for key, entry in entries.items():
+            lexicon[key] = entry
+        return lexicon
+
+    def _flag_code(self, flag):
+        try:
+            return self.flag_names.index(flag)
+        except ValueError:
+            self.flag_names.append(flag)
+            return len(self.flag_names) - 1
+
+    def __setitem__(self, key, entry):
+        """Add (or replace) an entry. The entry may be an EspDictEntry
+        or a LexiconEntry."""
+        if self.frozen:
+            raise TypeError("a frozen lexicon cannot be modified")
+        key = sys.intern(key)
+        self._trie = None
+        self._entries = None
+        self.full_forms = array('I')
+        self.version += 1
+        self.source_digest = None
+        morpheme = entry.morpheme
+        morpheme = key if morpheme == key else sys.intern(morpheme)
+        columns = (entry.part_of_speech, entry.meaning.value, entry.transitivity.value,
+                   entry.without_ending.value, entry.with_ending.value,
+                   entry.synthesis.value, entry.capitalization.value, entry.rarity,
+                   self._flag_code(entry.flag))
+        row = self.index.get(key)
+        if row is None:
+            row = len(self.keys_by_row)
+            self.index[key] = row
+            self.keys_by_row.append(key)
+            self.morphemes.append(morpheme)
+            for column, value in zip(self._columns(), columns):
+                column.append(value)
+            self.rules.append(0)
+            self.suffix_masks.append(0)
+            self.summaries.append(0)
+        else:
+            self.morphemes[row] = morpheme
+            for column, value in zip(self._columns(), columns):
+                column[row] = value
+        self.rules[row] = rule_id(morpheme, entry.synthesis, entry.part_of_speech)
+        self.suffix_masks[row] = compatible_suffixes(entry.part_of_speech, entry.meaning,
+                                                     entry.transitivity)
+        self.summaries[row] = summary_bits(entry)
+
+    def freeze(self):
+        """Make the lexicon immutable, so that it can be shared by threads
+        (and processes) without locks: the columns become bytes, the lists
+        of keys and morphemes become tuples, and the table of full forms
+        becomes a read-only view. Lookups are unchanged.
+        Return:
+            the lexicon
+        """
+        if self.frozen:
+            return self
+        if not self.full_forms:
+            self.build_full_forms()
+        # The trie is still built on first use; if two threads build it at
+        # the same time, both build the same trie, and one is kept.
+        self.keys_by_row = tuple(self.keys_by_row)
+        self.morphemes = tuple(self.morphemes)
+        self.flag_names = tuple(self.flag_names)
+        (self.parts_of_speech, self.meanings, self.transitivities, self.without_endings,
+         self.with_endings, self.syntheses, self.capitalizations, self.rarities,
+         self.flags) = [bytes(column) for column in self._columns()]
+        self.rules = bytes(self.rules)
+        self.suffix_masks = memoryview(self.suffix_masks.tobytes()).cast("I")
+        self.summaries = memoryview(self.summaries.tobytes()).cast("H")
+        self.full_forms = memoryview(self.full_forms.tobytes()).cast("I")
+        self.frozen = True
+        return self
+
+    def copy(self):
+        """Return a copy of the lexicon which can be modified, also if this
+        one is frozen. For example, entries can be tried out in a copy, which
+        is then given to set_dictionary(), without reloading the dictionary.
+        Return:
+            Lexicon, not frozen
+        """
+        lexicon = Lexicon.__new__(Lexicon)
+        lexicon.__setstate__(self.__getstate__()[:-1] + (False,))
+        lexicon.source_digest = self.source_digest
+        return lexicon
+
+    def _columns(self):
+        return (self.parts_of_speech, self.meanings, self.transitivities,
+                self.without_endings, self.with_endings, self.syntheses,
+                self.capitalizations, self.rarities, self.flags)
+
+    def entry(self, row):
+        """Return the entry of a row. Entries are made on first use, and
+        kept until the lexicon is modified. (If two threads make the entry
+        of a row at the same time, both entries are equal, and one is kept.)
+        """
+        entries = self._entries
+        if entries is None:
+            entries = self._entries = [None] * len(self.keys_by_row)
+        entry = entries[row]
+        if entry is None:
+            entry = entries[row] = LexiconEntry(self, row)
+        return entry
+
+    def get(self, key, default = None):
+        """Return the entry for the given key, or default."""
+        row = self.index.get(key)
+        if row is None:
+            return default
+        return self.entry(row)
+
+    def __getitem__(self, key):
+        return self.entry(self.index[key])
+
+    def _build_trie(self):
+        """Build a character trie of all keys. Each node is a dict of
+        child nodes, indexed by character. Under TERMINAL, every node holds
+        the keys which are prefixes of its path, as (length, entry), longest
+        first. (A node which completes no key shares the tuple of its parent.)
+        The entries of all rows are made here.
+        """
+        root = {}
+        for row, key in enumerate(self.keys_by_row):
+            node = root
+            for ch in key:
+                child = node.get(ch)
+                if child is None:
+                    child = node[ch] = {}
+                node = child
+            node[TERMINAL] = row
+        entry = self.entry
+        nodes = [(root, (), 0)]
+        while nodes:
+            node, above, depth = nodes.pop()
+            row = node.get(TERMINAL)
+            keys = above if row is None else ((depth, entry(row)),) + above
+            node[TERMINAL] = keys
+            for ch, child in node.items():
+                if ch != TERMINAL:
+                    nodes.append((child, keys, depth + 1))
+        self._trie = root
+        return root
+
+    def morphemes_at(self, text, start, max_length):
+        """Find every key which is a prefix of text[start:], and not longer
+        than max_length, by walking the trie once. No substrings are created,
+        and the result is the tuple stored in the trie (not a new list).
+        Params:
+            text - the word being divided
+            start - position in text where the morpheme must begin
+            max_length - maximum length of the morpheme
+        Return:
+            tuple of (length, entry), longest morpheme first
+        """
+        node = self._trie
+        if node is None:
+            node = self._build_trie()
+        if max_length > 0:
+            for ch in islice(text, start, start + max_length):
+                child = node.get(ch)
+                if child is None:
+                    break
+                node = child
+        return node[TERMINAL]
+
+    def prefix_matches(self, text, start, min_length, max_length):
+        """Find every key which is a prefix of text[start:] (see morphemes_at()).
+        Params:
+            text - the word being divided
+            start - position in text where the morpheme must begin
+            min_length, max_length - limits for the length of the morpheme
+        Return:
+            list of (end position, entry), longest morpheme first
+        """
+        return [(start + length, entry) for length, entry in self.morphemes_at(text, start, max_length)
+                if length >= min_length]
+
+    def build_full_forms(self):
+        """Build the table of full forms (see find_full_form()): every key
+        which can stand without an ending (WithoutEnding.Yes), and every key
+        which takes an ending (WithEnding.Yes) combined with each of the 16
+        endings. A form is only included if check_word() would divide it the
+        same way, that is, if get_ending() finds the same ending in it.
+        Return:
+            the table (array of uint32, or a read-only view if the lexicon is frozen)
+        """
+        codes = {}
+        without_ending = WithoutEnding.Yes.value
+        with_ending = WithEnding.Yes.value
+        for row, key in enumerate(self.keys_by_row):
+            if self.without_endings[row] == without_ending:
+                codes[key] = (row << 6) | self._common(row)
+        for row, key in enumerate(self.keys_by_row):
+            if self.with_endings[row] != with_ending:
+                continue
+            common = self._common(row)
+            for number, ending in enumerate(ENDINGS, 1):
+                form = key + ending.ending
+                if form not in codes and get_ending(form) is ending:
+                    codes[form] = (row << 6) | (number << 1) | common
+        if len(self.keys_by_row) << 6 > FULL_FORM_CODE_MASK:
+            raise ValueError("too many rows for the table of full forms")
+        size = 1
+        while size < len(codes) * 2:
+            size *= 2
+        mask = size - 1
+        slots = array('I', bytes(4 * size))
+        for form, code in codes.items():
+            crc = zlib.crc32(form.encode("utf-8"))
+            slot = crc & mask
+            while slots[slot]:
+                slot = (slot + 1) & mask
+            slots[slot] = (crc >> 24) << 24 | (code + 1)
+        self.full_forms = memoryview(slots.tobytes()).cast("I") if self.frozen else slots
+        return self.full_forms
+
+    def _common(self, row):
+        return int(self.rarities[row] == 0 and self.morphemes[row] == self.keys_by_row[row])
+
+    def full_form(self, word):
+        """Divide a word which is in the table of full forms.
+        See find_full_form()."""
+        if not self.full_forms:
+            self.build_full_forms()
+        return find_full_form(self, self.full_forms, word)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.keys_by_row)
+
+    def __iter__(self):
+        return iter(self.keys_by_row)
+
+    def keys(self):
+        return list(self.keys_by_row)
+
+    def items(self):
+        return [(key, self.entry(row)) for row, key in enumerate(self.keys_by_row)]
+
+    def values(self):
+        return [self.entry(row) for row in range(len(self.keys_by_row))]
+
+    # The index (key -> row) is not stored in snapshots; it is rebuilt when
+    # a snapshot is loaded. Morphemes which are identical to their keys are
+    # stored as None, so they are shared again after loading.
+
+    def __getstate__(self):
+        morphemes = [None if morpheme is key else morpheme
+                     for key, morpheme in zip(self.keys_by_row, self.morphemes)]
+        return (self.keys_by_row, morphemes, self.flag_names,
+                [bytes(column) for column in self._columns()],
+                self.full_forms.tobytes(), self.frozen)
+
+    def __setstate__(self, state):
+        keys, morphemes, flag_names, column_bytes, full_form_bytes, frozen = state
+        self.__init__()
+        intern = sys.intern
+        self.keys_by_row = [intern(key) for key in keys]
+        self.morphemes = [key if morpheme is None else intern(morpheme)
+                          for key, morpheme in zip(self.keys_by_row, morphemes)]
+        self.index = dict(zip(self.keys_by_row, range(len(keys))))
+        self.flag_names = list(flag_names)
+        for column, data in zip(self._columns(), column_bytes):
+            column.frombytes(data)
+        self.full_forms.frombytes(full_form_bytes)
+        self.rules.frombytes(resolve_rules(self))
+        self.suffix_masks = resolve_suffix_masks(self)
+        self.summaries = resolve_summaries(self)
+        if frozen:
+            self.freeze()
+
+    def memory_usage(self):
+        """Estimate the memory used by this lexicon, in bytes. Strings which
+        are shared between keys and morphemes are counted once.
+        Return:
+            size in bytes (int)
+        """
+        seen = set()
+        size = sys.getsizeof(self.keys_by_row) + sys.getsizeof(self.morphemes) + \
+               sys.getsizeof(self.index)
+        for string in self.keys_by_row + self.morphemes:
+            if id(string) not in seen:
+                seen.add(id(string))
+                size += sys.getsizeof(string)
+        for column in self._columns():
+            size += sys.getsizeof(column)
+        size += sys.getsizeof(self.rules) + len(self.suffix_masks) * 4 + len(self.summaries) * 2
+        full_forms = self.full_forms
+        if isinstance(full_forms, memoryview):
+            return size + sys.getsizeof(full_forms) + full_forms.nbytes
+        return size + sys.getsizeof(full_forms)
+
+
+def dictionary_memory_usage(dictionary):
+    """Estimate the memory used by a map of EspDictEntry objects (the format
+    produced by make_dictionary()), in bytes, for comparison with
+    Lexicon.memory_usage(). Enumeration members are shared, so they are not
+    counted.
+    """
+    size = sys.getsizeof(dictionary)
+    for key, entry in dictionary.items():
+        size += sys.getsizeof(key) + sys.getsizeof(entry) + sys.getsizeof(entry.__dict__)
+        size += sys.getsizeof(entry.morpheme) + sys.getsizeof(entry.flag)
+        size += sys.getsizeof(entry.rarity) + sys.getsizeof(entry.length)
+    return size
+
+
+def find_full_form(lexicon, slots, word):
+    """Look up a word in a table of full forms (see Lexicon.build_full_forms()).
+    The table is an open-addressing hash table (linear probing), indexed by
+    the crc32 of the word. Slots hold a code + 1 (0 means empty), and a
+    fingerprint of the word; if the fingerprint matches, the row and the
+    ending which the code gives are compared with the word.
+    Params:
+        lexicon - Lexicon or MappedLexicon
+        slots - the table (array or memoryview of uint32)
+        word - lower case
+    Return:
+        tuple (division, common), eg. ('hund.ojn', True) or ('post', True),
+        or None. common is True if the morpheme is identical to its key
+        and has rarity 0.
+    """
+    mask = len(slots) - 1
+    crc = zlib.crc32(word.encode("utf-8"))
+    slot = crc & mask
+    fingerprint = crc >> 24
+    while True:
+        value = slots[slot]
+        if not value:
+            return None
+        if value >> 24 != fingerprint:
+            slot = (slot + 1) & mask
+            continue
+        code = (value & FULL_FORM_CODE_MASK) - 1
+        row = code >> 6
+        key = lexicon.keys_by_row[row]
+        number = (code >> 1) & 31
+        if number == 0:
+            if key == word:
+                return lexicon.morphemes[row], code & 1 == 1
+        else:
+            ending = ENDINGS[number - 1].ending
+            if len(key) + len(ending) == len(word) and word.startswith(key) and \
+               word.endswith(ending):
+                return lexicon.morphemes[row] + "." + ending, code & 1 == 1
+        slot = (slot + 1) & mask
+
+
+def probe_prefix_matches(lexicon, text, start, min_length, max_length):
+    """Same result as Lexicon.prefix_matches(), found by looking up every
+    possible substring, from the longest to the shortest. This is how
+    compound words were divided before the trie was added; it is used
+    for lexicons which have no trie (see literumilo_image.py).
+    """
+    matches = []
+    stop = min(len(text), start + max_length)
+    for end in range(stop, start + min_length - 1, -1):
+        entry = lexicon.get(text[start:end])
+        if entry:
+            matches.append((end, entry))
+    return matches
+
+
+def probe_morphemes_at(lexicon, text, start, max_length, min_length = 1):
+    """Same result as Lexicon.morphemes_at() (without the keys shorter than
+    min_length), found by looking up every possible substring. Used for
+    lexicons which have no trie.
+    """
+    return [(end - start, entry)
+            for end, entry in probe_prefix_matches(lexicon, text, start, min_length, max_length)]
@@ -9,13 +9,20 @@
 
 import os, sys
 import enum
+import threading
 
 from .literumilo_utils import x_to_accent
 from .literumilo_entry import *
+from .literumilo_lexicon import Lexicon
+from .literumilo_snapshot import load_or_build, file_digest
 
 DICTIONARY_FN = 'data/vortaro.tsv'
 NL = '\n'
 
+_dictionary = None    # Loaded on first use. See get_dictionary().
+_dictionary_lock = threading.Lock()
+_dictionary_generation = 0    # incremented by set_dictionary()
+
 def make_dictionary(lines):
     """
     This function takes rows of tab-separated dictionary data and produces a hash map
@@ -62,7 +69,7 @@ def make_dictionary(lines):
         # Exclude any lines with a flag of 'X'
         flag = parameter_array[0]
         if entry.flag != "X":
-            esperanto_dictionary[morpheme_key] = EspDictEntry(parameter_array)
+            esperanto_dictionary[morpheme_key] = entry
             #esperanto_dictionary[morpheme_key].display()
         else:
             #print("--------------------- {}".format(parameter_array))
@@ -71,18 +78,101 @@ def make_dictionary(lines):
     return esperanto_dictionary;
 
 
-def load_dictionary():
-    """Read in the Esperanto dictionary file (tab separated values),
-    and produce a dictionary, indexed by morpheme.
+def dictionary_path():
+    """Return the path of the dictionary file (vortaro.tsv)."""
+    this_path = os.path.abspath(os.path.dirname(__file__))
+    return os.path.join(this_path, DICTIONARY_FN)
+
+
+def read_dictionary(dict_path):
+    """Read and parse the dictionary file at the given path.
+    Params:
+        path of dictionary file (tab separated values)
+    Return:
+        hash map of dictionary data
     """
     lines = []
-    this_path = os.path.abspath(os.path.dirname(__file__))
-    dict_path = os.path.join(this_path, DICTIONARY_FN)
     with open(dict_path, 'r') as fp:
         for line in fp:
             lines.append(line.strip())
     return make_dictionary(lines)
 
+
+def compile_dictionary(dict_path):
+    """Read the dictionary file at the given path, and store it in
+    compact, column-oriented form (see literumilo_lexicon.py), with its
+    table of full forms. The lexicon is frozen, so it can be shared by
+    threads.
+    Params:
+        path of dictionary file (tab separated values)
+    Return:
+        Lexicon (frozen)
+    """
+    return Lexicon.from_entries(read_dictionary(dict_path)).freeze()
+
+
+def load_dictionary(use_snapshot = True):
+    """Read in the Esperanto dictionary file (tab separated values),
+    and produce a dictionary (Lexicon), indexed by morpheme.
+    Parsing the file is slow, so the result is kept in a compiled
+    snapshot (see literumilo_snapshot.py), which is rebuilt whenever
+    vortaro.tsv changes.
+    Params:
+        use_snapshot - False to always parse vortaro.tsv
+    Return:
+        Lexicon
+    """
+    dict_path = dictionary_path()
+    digest = file_digest(dict_path)
+    if use_snapshot:
+        lexicon = load_or_build(dict_path, compile_dictionary, digest)
+    else:
+        lexicon = compile_dictionary(dict_path)
+    lexicon.source_digest = digest    # see literumilo_disk_cache.py
+    return lexicon
+
+
+def get_dictionary():
+    """Return the Esperanto dictionary, loading it on first use.
+    Loading is thread-safe: if several threads ask for the dictionary at
+    the same time, it is loaded only once.
+    Return:
+        hash map of dictionary data
+    """
+    global _dictionary
+    dictionary = _dictionary
+    if dictionary is None:
+        with _dictionary_lock:
+            if _dictionary is None:
+                from .literumilo_image import image_from_environment
+                image = image_from_environment()
+                _dictionary = image.lexicon if image else load_dictionary()
+            dictionary = _dictionary
+    return dictionary
+
+
+def set_dictionary(dictionary):
+    """Replace the dictionary used by check_word(), for example with a
+    memory-mapped lexicon (see literumilo_image.py).
+    Params:
+        Lexicon, or any mapping of key -> dictionary entry
+    """
+    global _dictionary, _dictionary_generation
+    with _dictionary_lock:
+        _dictionary = dictionary
+        _dictionary_generation += 1
+
+
+def dictionary_generation():
+    """Return a number which changes whenever the dictionary is replaced
+    by set_dictionary(). (See lexicon_version() in literumilo_cache.py.)"""
+    return _dictionary_generation
+
+
+def is_dictionary_loaded():
+    """Return True if the dictionary has already been loaded."""
+    return _dictionary is not None
+
 # ----------------------------------------------------
 # Program starts here.
 
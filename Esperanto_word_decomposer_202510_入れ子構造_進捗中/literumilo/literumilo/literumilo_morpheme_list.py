@@ -6,17 +6,98 @@
 # Author: Klivo Lendon
 # Last edit date: 2020-05-17
 
+from array import array
+
+from .literumilo_entry import *
+
+# Summary bits of a morpheme, read by the prefix checks (see summary_bits()).
+PERSON = 1         # means a person (is_person())
+ANIMAL = 2         # means an animal (is_animal())
+SUBSTANTIVE = 4    # POS.Substantive
+VERBAL = 8         # POS.Verb or POS.SubstantiveVerb
+ADJECTIVE = 16     # POS.Adjective
+PARTICIPLE = 32    # POS.Participle
+TRANSITIVE = 64    # Transitivity.Transitive
+AD_EC = 128        # the suffix -ad or -ec
+SEPARATOR = 256    # a separator (o, a, e)
+
+
+def _table(size, members):
+    table = [0] * size
+    for key, bit in members:
+        table[key] |= bit
+    return table
+
+_POS_BITS = _table(max(value for value in vars(POS).values() if isinstance(value, int)) + 1, (
+                       (POS.Substantive, SUBSTANTIVE), (POS.Verb, VERBAL),
+                        (POS.SubstantiveVerb, VERBAL), (POS.Adjective, ADJECTIVE),
+                        (POS.Participle, PARTICIPLE)))
+_MEANING_BITS = _table(max(meaning.value for meaning in Meaning) + 1,
+                       [(meaning.value, PERSON) for meaning in Meaning if is_person(meaning)] +
+                       [(meaning.value, ANIMAL) for meaning in Meaning if is_animal(meaning)])
+
+
+def summary_bits(entry):
+    """Compute the summary bits of a morpheme (dictionary entry).
+    The entries of a Lexicon have them precomputed (entry.summary_bits).
+    """
+    bits = _POS_BITS[entry.part_of_speech] | _MEANING_BITS[entry.meaning.value]
+    if entry.transitivity is Transitivity.Transitive: bits |= TRANSITIVE
+    morpheme = entry.morpheme
+    if morpheme == "ad" or morpheme == "ec": bits |= AD_EC
+    if entry.flag == "separator": bits |= SEPARATOR
+    return bits
+
+
+def resolve_summaries(lexicon):
+    """Compute the summary bits of every row of a lexicon.
+    Params:
+        Lexicon or MappedLexicon
+    Return:
+        summary bits, one per row (array of uint16)
+    """
+    transitive = Transitivity.Transitive.value
+    separator = lexicon.flag_names.index("separator") if "separator" in lexicon.flag_names else -1
+    summaries = array('H')
+    for part_of_speech, meaning, transitivity, morpheme, flag in zip(
+            lexicon.parts_of_speech, lexicon.meanings, lexicon.transitivities,
+            lexicon.morphemes, lexicon.flags):
+        bits = _POS_BITS[part_of_speech] | _MEANING_BITS[meaning]
+        if transitivity == transitive: bits |= TRANSITIVE
+        if morpheme == "ad" or morpheme == "ec": bits |= AD_EC
+        if flag == separator: bits |= SEPARATOR
+        summaries.append(bits)
+    return summaries
+
+
 class MorphemeList:
     """The list of morphemes contains up to 9 dictionary entries,
     an index to the last entry, and the word's ending.
+
+    The prefix checks ask whether any morpheme after the prefix is a verb,
+    a person, transitive, etc. Instead of scanning the rest of the list on
+    every check, they read summary_after(), which is computed once for the
+    whole list. The summary bits of each morpheme are computed when the
+    summary is first needed after the morpheme was put, so they include any
+    change which a suffix rule made to the entry after it was put. (Entries
+    are only modified right after they are put, before any prefix check.)
     """
 
     MAX_MORPHEMES = 9    # The maximum number of morphemes in a compound word.
+    _EMPTY = (None,) * MAX_MORPHEMES
 
     def __init__(self, ending):
         self.ending = ending
         self.last_index = 0
         self.morphemes =  [None] * self.MAX_MORPHEMES
+        self._after = None    # summary_after() of each index, until the next put()
+
+    def reset(self, ending):
+        """Empty the list, to reuse it for another word."""
+        self.ending = ending
+        self.last_index = 0
+        self.morphemes[:] = self._EMPTY
+        self._after = None
 
     def get_last_index(self):
         """Getter for last index."""
@@ -33,10 +114,14 @@ class MorphemeList:
        Return:
            string of morphemes
         """
+        return self.stem_form() + "." + self.ending.ending
+
+    def stem_form(self):
+        """Same as display_form(), without the ending, eg. 'for.ig.it'."""
         morpheme_str = self.morphemes[0].morpheme
         for index in range(1, self.last_index + 1):
             morpheme_str += "." + self.morphemes[index].morpheme
-        return morpheme_str + "." + self.ending.ending
+        return morpheme_str
 
     def count_separators(self):
         """This method scans the collected morphemes in morpheme_list
@@ -47,9 +132,10 @@ class MorphemeList:
             count of separators
         """
         count = 0
+        morphemes = self.morphemes
         for index in range(0, self.last_index + 1):
-            morph = self.morphemes[index]
-            if morph.flag == 'separator': count += 1
+            entry = morphemes[index]
+            if entry and entry.flag == "separator": count += 1
         return count
 
     def get(self, index):
@@ -64,4 +150,25 @@ class MorphemeList:
             sys.exit(0)
         self.last_index = index
         self.morphemes[index] = entry
+        self._after = None
+
+    def summary_after(self, index):
+        """Return the summary bits of all the morphemes after 'index'
+        (index + 1 .. last), combined. For example,
+        summary_after(0) & VERBAL is not 0 if a verb follows the first morpheme.
+        Return:
+            bit mask (PERSON, ANIMAL, SUBSTANTIVE...)
+        """
+        after = self._after
+        if after is None:
+            last = self.last_index
+            morphemes = self.morphemes
+            after = [0] * (last + 1)
+            following = 0
+            for position in range(last, 0, -1):
+                entry = morphemes[position]
+                if entry: following |= entry.summary_bits
+                after[position - 1] = following
+            self._after = after
+        return after[index] if index < len(after) else 0
 
@@ -0,0 +1,145 @@
+#! -*- coding: utf-8
+# literumilo_parallel.py
+#
+# Analyze a large text with several processes. The text is read in chunks
+# which end after a white space character, so that no word is cut between
+# two chunks, and each chunk is analyzed by a worker process of a
+# ProcessPoolExecutor. Each worker loads the dictionary once, when it
+# starts (see new_pool()). The results are put back in the order of the
+# chunks, so the output is the same as that of a serial analysis.
+#
+# Only a few chunks per worker are in progress at a time; the next chunk is
+# read when the first one in progress has been output, so memory use does
+# not depend on the size of the text.
+#
+# Last edit date: 2026-10-16
+#
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .literumilo_check_word import warm_up
+
+PARALLEL_CHUNK_SIZE = 1 << 18   # characters per chunk (a chunk may be a little longer)
+CHUNKS_PER_WORKER = 2           # chunks in progress for each worker
+
+
+def default_jobs():
+    """Return the number of processors available to this process."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def new_pool(jobs):
+    """Start a pool of worker processes, each of which loads the dictionary
+    once, when it starts.
+    Params:
+        jobs - number of worker processes
+    Return:
+        ProcessPoolExecutor
+    """
+    return ProcessPoolExecutor(max_workers = jobs, initializer = warm_up)
+
+
+def whitespace_chunks(file, size = PARALLEL_CHUNK_SIZE):
+    """
+    Reads a text file in chunks of about 'size' characters, each of which
+    ends after a white space character (or at the end of the file), so that
+    no word is divided between two chunks.
+    Params:
+        file - a file opened in text mode
+        size - number of characters to read at a time
+    Return:
+        generator of strings
+    """
+    rest = ""
+    while True:
+        block = file.read(size)
+        if not block:
+            break
+        chunk, rest = cut_at_whitespace(rest, block)
+        if chunk: yield chunk
+    if rest:
+        yield rest
+
+
+def cut_at_whitespace(rest, block):
+    """
+    Appends a block of text to the rest of the previous one, and cuts the
+    result after its last white space character. Only the new block is
+    searched.
+    Params:
+        rest - text not yet output (no white space)
+        block - new text
+    Return:
+        (text up to the last white space, or "", the new rest)
+    """
+    text = rest + block if rest else block
+    cut = len(block)
+    while cut > 0 and not block[cut - 1].isspace():
+        cut -= 1
+    if cut == 0:
+        return "", text    # no white space yet
+    cut += len(text) - len(block)
+    return text[:cut], text[cut:]
+
+
+def analyze_piece(text, mode):
+    """Analyze one chunk in a worker. See analyze_chunks() in literumilo.py.
+    Return:
+        analyzed text, or misspelled words, one per line (str)
+    """
+    from .literumilo import analyze_string
+    return analyze_string(text, mode)
+
+
+def analyze_parallel(chunks, mode, pool, jobs):
+    """
+    Analyzes chunks of text in a pool of worker processes, and produces the
+    results in the order of the chunks. In spell checker mode, each
+    misspelled word is produced once, in the order of first appearance,
+    as in a serial analysis.
+    Params:
+        chunks - iterable of strings which do not cut words
+        morpheme mode: True = morphological analyzer, False = spell checker
+        pool - an executor (see new_pool())
+        jobs - number of workers
+    Return:
+        generator of strings
+    """
+    misspelled = set()
+    pending = deque()
+    window = max(1, jobs * CHUNKS_PER_WORKER)
+    chunks = iter(chunks)
+    while True:
+        while len(pending) < window:
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            pending.append(pool.submit(analyze_piece, chunk, mode))
+        if not pending:
+            return
+        result = pending.popleft().result()
+        if not mode:
+            result = new_misspelled(result, misspelled)
+        if result: yield result
+
+
+def new_misspelled(result, misspelled):
+    """
+    Keeps the misspelled words of a chunk which were not in an earlier one.
+    Params:
+        result - misspelled words of a chunk, one per line
+        misspelled - set of the words already produced (updated)
+    Return:
+        the new words, one per line (str)
+    """
+    new_words = []
+    for word in result.splitlines():
+        if word not in misspelled:
+            misspelled.add(word)
+            new_words.append(word + "\n")
+    return "".join(new_words)
@@ -12,13 +12,17 @@
 #
 
 import os
-from typing import Dict, List, Optional, Tuple
+import threading
+from typing import Dict, List, Mapping, Optional, Tuple
 
 from .literumilo_utils import caret_to_accent
 from .literumilo_entry import POS
 from .literumilo_ending import get_ending
 
-_PEJVO_CACHE: Optional[Dict[str, str]] = None
+_PEJVO_CACHE: Optional[Mapping[str, str]] = None
+_PEJVO_LOCK = threading.Lock()
+_PEJVO_GENERATION = 0  # incremented whenever the map is replaced or reset
+_PEJVO_DIGEST: Optional[str] = None  # digest of the source file of the map, if known
 
 CANONICAL_SUFFIXES = {
     POS.Substantive: "o",
@@ -86,7 +90,7 @@ def _extract_derivational_suffixes(stem: str) -> Tuple[str, List[str], bool]:
 
 
 def _lookup_canonical_tokens(
-    pejvo_map: Dict[str, str], base: str, canonical_pos: POS
+    pejvo_map: Mapping[str, str], base: str, canonical_pos: POS
 ) -> Optional[List[str]]:
     """
     Try to obtain the canonical segmentation for a base by consulting the PEJVO map.
@@ -117,7 +121,7 @@ def _lookup_canonical_tokens(
     return None
 
 
-def _lookup_variations(pejvo_map: Dict[str, str], word: str) -> Optional[str]:
+def _lookup_variations(pejvo_map: Mapping[str, str], word: str) -> Optional[str]:
     """
     Attempt to derive a PEJVO segmentation for inflected forms such as plural nouns,
     verb conjugations, participles, and ig/iĝ derivatives.
@@ -187,19 +191,66 @@ def _normalise_entry(entry: str) -> Optional[Tuple[str, str]]:
     return word, segmentation
 
 
-def load_pejvo_decompositions(pejvo_path: Optional[str] = None) -> Dict[str, str]:
+def load_pejvo_decompositions(pejvo_path: Optional[str] = None) -> Mapping[str, str]:
     """Load PEJVO decompositions into a dictionary {word: segmentation}.
-    The result is cached so the file is parsed at most once per process.
+    The result is cached so the file is parsed at most once per process,
+    even when several threads ask for it at the same time. If a lexicon
+    image is configured (see literumilo_image.py), its PEJVO map is used.
     """
-    global _PEJVO_CACHE
-    if _PEJVO_CACHE is not None:
+    global _PEJVO_CACHE, _PEJVO_DIGEST
+    cached = _PEJVO_CACHE
+    if cached is not None:
+        return cached
+
+    with _PEJVO_LOCK:
+        if _PEJVO_CACHE is None:
+            from .literumilo_image import image_from_environment
+            image = None if pejvo_path else image_from_environment()
+            if image:
+                _PEJVO_DIGEST = image.pejvo.source_digest
+                _PEJVO_CACHE = image.pejvo
+            else:
+                path = pejvo_path or _default_pejvo_path()
+                _PEJVO_DIGEST = _source_digest(path)
+                _PEJVO_CACHE = _read_pejvo(path)
         return _PEJVO_CACHE
 
-    path = pejvo_path or _default_pejvo_path()
+
+def _source_digest(path: Optional[str]) -> str:
+    """Digest of a PEJVO file, as stored in lexicon images ('none' if there is no file)."""
+    from .literumilo_snapshot import file_digest
+    try:
+        return file_digest(path) if path else "none"
+    except OSError:
+        return "none"
+
+
+def set_pejvo_map(pejvo_map: Mapping[str, str]) -> None:
+    """Replace the cached PEJVO map, for example with a memory-mapped one."""
+    global _PEJVO_CACHE, _PEJVO_GENERATION, _PEJVO_DIGEST
+    with _PEJVO_LOCK:
+        _PEJVO_CACHE = pejvo_map
+        _PEJVO_GENERATION += 1
+        _PEJVO_DIGEST = getattr(pejvo_map, "source_digest", None)
+
+
+def pejvo_generation() -> int:
+    """Return a number which changes whenever the PEJVO map is replaced."""
+    return _PEJVO_GENERATION
+
+
+def pejvo_source_digest() -> Optional[str]:
+    """Return the digest of the file the PEJVO map was read from, or None
+    if the map was given with set_pejvo_map() and its source is unknown."""
+    load_pejvo_decompositions()
+    return _PEJVO_DIGEST
+
+
+def _read_pejvo(path: Optional[str]) -> Dict[str, str]:
+    """Parse the PEJVO file at the given path. A missing file gives an empty map."""
     data: Dict[str, str] = {}
 
     if not path:
-        _PEJVO_CACHE = data
         return data
 
     try:
@@ -216,7 +267,6 @@ def load_pejvo_decompositions(pejvo_path: Optional[str] = None) -> Dict[str, str
     except OSError:
         data = {}
 
-    _PEJVO_CACHE = data
     return data
 
 
@@ -225,7 +275,9 @@ def lookup_pejvo(word: str) -> Optional[str]:
     if not word:
         return None
     word_lower = word.lower()
-    pejvo_map = load_pejvo_decompositions()
+    pejvo_map = _PEJVO_CACHE
+    if pejvo_map is None:
+        pejvo_map = load_pejvo_decompositions()
     direct = pejvo_map.get(word_lower)
     if direct:
         return direct
@@ -234,5 +286,7 @@ def lookup_pejvo(word: str) -> Optional[str]:
 
 def _clear_cache():
     """Reset the in-memory cache (primarily for testing)."""
-    global _PEJVO_CACHE
+    global _PEJVO_CACHE, _PEJVO_GENERATION, _PEJVO_DIGEST
     _PEJVO_CACHE = None
+    _PEJVO_DIGEST = None
+    _PEJVO_GENERATION += 1
@@ -0,0 +1,292 @@
+#! -*- coding: utf-8
+# literumilo_rules.py
+#
+# Table of the synthesis rules of prefixes and suffixes.
+#
+# check_suffix() and check_prefix() find the rule of an affix from its
+# morpheme (SUFFIX_RULES in literumilo_suffix.py, PREFIX_RULES in
+# literumilo_scan_morphemes.py). The division of compound words checks
+# affixes very often, so the rule of every affix entry is also resolved
+# once, when the lexicon is loaded, and stored as a small number in the
+# entry (LexiconEntry.rule). check_affix() then calls RULES[entry.rule]
+# directly.
+#
+# The numbers are assigned when this module is imported; they are not
+# stored in snapshots or lexicon images, but resolved again on loading
+# (see resolve_rules()).
+#
+# Most suffix rules (-aĵ, -ebl, -ej, -il, -ist, -ul...) only read the part of
+# speech, meaning and transitivity of the previous morpheme, and do not
+# modify any entry. Their results are kept in a compatibility matrix: one
+# row per class of previous morpheme (part of speech, meaning,
+# transitivity), with one bit per rule. The rows of the classes which occur
+# in the lexicon are filled when it is loaded, and every row of the lexicon
+# gets the bit mask of its class (LexiconEntry.suffix_mask). Other rows (for
+# example, the class of a suffix whose part of speech was changed by -ec)
+# are filled when they are first needed. Checking such a suffix is then a
+# table lookup, and the search does not have to copy the suffix (see
+# literumilo_lattice.py).
+# The rules which modify the suffix (-aĉ, -ad, -ec, -eg, -et, -estr) or read
+# the previous morpheme itself (-er) are still called.
+#
+# A prefix can only be checked when the word is divided, because its rule
+# reads the morphemes which follow it. prefix_possible() checks it before
+# that, with followers which satisfy every condition (any part of speech,
+# meaning, morpheme...). If the rule rejects the prefix even so, as for
+# 'mal' anywhere but at the front of a word, the search can give up on it
+# at once.
+#
+# Last edit date: 2026-10-16
+#
+
+from array import array
+
+from .literumilo_entry import *
+from .literumilo_suffix import *
+from .literumilo_scan_morphemes import PREFIX_RULES
+
+
+def no_rule(index, morpheme_list):
+    """The rule of a morpheme which is not a known affix."""
+    return False
+
+
+def check_tech_prefix(index, morpheme_list):
+    """Technical prefixes such as 'hiper' and 'mega' are only valid
+    at the front of a word."""
+    return index == 0
+
+
+NO_RULE = 0
+TECH_PREFIX_RULE = 1
+
+# Rule number -> function(index, morpheme_list). Affixes which share a
+# function share a number.
+RULES = (no_rule, check_tech_prefix)
+for _rule in list(SUFFIX_RULES.values()) + list(PREFIX_RULES.values()):
+    if _rule not in RULES:
+        RULES += (_rule,)
+
+# Suffix rules whose results are kept in the compatibility matrix.
+SIMPLE_SUFFIX_RULES = (check_ajx, check_an, check_ar, check_ebl, check_ej, check_em,
+                       check_end_ind, check_ik_ing_ism, check_id, check_ig_igx, check_il,
+                       check_in, check_ist, check_obl_on_op, check_uj, check_ul)
+
+# Rule number -> bit of the rule in the matrix (0 for the other rules).
+SUFFIX_BITS = tuple(1 << SIMPLE_SUFFIX_RULES.index(rule) if rule in SIMPLE_SUFFIX_RULES else 0
+                    for rule in RULES)
+
+_SUFFIX_NUMBERS = {suffix: RULES.index(rule) for suffix, rule in SUFFIX_RULES.items()}
+_PREFIX_NUMBERS = {prefix: RULES.index(rule) for prefix, rule in PREFIX_RULES.items()}
+
+
+def rule_id(morpheme, synthesis, part_of_speech):
+    """Return the number of the rule which checks a morpheme.
+    Params:
+        morpheme as string
+        synthesis (Synthesis)
+        part_of_speech
+    Return:
+        index in RULES (NO_RULE if the morpheme is not an affix)
+    """
+    if synthesis == Synthesis.Suffix:
+        return _SUFFIX_NUMBERS.get(morpheme, NO_RULE)
+    if synthesis == Synthesis.Prefix:
+        if part_of_speech == POS.TechPrefix:
+            return TECH_PREFIX_RULE
+        return _PREFIX_NUMBERS.get(morpheme, NO_RULE)
+    return NO_RULE
+
+
+def resolve_rules(lexicon):
+    """Resolve the rule of every row of a lexicon.
+    Params:
+        Lexicon or MappedLexicon
+    Return:
+        rule numbers, one per row (bytes)
+    """
+    rules = bytearray(len(lexicon.keys_by_row))
+    suffix = Synthesis.Suffix.value
+    prefix = Synthesis.Prefix.value
+    for row, synthesis in enumerate(lexicon.syntheses):
+        if synthesis == suffix or synthesis == prefix:
+            rules[row] = rule_id(lexicon.morphemes[row], Synthesis(synthesis),
+                                 lexicon.parts_of_speech[row])
+    return bytes(rules)
+
+
+class _Probe:
+    """A previous morpheme, and a morpheme list, for filling the matrix."""
+
+    __slots__ = ("part_of_speech", "meaning", "transitivity")
+
+    def get(self, index):
+        return self
+
+
+_MEANING_COUNT = max(member.value for member in Meaning) + 1
+_TRANSITIVITY_COUNT = max(member.value for member in Transitivity) + 1
+_POS_COUNT = max(value for value in vars(POS).values() if isinstance(value, int)) + 1
+
+# Class of previous morpheme -> bit mask of the simple rules which accept
+# it (-1 if the row has not been filled).
+_matrix = array('l', [-1]) * (_POS_COUNT * _MEANING_COUNT * _TRANSITIVITY_COUNT)
+
+# The rules which accept a suffix at the beginning of a word.
+_probe = _Probe()
+_FIRST_MASK = sum(bit for bit, rule in zip(SUFFIX_BITS, RULES) if bit and rule(0, _probe))
+
+
+def compatible_suffixes(part_of_speech, meaning, transitivity):
+    """Return the simple suffix rules which accept a previous morpheme
+    with the given attributes.
+    Params:
+        part_of_speech, meaning, transitivity of the previous morpheme
+    Return:
+        bit mask (see SUFFIX_BITS)
+    """
+    cell = (part_of_speech * _MEANING_COUNT + meaning.value) * _TRANSITIVITY_COUNT + \
+           transitivity.value
+    mask = _matrix[cell]
+    if mask < 0:
+        probe = _Probe()
+        probe.part_of_speech = part_of_speech
+        probe.meaning = meaning
+        probe.transitivity = transitivity
+        mask = 0
+        for rule, bit in zip(RULES, SUFFIX_BITS):
+            if bit and rule(1, probe):
+                mask |= bit
+        _matrix[cell] = mask
+    return mask
+
+
+def suffix_compatible(bit, index, previous):
+    """Check a simple suffix rule in the compatibility matrix.
+    Params:
+        bit - SUFFIX_BITS of the rule
+        index of the suffix in the morpheme list
+        previous - the previous morpheme, an entry with a suffix_mask
+                   (ignored if index is 0)
+    Return:
+        True for valid synthesis, False otherwise
+    """
+    if index == 0:
+        return _FIRST_MASK & bit != 0
+    if not previous:
+        return False
+    return previous.suffix_mask & bit != 0
+
+
+def resolve_suffix_masks(lexicon):
+    """Fill the compatibility matrix for every class of morpheme which
+    occurs in a lexicon, and return the bit mask of every row.
+    Params:
+        Lexicon or MappedLexicon
+    Return:
+        bit masks, one per row (array of uint32)
+    """
+    masks = array('I')
+    known = {}
+    for key in zip(lexicon.parts_of_speech, lexicon.meanings, lexicon.transitivities):
+        mask = known.get(key)
+        if mask is None:
+            part_of_speech, meaning, transitivity = key
+            mask = compatible_suffixes(part_of_speech, Meaning(meaning), Transitivity(transitivity))
+            known[key] = mask
+        masks.append(mask)
+    return masks
+
+
+def affix_rule(entry):
+    """Return the rule number of an entry."""
+    rule = entry.rule
+    if rule is None:    # an entry which does not come from a Lexicon
+        rule = rule_id(entry.morpheme, entry.synthesis, entry.part_of_speech)
+    return rule
+
+
+def check_affix(entry, index, morpheme_list):
+    """Check the synthesis of the prefix or suffix at 'index' with the rule
+    of its entry. Same result as check_prefix() or check_suffix().
+    Params:
+        entry - the affix (the entry at 'index' in morpheme_list)
+        index of morpheme in morpheme list
+        list of morphemes (dictionary entries)
+    Return:
+        True for valid synthesis, False otherwise
+    """
+    rule = affix_rule(entry)
+    bit = SUFFIX_BITS[rule]
+    if bit:
+        if index == 0:
+            return _FIRST_MASK & bit != 0
+        previous = morpheme_list.get(index - 1)
+        if not previous:
+            return False
+        return previous.suffix_mask & bit != 0
+    return RULES[rule](index, morpheme_list)
+
+
+class _Any:
+    """An attribute of a morpheme which is not known yet. It equals any value."""
+
+    def __eq__(self, other):
+        return True
+
+    def __ne__(self, other):
+        return False
+
+    __hash__ = object.__hash__
+
+
+class _Follower:
+    """A morpheme which is not known yet."""
+
+    __slots__ = ()
+    morpheme = part_of_speech = meaning = transitivity = synthesis = flag = _Any()
+
+
+class _Unknown:
+    """A morpheme list which has a prefix at 'index', and the best possible
+    followers after it (as many as any prefix rule reads)."""
+
+    FOLLOWERS = 2
+
+    def __init__(self, index, type_of_ending):
+        self.index = index
+        self.ending_type = type_of_ending
+
+    def get(self, index):
+        return _Follower()
+
+    def get_last_index(self):
+        return self.index + self.FOLLOWERS
+
+    def type_of_ending(self):
+        return self.ending_type
+
+    def summary_after(self, index):
+        return -1    # every summary bit
+
+
+_possible = {}   # (rule, index, type of ending) -> bool
+
+
+def prefix_possible(entry, index, morpheme_list):
+    """Check whether a prefix at 'index' could be valid, whatever morphemes
+    follow it. (If it could, check_affix() decides when they are known.)
+    Params:
+        entry - the prefix
+        index of the prefix in the morpheme list
+        morpheme list, for the type of ending
+    Return:
+        False if no division with this prefix at 'index' is valid
+    """
+    type_of_ending = morpheme_list.type_of_ending()
+    key = (affix_rule(entry), index, type_of_ending)
+    possible = _possible.get(key)
+    if possible is None:
+        possible = RULES[key[0]](index, _Unknown(index, type_of_ending))
+        _possible[key] = possible
+    return possible
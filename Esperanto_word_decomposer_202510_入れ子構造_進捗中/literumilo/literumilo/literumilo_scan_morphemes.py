@@ -11,11 +11,22 @@
 #
 # Note: Some of the functions below may modify the entries in morpheme_list.
 #
+# The prefix checks which depend on all of the following morphemes (eks-,
+# ge-, mal-, ne-, sin-...) read the summary of the morpheme list
+# (MorphemeList.summary_after()), instead of scanning the rest of the list.
+#
 # Author: Klivo Lendon
 # Last edit date: 2020-05-01
 #
 
 from .literumilo_entry import *
+from .literumilo_morpheme_list import PERSON, ANIMAL, SUBSTANTIVE, VERBAL, ADJECTIVE, \
+                                      PARTICIPLE, TRANSITIVE, AD_EC
+
+# Reading a member of an Enum class is slow; scan_morphemes() reads these.
+_PREFIX = Synthesis.Prefix
+_PARTICIPLE = Synthesis.Participle
+_LIMITED = Synthesis.Limited
 
 
 def check_bo(index, morpheme_list):
@@ -75,14 +86,8 @@ def check_eks(index, morpheme_list):
     """
     if index != 0: return False
 
-    last = morpheme_list.get_last_index()
-    n = index + 1
-    while n <= last:
-        entry = morpheme_list.get(n)
-        if entry:
-            if is_person(entry.meaning): return True
-        n += 1
-    return False
+    # Is there a person among the following morphemes?
+    return morpheme_list.summary_after(index) & PERSON != 0
 # check_eks
 
 
@@ -94,17 +99,7 @@ def check_ge(index, morpheme_list):
 
     if index != 0: return False
 
-    last = morpheme_list.get_last_index()
-
-    n = index + 1
-    while n <= last:
-        entry = morpheme_list.get(n)
-        if entry:
-            meaning = entry.meaning
-            if is_person(meaning) or is_animal(meaning):
-                return True
-        n += 1
-    return False
+    return morpheme_list.summary_after(index) & (PERSON | ANIMAL) != 0
 
 # check_ge
 
@@ -117,14 +112,7 @@ def check_kun(index, morpheme_list):
     if index != 0: return False
     if  check_prepositional_prefix(index, morpheme_list): return True
 
-    last = morpheme_list.get_last_index();
-    n = index + 1;
-    while n <= last:
-        entry = morpheme_list.get(n)
-        if entry:
-            if entry.part_of_speech == POS.Substantive: return True
-        n += 1;
-    return False
+    return morpheme_list.summary_after(index) & SUBSTANTIVE != 0
 # check_kun
 
 
@@ -144,17 +132,8 @@ def check_mal(index, morpheme_list):
         type_of_ending == POS.Adverb):
         return True
 
-    n = index + 1
-    while n <= last:
-        entry = morpheme_list.get(n)
-        if entry:
-            pos = entry.part_of_speech
-            if pos == POS.Verb or \
-                pos == POS.SubstantiveVerb or \
-                pos == POS.Adjective:
-                return True
-        n += 1
-    return False
+    # Is there a verb or an adjective among the following morphemes?
+    return morpheme_list.summary_after(index) & (VERBAL | ADJECTIVE) != 0
 
 # check_mal
 
@@ -173,18 +152,8 @@ def check_ne(index, morpheme_list):
         (type_of_ending == POS.Adjective or type_of_ending == POS.Adverb):
         return True
 
-    n = index + 1
-    while n <= last:
-        entry = morpheme_list.get(n)
-        if entry:
-            pos = entry.part_of_speech
-            if pos == POS.Adjective: return True
-            if pos == POS.Participle: return True
-            entry_str = entry.morpheme
-            if entry_str == "ad": return True   # ne.uz.ad.o, ne.far.ad.o are valid.
-            if entry_str == "ec": return True
-        n += 1;
-    return False
+    # An adjective, a participle, or -ad or -ec (ne.uz.ad.o, ne.far.ad.o are valid).
+    return morpheme_list.summary_after(index) & (ADJECTIVE | PARTICIPLE | AD_EC) != 0
 
 # check_ne
 
@@ -280,15 +249,8 @@ def check_sin(index, morpheme_list):
     For a description of parameters see check_acx().
     """
     if index != 0: return False
-    last = morpheme_list.get_last_index()
 
-    n = index + 1
-    while n <= last:
-        next_entry = morpheme_list.get(n)
-        if next_entry:
-            if next_entry.transitivity == Transitivity.Transitive: return True
-        n += 1
-    return False
+    return morpheme_list.summary_after(index) & TRANSITIVE != 0
 
 # check_sin
 
@@ -333,14 +295,7 @@ def check_adverbial_prefix(index, morpheme_list):
     if last > 0 and type_of_ending == POS.Verb:
         return True
 
-    n = index + 1
-    while n <= last:
-        entry = morpheme_list.get(n)
-        if entry:
-            pos = entry.part_of_speech
-            if pos == POS.Verb or pos == POS.SubstantiveVerb: return True
-        n += 1
-    return False
+    return morpheme_list.summary_after(index) & VERBAL != 0
 # check_adverbial_prefix
 
 def check_prepositional_prefix(index, morpheme_list):
@@ -355,19 +310,63 @@ def check_prepositional_prefix(index, morpheme_list):
        (type_of_ending == POS.Adjective or type_of_ending == POS.Adverb):
         return True
 
-    n = index + 1
-    while n <= last:
-        entry = morpheme_list.get(n)
-        if entry:
-            pos = entry.part_of_speech
-            if pos == POS.Verb or pos == POS.SubstantiveVerb:
-                return True
-        n += 1
-    return False
+    return morpheme_list.summary_after(index) & VERBAL != 0
 
 # check_prepositional_prefix
 
 
+# The rule of each prefix. See also literumilo_rules.py.
+PREFIX_RULES = {
+    "al": check_prepositional_prefix,
+    "anstataŭ": check_first,
+    "antaŭ": check_first,
+    "apud": check_prepositional_prefix,
+    "bo": check_bo,
+    "cis": check_cis,
+    "ĉe": check_prepositional_prefix,
+    "ĉi": check_cxi,
+    "ĉirkaŭ": check_first,
+    "de": check_prepositional_prefix,
+    "dis": check_adverbial_prefix,
+    "dum": check_prepositional_prefix,
+    "ek": check_adverbial_prefix,
+    "eks": check_eks,
+    "ekster": check_first,
+    "el": check_prepositional_prefix,
+    "en": check_prepositional_prefix,
+    "for": check_adverbial_prefix,
+    "ge": check_ge,
+    "ĝis": check_prepositional_prefix,
+    "inter": check_first,
+    "kontraŭ": check_first,
+    "krom": check_first,
+    "kun": check_kun,
+    "laŭ": check_prepositional_prefix,
+    "mal": check_mal,
+    "mis": check_adverbial_prefix,
+    "ne": check_ne,
+    "per": check_prepositional_prefix,
+    "pli": check_adverbial_prefix,
+    "po": check_po,
+    "por": check_prepositional_prefix,
+    "post": check_prepositional_prefix,
+    "pra": check_pra,
+    "preter": check_prepositional_prefix,
+    "pri": check_prepositional_prefix,
+    "pro": check_prepositional_prefix,
+    "pseŭdo": check_pseuxdo,
+    "re": check_adverbial_prefix,
+    "retro": check_first,
+    "sen": check_sen,
+    "sin": check_sin,
+    "sub": check_sub_super_sur,
+    "super": check_sub_super_sur,
+    "sur": check_sub_super_sur,
+    "tra": check_prepositional_prefix,
+    "trans": check_prepositional_prefix,
+}
+
+
 def check_prefix(prefix, index, morpheme_list):
     """Checks synthesis of a prefix.
     Params:
@@ -386,54 +385,9 @@ def check_prefix(prefix, index, morpheme_list):
             return False
     else: return False
 
-    if prefix == "al": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "anstataŭ": return check_first(index, morpheme_list)
-    if prefix == "antaŭ": return check_first(index, morpheme_list)
-    if prefix == "apud": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "bo": return check_bo(index, morpheme_list)
-    if prefix == "cis": return check_cis(index, morpheme_list)
-    if prefix == "ĉe": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "ĉi": return check_cxi(index, morpheme_list)
-    if prefix == "ĉirkaŭ": return check_first(index, morpheme_list)
-    if prefix == "de": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "dis": return check_adverbial_prefix(index, morpheme_list)
-    if prefix == "dum": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "ek": return check_adverbial_prefix(index, morpheme_list)
-    if prefix == "eks": return check_eks(index, morpheme_list)
-    if prefix == "ekster": return check_first(index, morpheme_list)
-    if prefix == "el": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "en": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "for": return check_adverbial_prefix(index, morpheme_list)
-    if prefix == "ge": return check_ge(index, morpheme_list)
-    if prefix == "ĝis": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "inter": return check_first(index, morpheme_list)
-    if prefix == "kontraŭ": return check_first(index, morpheme_list)
-    if prefix == "krom": return check_first(index, morpheme_list)
-    if prefix == "kun": return check_kun(index, morpheme_list)
-    if prefix == "laŭ": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "mal": return check_mal(index, morpheme_list)
-    if prefix == "mis": return check_adverbial_prefix(index, morpheme_list)
-    if prefix == "ne": return check_ne(index, morpheme_list)
-    if prefix == "per": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "pli": return check_adverbial_prefix(index, morpheme_list)
-    if prefix == "po": return check_po(index, morpheme_list)
-    if prefix == "por": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "post": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "pra": return check_pra(index, morpheme_list)
-    if prefix == "preter": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "pri": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "pro": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "pseŭdo": return check_pseuxdo(index, morpheme_list)
-    if prefix == "re": return check_adverbial_prefix(index, morpheme_list)
-    if prefix == "retro": return check_first(index, morpheme_list)
-    if prefix == "sen": return check_sen(index, morpheme_list)
-    if prefix == "sin": return check_sin(index, morpheme_list)
-    if prefix == "sub": return check_sub_super_sur(index, morpheme_list)
-    if prefix == "super": return check_sub_super_sur(index, morpheme_list)
-    if prefix == "sur": return check_sub_super_sur(index, morpheme_list)
-    if prefix == "tra": return check_prepositional_prefix(index, morpheme_list)
-    if prefix == "trans": return check_prepositional_prefix(index, morpheme_list)
-    return False
+    rule = PREFIX_RULES.get(prefix)
+    if rule is None: return False
+    return rule(index, morpheme_list)
 
 # check_prefix
 
@@ -616,12 +570,12 @@ def scan_morphemes(morpheme_list):
                 if not valid_separator(pos, index, morpheme_list): return False
         else: return False
 
-        if syn == Synthesis.Prefix:
+        if syn == _PREFIX:
             if index == last: return False  # A prefix can't be the last morpheme.
             if not check_prefix(morpheme, index, morpheme_list): return False
-        elif syn == Synthesis.Participle:
+        elif syn == _PARTICIPLE:
             if not check_participle(index, morpheme_list): return False
-        elif syn == Synthesis.Limited:
+        elif syn == _LIMITED:
             if not check_limited_synthesis(morpheme, index, morpheme_list):
                 return False
 
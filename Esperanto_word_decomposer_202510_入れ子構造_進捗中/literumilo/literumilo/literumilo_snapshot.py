@@ -0,0 +1,167 @@
+#! -*- coding: utf-8
+# literumilo_snapshot.py
+#
+# Compiled snapshots of the Esperanto dictionary (vortaro.tsv).
+#
+# Parsing vortaro.tsv takes about half a second, because every row is
+# converted with x_to_accent() and turned into dictionary entries. This
+# module stores the parsed dictionary in a binary file, keyed by the
+# SHA-256 digest of the source file, so that later processes can load it
+# in a fraction of the time. When vortaro.tsv changes, its digest changes,
+# and the snapshot is rebuilt transparently.
+#
+# Snapshots are written next to the dictionary file. If that directory is
+# not writable, a user cache directory is used instead. The location can
+# be forced with the environment variable LITERUMILO_CACHE_DIR. The name of
+# a snapshot includes a short hash of the absolute path of its source file.
+#
+# A snapshot file starts with a header line, the SHA-256 digest (hex) of the
+# rest of the file, which is the pickled data. The digest is checked before
+# the data is unpickled, so a truncated or corrupted file is rebuilt, and is
+# never given to pickle. (It does not protect against a user who can write
+# to the snapshot directory: such a user could write a matching digest.)
+#
+# Last edit date: 2026-10-16
+#
+
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Any, Callable, List, Optional
+
+# Increment this when the layout of the stored data changes
+# (for example, when EspDictEntry gets a new attribute).
+SNAPSHOT_VERSION = 6
+
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+def file_digest(path: str) -> str:
+    """Return the SHA-256 digest (hex) of the file at the given path."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _user_cache_dir() -> str:
+    """Return the per-user cache directory for literumilo."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "literumilo")
+
+
+def snapshot_dirs(source_path: str) -> List[str]:
+    """Return candidate directories for snapshots, in order of preference."""
+    env_dir = os.environ.get("LITERUMILO_CACHE_DIR")
+    if env_dir:
+        return [env_dir]
+    return [os.path.dirname(os.path.abspath(source_path)), _user_cache_dir()]
+
+
+def _snapshot_prefix(source_path: str) -> str:
+    """Start of the names of the snapshots of the given source file: its
+    base name, and a short hash of its absolute path, so that source files
+    with the same name in different directories (which may share the cache
+    directory) neither load nor remove each other's snapshots."""
+    location = os.path.abspath(source_path).encode("utf-8", "surrogateescape")
+    return "{}.{}.".format(os.path.basename(source_path), hashlib.sha256(location).hexdigest()[:8])
+
+
+def snapshot_name(source_path: str, digest: str) -> str:
+    """Name of the snapshot file for the given source file and digest."""
+    return "{}v{}.{}{}".format(_snapshot_prefix(source_path), SNAPSHOT_VERSION,
+                               digest[:16], SNAPSHOT_SUFFIX)
+
+
+def read_snapshot(source_path: str, digest: str) -> Optional[Any]:
+    """Load a snapshot for the given source file, if a valid one exists.
+    The payload is unpickled only if it matches the digest of its header.
+    Return:
+        the stored object, or None
+    """
+    name = snapshot_name(source_path, digest)
+    for directory in snapshot_dirs(source_path):
+        path = os.path.join(directory, name)
+        try:
+            with open(path, "rb") as handle:
+                header = handle.readline(128)
+                payload = handle.read()
+            if header.rstrip(b"\n").decode("ascii") != hashlib.sha256(payload).hexdigest():
+                continue
+            stored_digest, data = pickle.loads(payload)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+                ImportError, IndexError, TypeError, ValueError):
+            continue
+        if stored_digest == digest:
+            return data
+    return None
+
+
+def _remove_stale(directory: str, source_path: str, keep: str) -> None:
+    """Delete older snapshots of the same source file."""
+    prefix = _snapshot_prefix(source_path)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if name != keep and name.startswith(prefix) and name.endswith(SNAPSHOT_SUFFIX):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def write_snapshot(source_path: str, digest: str, data: Any) -> Optional[str]:
+    """Store a snapshot for the given source file: a header line with the
+    digest of the payload, then the payload. The file is written
+    atomically, so that concurrent processes never read a partial snapshot.
+    Return:
+        path of the snapshot, or None if no directory was writable
+    """
+    name = snapshot_name(source_path, digest)
+    payload = pickle.dumps((digest, data), protocol=pickle.HIGHEST_PROTOCOL)
+    header = hashlib.sha256(payload).hexdigest().encode("ascii") + b"\n"
+    for directory in snapshot_dirs(source_path):
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        except OSError:
+            continue
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(header)
+                handle.write(payload)
+            os.replace(tmp_path, os.path.join(directory, name))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            continue
+        _remove_stale(directory, source_path, name)
+        return os.path.join(directory, name)
+    return None
+
+
+def load_or_build(source_path: str, build: Callable[[str], Any],
+                  digest: Optional[str] = None) -> Any:
+    """Return the compiled form of source_path. If there is an up-to-date
+    snapshot, it is loaded. Otherwise build(source_path) is called, and its
+    result is stored for next time.
+    Params:
+        source_path - path of the source file (eg. vortaro.tsv)
+        build - function which compiles the source file
+        digest - file_digest(source_path), if the caller has it already
+    Return:
+        compiled data
+    """
+    if digest is None:
+        digest = file_digest(source_path)
+    data = read_snapshot(source_path, digest)
+    if data is None:
+        data = build(source_path)
+        write_snapshot(source_path, digest, data)
+    return data
@@ -8,6 +8,9 @@
 # on the morphemes which come before it.
 #
 # Note: Some of the functions below may modify the entries in morpheme_list.
+# The suffixes which they modify (MODIFIED_SUFFIXES) are put in the list as
+# per-analysis overlays (EntryOverlay in literumilo_entry.py), so the
+# dictionary itself is never modified.
 #
 # Author: Klivo Lendon
 # Last edit date: 2020-05-02
@@ -456,6 +459,44 @@ def check_ul(index, morpheme_list):
 
 # check_ul
 
+# The suffixes whose rules assign to the part of speech, meaning or
+# transitivity of the suffix entry. Only these need an EntryOverlay.
+MODIFIED_SUFFIXES = frozenset(("aĉ", "ad", "ec", "eg", "et", "estr"))
+
+# The rule of each suffix. See also literumilo_rules.py.
+SUFFIX_RULES = {
+    "aĉ": check_acx,
+    "ad": check_ad,
+    "aĵ": check_ajx,
+    "an": check_an,
+    "ar": check_ar,
+    "ebl": check_ebl,
+    "ec": check_ec,
+    "eg": check_eg_et,
+    "et": check_eg_et,
+    "ej": check_ej,
+    "em": check_em,
+    "end": check_end_ind,
+    "ind": check_end_ind,
+    "er": check_er,
+    "ik": check_ik_ing_ism,
+    "ing": check_ik_ing_ism,
+    "ism": check_ik_ing_ism,
+    "estr": check_estr,
+    "id": check_id,
+    "ig": check_ig_igx,
+    "iĝ": check_ig_igx,
+    "il": check_il,
+    "in": check_in,
+    "ist": check_ist,
+    "obl": check_obl_on_op,
+    "on": check_obl_on_op,
+    "op": check_obl_on_op,
+    "uj": check_uj,
+    "ul": check_ul,
+}
+
+
 def check_suffix(suffix, index, morpheme_list):
     """Checks synthesis of suffixes.
     Params:
@@ -465,33 +506,6 @@ def check_suffix(suffix, index, morpheme_list):
     Return:
         true for valid synthesis, false otherwise
     """
-    if suffix == "aĉ": return check_acx(index, morpheme_list)
-    if suffix == "ad": return check_ad(index, morpheme_list)
-    if suffix == "aĵ": return check_ajx(index, morpheme_list)
-    if suffix == "an": return check_an(index, morpheme_list)
-    if suffix == "ar": return check_ar(index, morpheme_list)
-    if suffix == "ebl": return check_ebl(index, morpheme_list)
-    if suffix == "ec": return check_ec(index, morpheme_list)
-    if suffix == "eg": return check_eg_et(index, morpheme_list)
-    if suffix == "et": return check_eg_et(index, morpheme_list)
-    if suffix == "ej": return check_ej(index, morpheme_list)
-    if suffix == "em": return check_em(index, morpheme_list)
-    if suffix == "end": return check_end_ind(index, morpheme_list)
-    if suffix == "ind": return check_end_ind(index, morpheme_list)
-    if suffix == "er": return check_er(index, morpheme_list)
-    if suffix == "ik": return check_ik_ing_ism(index, morpheme_list)
-    if suffix == "ing": return check_ik_ing_ism(index, morpheme_list)
-    if suffix == "ism": return check_ik_ing_ism(index, morpheme_list)
-    if suffix == "estr": return check_estr(index, morpheme_list)
-    if suffix == "id": return check_id(index, morpheme_list)
-    if suffix == "ig": return check_ig_igx(index, morpheme_list)
-    if suffix == "iĝ": return check_ig_igx(index, morpheme_list)
-    if suffix == "il": return check_il(index, morpheme_list)
-    if suffix == "in": return check_in(index, morpheme_list)
-    if suffix == "ist": return check_ist(index, morpheme_list)
-    if suffix == "obl": return check_obl_on_op(index, morpheme_list)
-    if suffix == "on": return check_obl_on_op(index, morpheme_list)
-    if suffix == "op": return check_obl_on_op(index, morpheme_list)
-    if suffix == "uj": return check_uj(index, morpheme_list)
-    if suffix == "ul": return check_ul(index, morpheme_list)
-    return False
+    rule = SUFFIX_RULES.get(suffix)
+    if rule is None: return False
+    return rule(index, morpheme_list)
@@ -0,0 +1,65 @@
+#! -*- coding: utf-8
+# literumilo_tokenizer.py
+#
+# Find the words of a text in bulk. A word is a run of word characters
+# (letters, hyphens and soft hyphens; see is_word_char() and
+# WORD_CHAR_RANGES in literumilo_utils.py). Instead of calling
+# is_word_char() once for every character, the words are found by a regular
+# expression whose character class is built from the same table, so the
+# scanning is done by the regex engine, in C.
+#
+# Last edit date: 2026-10-16
+#
+
+import re
+
+from .literumilo_utils import WORD_CHAR_RANGES, is_word_char
+
+
+def _character_class(ranges):
+    """Build a regular expression character class, eg. '[a-zA-Z]'."""
+    parts = []
+    for first, last in ranges:
+        if first == last:
+            parts.append(re.escape(first))
+        else:
+            parts.append("{}-{}".format(re.escape(first), re.escape(last)))
+    return "[" + "".join(parts) + "]"
+
+WORD_CHARACTERS = _character_class(WORD_CHAR_RANGES)
+WORD = re.compile(WORD_CHARACTERS + "+")
+
+
+def word_spans(text, start = 0, end = None):
+    """Find the words of a text.
+    Params:
+        text
+        start, end - the part of the text to search (end = None: to the end)
+    Return:
+        generator of (start, end) of each word, in order
+    """
+    if end is None:
+        end = len(text)
+    for match in WORD.finditer(text, start, end):
+        yield match.span()
+
+
+def trailing_word_start(text):
+    """Return the position of the word at the end of a text, which may
+    continue in the text which follows. If the text does not end with a
+    word character, return len(text). Only the characters of that word
+    are tested.
+    """
+    start = len(text)
+    while start > 0 and is_word_char(text[start - 1]):
+        start -= 1
+    return start
+
+
+def leading_word_end(text):
+    """Return the position after the word at the beginning of a text, which
+    may continue a word of the text before it. If the text does not begin
+    with a word character, return 0.
+    """
+    match = WORD.match(text)
+    return match.end() if match else 0
@@ -47,15 +47,21 @@ def accent_letter(letter):
     if letter == 'U': return 'Ŭ'
     return '?'
 
+# The word characters, as ranges of characters (first, last). is_word_char()
+# looks characters up in WORD_CHARS, the set of the characters of these
+# ranges; the tokenizer builds its regular expression from this table (see
+# literumilo_tokenizer.py).
+WORD_CHAR_RANGES = (('a', 'z'), ('A', 'Z'), ('À', 'ʯ'), ('-', '-'), ('\xad', '\xad'))
+
+WORD_CHARS = frozenset(chr(code) for first, last in WORD_CHAR_RANGES
+                       for code in range(ord(first), ord(last) + 1))
+
 def is_word_char(ch):
     """This function returns True for word characters such as 'abc',
     and False for others, such as punctuation and white space.
+    (See WORD_CHAR_RANGES.)
     """
-    if (ch >= 'a' and ch <= 'z'): return True
-    if (ch >= 'A' and ch <= 'Z'): return True
-    if (ch >= 'À' and ch <= 'ʯ'): return True
-    if (ch == '-' or ch == '­'): return True
-    return False
+    return ch in WORD_CHARS
 
 def is_hyphen(ch):
     """Returns True for hyphens (0x002D and 0x00AD); False otherwise.
@@ -145,21 +151,24 @@ def restore_capitals(original, analyzed):
     Return:
          analyzed result with original case restored
     """
-    result = ""
-    index = 0
     original_length = len(original)
+    if "." not in analyzed and len(analyzed) <= original_length:
+        return original[:len(analyzed)]   # no copy if the lengths are equal
     # Note: Sometimes a single accented capital letter becomes two codes
     # when converted to lower case. In other words, length of the analyzed
     # word is longer than the original. To avoid an 'out of range' error, when
     # restoring capitals, the index must be compared with the original length.
-    for ch in analyzed:
-        if ch == ".":
-            result += "."
+    # Each morpheme is copied from the original as one slice.
+    pieces = []
+    index = 0
+    for morpheme in analyzed.split("."):
+        end = index + len(morpheme)
+        if end <= original_length:
+            pieces.append(original[index:end])
+        elif index >= original_length:
+            pieces.append(morpheme)
         else:
-            if (index < original_length):
-                result += original[index]
-            else:
-                result += ch
-            index += 1
-    return result
+            pieces.append(original[index:] + morpheme[original_length - index:])
+        index = end
+    return ".".join(pieces)
 # end of restore_capitals
@@ -9,11 +9,38 @@
 # Last edit date: 2020-05-10
 #
 
-import unittest, os
+import unittest, asyncio, io, os, pickle, sqlite3, sys, subprocess, tempfile, threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-from ..literumilo import analyze_file
-from ..literumilo_check_word import check_word
-from ..literumilo_utils import x_to_accent
+from ..literumilo import analyze_file, analyze_string, analyze_chunks, MAX_PARTIAL_WORD
+from ..literumilo_check_word import check_word, warm_up, find_morpheme, find_morpheme_at, divide_compound, analyze_nbest, \
+                                   analyze_word, BUDGET_EXCEEDED, BACKTRACKING_STEPS
+from ..literumilo_utils import x_to_accent, restore_capitals, is_word_char
+from ..literumilo_tokenizer import WORD, word_spans, trailing_word_start, leading_word_end
+from ..literumilo_document import analyze_document
+from ..literumilo_parallel import new_pool, whitespace_chunks, analyze_parallel, default_jobs, CHUNKS_PER_WORKER
+from .. import literumilo_batch, literumilo_pejvo
+from ..literumilo_batch import analyze_directory, read_manifest, MANIFEST_NAME
+from ..literumilo_async import analyze_text_async, analyze_stream, check_word_async, set_executor, \
+                              close_executor, _executor
+from ..literumilo_load import read_dictionary, load_dictionary, get_dictionary, set_dictionary, dictionary_path
+from ..literumilo_lexicon import Lexicon, probe_prefix_matches, probe_morphemes_at
+from ..literumilo_entry import EntryOverlay, EspDictEntry, POS, Meaning
+from ..literumilo_rules import RULES, NO_RULE, SUFFIX_BITS, SIMPLE_SUFFIX_RULES, suffix_compatible, \
+                              prefix_possible
+from ..literumilo_suffix import check_ul
+from ..literumilo_scan_morphemes import check_mal
+from ..literumilo_image import LexiconImage, build_image
+from ..literumilo_snapshot import load_or_build, read_snapshot, file_digest
+from ..literumilo_lattice import Lattice, divide_word, find_division, best_divisions, \
+                                set_search_budget, search_statistics, search_steps, SearchBudgetExceeded
+from ..literumilo_ending import get_ending
+from ..literumilo_morpheme_list import MorphemeList, summary_bits
+from ..literumilo_pejvo import load_pejvo_decompositions
+from ..literumilo_cache import WordCache, cache_statistics, clear_cache, set_cache_size, lexicon_version, \
+                              cache_size_from_environment, export_cache_size, STEM_CACHE_SIZE_VARIABLE
+from ..literumilo_disk_cache import DiskCache, enable_disk_cache, disable_disk_cache, active_disk_cache
 
 FILENAME = "test.txt"
 
@@ -73,4 +100,711 @@ class TestLiterumilo(unittest.TestCase):
         result = analyze_file(file_path, True)
         self.assertTrue("mis.liter.um.it.a" in result)
 
+        # Written piece by piece to a file.
+        with tempfile.TemporaryFile("w+") as output:
+            self.assertIsNone(analyze_file(file_path, True, output))
+            output.seek(0)
+            self.assertEqual(output.read(), result)
+
     # end of test_check_word()
+
+    def test_analyze_chunks(self):
+
+        text = "Birdoj kaj hundoj. Hundqkatoj, birdoj, hundqkatoj, mis-literumita fin\xadaĵo"
+        expected = analyze_string(text, True)
+        self.assertEqual(expected, "Bird.oj kaj hund.oj. Hundqkatoj, bird.oj, hundqkatoj, "
+                                   "mis.liter.um.it.a fin.aĵ.o")
+        # Words are cut by the ends of the chunks.
+        for size in (1, 2, 3, 7, 100):
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            self.assertEqual("".join(analyze_chunks(chunks, True)), expected)
+            self.assertEqual("".join(analyze_chunks(chunks, False)), "Hundqkatoj\nhundqkatoj\n")
+        self.assertEqual(list(analyze_chunks([], True)), [])
+
+        # A run of letters longer than MAX_PARTIAL_WORD is not kept: it is
+        # output unchanged, counted once as a misspelled word, and the
+        # text which follows it is analyzed as before.
+        overlong = "a" * (3 * MAX_PARTIAL_WORD)
+        text = "La hundo " + overlong + " kaj la kato."
+        chunks = [text[i:i + 10] for i in range(0, len(text), 10)]
+        counts = {}
+        self.assertEqual("".join(analyze_chunks(chunks, True, counts)),
+                         "La hund.o " + overlong + " kaj la kat.o.")
+        self.assertEqual(counts, {"tokens": 6, "unknown": 1})
+        unknown = "".join(analyze_chunks(chunks, False))
+        self.assertEqual(unknown, overlong[:len(unknown) - 1] + "\n")
+        self.assertLessEqual(len(unknown), MAX_PARTIAL_WORD + 11)
+        self.assertEqual(leading_word_end("hundo kaj"), 5)
+        self.assertEqual(leading_word_end(" hundo"), 0)
+
+    def test_analyze_parallel(self):
+
+        text = "La hundo kaj la kato.\nLa HUNDO kaj la hundqkato, la hundqkato! Mis-literumita katqo "
+        chunks = list(whitespace_chunks(io.StringIO(text), 8))
+        self.assertEqual("".join(chunks), text)
+        self.assertTrue(all(chunk[-1].isspace() for chunk in chunks))
+        with new_pool(2) as pool:
+            for mode in (True, False):
+                result = "".join(analyze_parallel(whitespace_chunks(io.StringIO(text), 8), mode, pool, 2))
+                self.assertEqual(result, analyze_string(text, mode))
+        script_path = os.path.abspath(os.path.dirname(__file__))
+        file_path = os.path.join(script_path, FILENAME)
+        self.assertEqual(analyze_file(file_path, True, jobs = 2), analyze_file(file_path, True))
+
+    def test_analyze_async(self):
+
+        text = "La hundo kaj la kato.\nLa ĈEVALO kaj la hundqkato, la hundqkato! Mis-literumita katqo "
+
+        class Reader:    # gives a few bytes at a time, and counts the reads
+            def __init__(self, data):
+                self.data, self.reads = data, 0
+            async def read(self, size):
+                self.reads += 1
+                block, self.data = self.data[:size], self.data[size:]
+                return block
+
+        async def analyze(executor):
+            for mode in (True, False):
+                expected = analyze_string(text, mode)
+                self.assertEqual(await analyze_text_async(text, mode, executor), expected)
+                for data in (text, text.encode("utf-8")):
+                    pieces = [piece async for piece in analyze_stream(Reader(data), mode, executor, 5)]
+                    self.assertEqual("".join(pieces), expected)
+            self.assertEqual((await check_word_async("hundoj", executor)).word, "hund.oj")
+            # A consumer which stops early: the reader is not read to the end.
+            reader = Reader(text * 100)
+            stream = analyze_stream(reader, True, executor, 10)
+            async for piece in stream:
+                break
+            await stream.aclose()
+            self.assertLess(reader.reads, 20)
+
+        asyncio.run(analyze("inline"))
+        # The window of a given executor comes from 'jobs', not from its internals.
+        with ThreadPoolExecutor(max_workers = 1) as pool:
+            self.assertEqual(_executor(pool, 3), (pool, 3 * CHUNKS_PER_WORKER))
+            self.assertEqual(_executor(pool), (pool, default_jobs() * CHUNKS_PER_WORKER))
+            asyncio.run(analyze(pool))
+        try:
+            set_executor("thread", 2)
+            asyncio.run(analyze(None))
+        finally:
+            set_executor()
+        with self.assertRaises(ValueError):
+            set_executor("fiber")
+        close_executor()
+
+    def test_analyze_directory(self):
+
+        # Files are skipped only when the manifest records the data files
+        # which analyzed them, so the data is loaded unmodified from them.
+        self.addCleanup(set_dictionary, get_dictionary())
+        set_dictionary(load_dictionary())
+        literumilo_pejvo._clear_cache()
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "source")
+            target = os.path.join(tmp, "target")
+            os.makedirs(os.path.join(source, "sub"))
+            texts = {"a.txt": "La hundo kaj la kato.\n", os.path.join("sub", "b.txt"): "La hundqkato!\n"}
+            for name, text in texts.items():
+                with open(os.path.join(source, name), "w", encoding = "utf-8") as file:
+                    file.write(text)
+            manifest = analyze_directory(source, target, jobs = 1)
+            self.assertEqual((manifest["analyzed"], manifest["skipped"]), (2, 0))
+            for name, text in texts.items():
+                with open(os.path.join(target, name), encoding = "utf-8") as file:
+                    self.assertEqual(file.read(), analyze_string(text, True))
+            entry = manifest["files"][os.path.join("sub", "b.txt")]
+            self.assertEqual((entry["tokens"], entry["unknown"]), (2, 1))
+            self.assertTrue(os.path.exists(os.path.join(target, MANIFEST_NAME)))
+            # Unchanged files are skipped; a changed file is analyzed again.
+            manifest = analyze_directory(source, target, jobs = 1)
+            self.assertIsNotNone(manifest["lexicon"])
+            self.assertEqual((manifest["analyzed"], manifest["skipped"]), (0, 2))
+            with open(os.path.join(source, "a.txt"), "a", encoding = "utf-8") as file:
+                file.write("Katqo.\n")
+            manifest = analyze_directory(os.path.join(source, "**", "*.txt"), target, jobs = 1)
+            self.assertEqual(manifest["files"]["a.txt"]["unknown"], 1)
+            self.assertEqual((manifest["analyzed"], manifest["skipped"]), (1, 1))
+            # The spell checker's outputs are not those of the analyzer.
+            manifest = analyze_directory(source, target, mode = False, jobs = 1)
+            self.assertEqual(manifest["analyzed"], 2)
+            with self.assertRaises(ValueError):
+                analyze_directory(source, source)
+            # A file which is not UTF-8 fails, and leaves no partial output.
+            with open(os.path.join(source, "c.txt"), "wb") as file:
+                file.write(b"La hundo \xff\n")
+            manifest = analyze_directory(source, target, jobs = 1)
+            self.assertIn("error", manifest["files"]["c.txt"])
+            self.assertFalse(os.path.exists(os.path.join(target, "c.txt.tmp")))
+            # If the batch itself fails, the manifest is still written.
+            def crash(path, output, mode):
+                raise RuntimeError("the worker died")
+            os.remove(os.path.join(target, MANIFEST_NAME))
+            original, literumilo_batch.analyze_batch_file = literumilo_batch.analyze_batch_file, crash
+            try:
+                with self.assertRaises(RuntimeError):
+                    analyze_directory(source, target, jobs = 1)
+            finally:
+                literumilo_batch.analyze_batch_file = original
+            manifest = read_manifest(os.path.join(target, MANIFEST_NAME))
+            self.assertEqual((manifest["analyzed"], manifest["failed"]), (0, 0))
+
+    def test_analyze_document(self):
+
+        text = "La hundo kaj la kato. La HUNDO kaj la hundqkato, la hundqkato!"
+        document = analyze_document(text)
+        self.assertEqual(document.text, analyze_string(text, True))
+        self.assertEqual((document.tokens, document.types), (12, 7))
+        self.assertAlmostEqual(document.type_token_ratio, 7 / 12)
+        self.assertIsNone(document.saved_seconds)    # not measured by default
+        self.assertGreaterEqual(analyze_document(text, measure = True).saved_seconds, 0.0)
+        self.assertEqual(analyze_document(text, False).text, "hundqkato\n")
+        self.assertEqual(analyze_document(" ").text, " ")
+
+    def test_tokenizer(self):
+
+        # The regular expression accepts the same characters as is_word_char().
+        for code in range(0x3000):
+            ch = chr(code)
+            self.assertEqual(WORD.fullmatch(ch) is not None, is_word_char(ch), hex(code))
+        text = "Ĉu mis-literumita fin\xadaĵo? -- Jes!"
+        self.assertEqual([text[start:end] for start, end in word_spans(text)],
+                         ["Ĉu", "mis-literumita", "fin\xadaĵo", "--", "Jes"])
+        self.assertEqual(list(word_spans(text, 3, 6)), [(3, 6)])
+        self.assertEqual(trailing_word_start("la hund"), 3)
+        self.assertEqual(trailing_word_start("la hundo "), 9)
+        self.assertEqual(trailing_word_start(""), 0)
+
+    def test_snapshot_rebuild(self):
+
+        builds = []
+        def build(path):
+            builds.append(path)
+            return read_dictionary(path)
+
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+             mock.patch.dict(os.environ, {"LITERUMILO_CACHE_DIR": tmp_dir}):
+            tsv_path = os.path.join(tmp_dir, "vortaro.tsv")
+            with open(tsv_path, "w") as fout:
+                fout.write("hund\tSUBST\tMAMULO\tN\tN\tKF\tNLM\t0\tR\n")
+
+            first = load_or_build(tsv_path, build)
+            second = load_or_build(tsv_path, build)
+            self.assertEqual(len(builds), 1)
+            self.assertEqual(second["hund"].morpheme, "hund")
+            self.assertEqual(list(first), list(second))
+
+            with open(tsv_path, "a") as fout:
+                fout.write("kat\tSUBST\tMAMULO\tN\tN\tKF\tNLM\t0\tR\n")
+            third = load_or_build(tsv_path, build)
+            self.assertEqual(len(builds), 2)
+            self.assertTrue("kat" in third)
+            snapshots = [name for name in os.listdir(tmp_dir) if name.endswith(".snapshot")]
+            self.assertEqual(len(snapshots), 1)
+
+            # A corrupted snapshot does not match the digest of its header,
+            # so it is rebuilt without being unpickled.
+            snapshot_path = os.path.join(tmp_dir, snapshots[0])
+            with open(snapshot_path, "r+b") as handle:
+                handle.seek(-1, os.SEEK_END)
+                last = handle.read(1)
+                handle.seek(-1, os.SEEK_END)
+                handle.write(bytes([last[0] ^ 1]))
+            with mock.patch("pickle.loads", side_effect = AssertionError("unpickled")):
+                self.assertIsNone(read_snapshot(tsv_path, file_digest(tsv_path)))
+            self.assertTrue("kat" in load_or_build(tsv_path, build))
+            self.assertEqual(len(builds), 3)
+
+            # A source file with the same name in another directory has
+            # its own snapshot, and does not remove the first one.
+            other_dir = os.path.join(tmp_dir, "other")
+            os.mkdir(other_dir)
+            other_path = os.path.join(other_dir, "vortaro.tsv")
+            with open(other_path, "w") as fout:
+                fout.write("bird\tSUBST\tMAMULO\tN\tN\tKF\tNLM\t0\tR\n")
+            self.assertTrue("bird" in load_or_build(other_path, build))
+            self.assertEqual(len(builds), 4)
+            snapshots = [name for name in os.listdir(tmp_dir) if name.endswith(".snapshot")]
+            self.assertEqual(len(snapshots), 2)
+            self.assertTrue("kat" in load_or_build(tsv_path, build))
+            self.assertTrue("bird" in load_or_build(other_path, build))
+            self.assertEqual(len(builds), 4)
+
+    def test_lazy_loading(self):
+
+        # Importing the package must not load the dictionary.
+        package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        code = ("import literumilo; from literumilo import literumilo_load; "
+                "print(literumilo_load.is_dictionary_loaded())")
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=package_root)
+        self.assertEqual(output.strip(), b"False")
+
+        warm_up()
+        dictionaries = []
+        threads = [threading.Thread(target=lambda: dictionaries.append(get_dictionary()))
+                   for _ in range(8)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertTrue(all(d is dictionaries[0] for d in dictionaries))
+
+    def test_lexicon_columns(self):
+
+        entries = read_dictionary(dictionary_path())
+        lexicon = pickle.loads(pickle.dumps(Lexicon.from_entries(entries)))
+        self.assertEqual(len(lexicon), len(entries))
+        attributes = ("morpheme", "length", "capitalization", "part_of_speech", "meaning",
+                      "transitivity", "without_ending", "with_ending", "synthesis",
+                      "rarity", "flag")
+        for key, entry in entries.items():
+            view = lexicon.get(key)
+            for attribute in attributes:
+                self.assertEqual(getattr(view, attribute), getattr(entry, attribute),
+                                 msg="{} {}".format(key, attribute))
+        self.assertIsNone(lexicon.get("xyzzy"))
+        self.assertLess(lexicon.memory_usage(), 3_000_000)
+
+        # Affixes know their synthesis rule.
+        self.assertIs(RULES[lexicon.get("ul").rule], check_ul)
+        self.assertIs(RULES[lexicon.get("mal").rule], check_mal)
+        self.assertEqual(lexicon.get("hund").rule, NO_RULE)
+
+    def test_prefix_matches(self):
+
+        lexicon = get_dictionary()
+        for word in ("malsanulejestr", "ĉirkaŭir", "aerodinamik", "fingromontr"):
+            for start in range(len(word)):
+                for max_length in (len(word) - start - 2, len(word) - start):
+                    trie = [(end, e.morpheme) for end, e in
+                            lexicon.prefix_matches(word, start, 2, max_length)]
+                    probe = [(end, e.morpheme) for end, e in
+                             probe_prefix_matches(lexicon, word, start, 2, max_length)]
+                    self.assertEqual(trie, probe, msg="{} {}".format(word, start))
+                    trie = [(length, e.morpheme) for length, e in
+                            lexicon.morphemes_at(word, start, max_length) if length >= 2]
+                    probe = [(length, e.morpheme) for length, e in
+                             probe_morphemes_at(lexicon, word, start, max_length, 2)]
+                    self.assertEqual(trie, probe, msg="{} {}".format(word, start))
+        ends = [end for end, e in lexicon.prefix_matches("malsanulejestr", 0, 2, 12)]
+        self.assertEqual(ends, sorted(ends, reverse = True))
+
+    def test_full_forms(self):
+
+        lexicon = get_dictionary()
+        self.assertEqual(lexicon.full_form("hundojn"), ("hund.ojn", False))
+        self.assertEqual(lexicon.full_form("estas"), ("est.as", True))
+        self.assertEqual(lexicon.full_form("kaj"), ("kaj", True))
+        self.assertEqual(lexicon.full_form("kanado")[0], "Kanad.o")
+        for word in ("hundx", "hund", "ĉiutage", "vin", ""):
+            self.assertIsNone(lexicon.full_form(word))
+        # The table gives the same results as the full analysis.
+        plain = dict(lexicon.items())     # a dictionary without full forms
+        for word in ("hundojn", "estas", "kaj", "kanado", "esperanto", "lian", "hundx"):
+            self.assertEqual(analyze_word(word, lexicon), analyze_word(word, plain))
+
+    def test_suffix_matrix(self):
+
+        # The compatibility matrix gives the same answers as the simple suffix rules.
+        lexicon = get_dictionary()
+        simple = [(rule, bit) for rule, bit in zip(RULES, SUFFIX_BITS) if bit]
+        self.assertEqual(len(simple), len(SIMPLE_SUFFIX_RULES))
+        morpheme_list = MorphemeList(get_ending("o"))
+        for previous in lexicon.values()[::7] + [EntryOverlay(lexicon["hund"])]:
+            morpheme_list.put(0, previous)
+            for rule, bit in simple:
+                self.assertEqual(suffix_compatible(bit, 1, previous), rule(1, morpheme_list),
+                                 msg="{} {}".format(previous.morpheme, rule.__name__))
+                self.assertEqual(suffix_compatible(bit, 0, None), rule(0, morpheme_list))
+
+    def test_morpheme_summary(self):
+
+        # The summary of a morpheme list follows put(), including a shorter list.
+        lexicon = get_dictionary()
+        morpheme_list = MorphemeList(get_ending("vorto"))
+        for morphemes in (["mal", "san", "ul", "ej", "estr"], ["ne", "kred", "ebl"], ["mal", "bon", "a", "kor"]):
+            for index, morpheme in enumerate(morphemes):
+                morpheme_list.put(index, EspDictEntry.new_separator(morpheme) if morpheme == "a"
+                                  else lexicon[morpheme])
+                for position in range(index + 1):
+                    expected = 0
+                    for following in morpheme_list.morphemes[position + 1:index + 1]:
+                        expected |= summary_bits(following)
+                    self.assertEqual(morpheme_list.summary_after(position), expected)
+                separators = sum(1 for entry in morpheme_list.morphemes[:index + 1]
+                                 if entry.flag == "separator")
+                self.assertEqual(morpheme_list.count_separators(), separators)
+        self.assertEqual(morpheme_list.count_separators(), 1)
+        self.assertTrue(check_mal(0, morpheme_list))
+
+    def test_lattice_division(self):
+
+        dictionary = get_dictionary()
+        words = list(load_pejvo_decompositions())[::20]
+        words += ["malsanulejestrejo", "barbarbarbarbarbarbarbaro", "ĉibarbarbarbarbaro",
+                  "hundaĉetoj", "fingromontri"]
+        compared = 0
+        for word in words:
+            ending = get_ending(word)
+            if ending is None: continue
+            stem = word[:len(word) - ending.length]
+            if stem in dictionary: continue
+            morpheme_list = MorphemeList(ending)
+            if find_morpheme(stem, dictionary, 0, morpheme_list):
+                expected = morpheme_list.display_form()
+            else:
+                expected = None
+            division = divide_word(stem, dictionary, ending)
+            result = division.display_form() if division else None
+            self.assertEqual(result, expected, msg=word)
+            compared += 1
+        self.assertGreater(compared, 1000)
+
+        # A word which cannot be covered by morphemes fails without a search.
+        self.assertTrue(Lattice("hundkat", dictionary).finishes(0))
+        self.assertFalse(Lattice("hundqkat", dictionary).finishes(0))
+        self.assertTrue(Lattice("hundqkat", dictionary).finishes(5))
+        self.assertIsNone(divide_word("hundqkat", dictionary, get_ending("hundqkato")))
+
+        # 'mal' can only be the first morpheme, whatever follows it.
+        morpheme_list = MorphemeList(get_ending("vorto"))
+        self.assertTrue(prefix_possible(dictionary["mal"], 0, morpheme_list))
+        self.assertFalse(prefix_possible(dictionary["mal"], 1, morpheme_list))
+        self.assertTrue(prefix_possible(dictionary["dis"], 1, morpheme_list))
+
+        # The dictionary is not modified. (check_acx() sets the part of speech of aĉ.)
+        acx = dictionary.get("aĉ")
+        part_of_speech = acx.part_of_speech
+        division = divide_word("ruĝaĉ", dictionary, get_ending("ruĝaĉa"))
+        self.assertEqual(division.display_form(), "ruĝ.aĉ.a")
+        self.assertEqual(acx.part_of_speech, part_of_speech)
+        self.assertEqual(divide_compound("ruĝaĉ", dictionary, get_ending("ruĝaĉa")), "ruĝ.aĉ")
+        self.assertEqual(acx.part_of_speech, part_of_speech)
+
+        # check_word() divides by backtracking, and gives the words which
+        # take more than BACKTRACKING_STEPS calls to the lattice.
+        ending = get_ending("hundo")
+        search_statistics(reset=True)
+        self.assertEqual(divide_compound("malsanulej", dictionary, ending), "mal.san.ul.ej")
+        self.assertLessEqual(search_statistics()["max_steps"], BACKTRACKING_STEPS)
+        stem = "barbarbarbarbarbarbarbarbarq"
+        steps = search_steps(stem)
+        self.assertFalse(find_morpheme_at(stem, 0, dictionary, 0, MorphemeList(ending), steps))
+        self.assertGreater(steps.count, BACKTRACKING_STEPS)
+        search_statistics(reset=True)
+        self.assertIsNone(divide_compound(stem, dictionary, ending))
+        self.assertLess(search_statistics(reset=True)["max_steps"], BACKTRACKING_STEPS)    # the lattice
+
+    def test_analyze_nbest(self):
+
+        results = analyze_nbest("aerodinamiko", 3)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0].word, "aer.o.dinamik.o")
+        costs = [result.cost for result in results]
+        self.assertEqual(costs, sorted(costs))
+        self.assertEqual(len(set(result.word for result in results)), 3)
+
+        self.assertEqual(analyze_nbest("Kanadano", 5)[0].word, "Kanad.an.o")
+        self.assertEqual(analyze_nbest("vin", 5)[0].word, "vi.n")
+        self.assertEqual(analyze_nbest("kuraciisto", 5), [])
+        self.assertEqual(analyze_nbest("hundo", 0), [])
+
+        # The best-first search finds the cheapest divisions among very many.
+        dictionary = get_dictionary()
+        ending = get_ending("barbaro")
+        divisions = best_divisions("barbarbarbarbarbarbarbar", dictionary, ending, 10)
+        self.assertEqual(len(divisions), 10)
+        self.assertEqual([cost for cost, m in divisions], sorted(cost for cost, m in divisions))
+
+    def test_word_cache(self):
+
+        cache = WordCache(2)
+        cache.put("la", ("la", True), 1)
+        cache.put("de", ("de", True), 1)
+        self.assertEqual(cache.get("la", 1), ("la", True))
+        cache.put("kaj", ("kaj", True), 1)      # evicts 'de', the least recently used
+        self.assertIsNone(cache.get("de", 1))
+        self.assertEqual(cache.get("la", 2), None)   # new lexicon version
+        stats = cache.statistics()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertEqual((stats["evictions"], stats["invalidations"]), (1, 1))
+        self.assertEqual(stats["size"], 0)
+
+        # The cache never holds more than its capacity, and keeps a word which is used.
+        cache = WordCache(4)
+        for n in range(10):
+            cache.put(str(n), (str(n),), 1)
+            self.assertEqual(cache.get("0", 1), ("0",))
+            self.assertLessEqual(len(cache), 4)
+        self.assertEqual(cache.statistics()["evictions"], 6)
+
+        # check_word() caches the normalized word, and restores capitals.
+        clear_cache()
+        self.assertEqual(check_word("hundo").word, "hund.o")
+        self.assertEqual(check_word("HUNDO").word, "HUND.O")
+        self.assertEqual(check_word("Hun-do").word, "Hund.o")
+        stats = cache_statistics()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (2, 1, 1))
+        self.assertGreater(stats["memory"], 0)
+
+        # Replacing the dictionary empties the cache.
+        set_dictionary(get_dictionary())
+        self.assertTrue(check_word("hundo").valid)
+        self.assertEqual(cache_statistics()["invalidations"], 1)
+
+        # The inflections of a compound word share the division of its stem.
+        clear_cache()
+        self.assertEqual(check_word("birdejoj").word, "bird.ej.oj")
+        self.assertEqual(check_word("Birdejon").word, "Bird.ej.on")
+        self.assertEqual(check_word("birdeja").word, "bird.ej.a")
+        stats = cache_statistics("stems")
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+        capacity = cache_statistics()["capacity"]
+        set_cache_size(0)
+        check_word("hundo")
+        self.assertEqual(cache_statistics()["size"], 0)
+        set_cache_size(capacity)
+        clear_cache()
+
+        # The sizes can come from the environment; the command line options
+        # set them for the worker processes too.
+        stems = cache_statistics("stems")["capacity"]
+        with mock.patch.dict(os.environ, {STEM_CACHE_SIZE_VARIABLE: "123"}):
+            self.assertEqual(cache_size_from_environment(STEM_CACHE_SIZE_VARIABLE, 5), 123)
+            export_cache_size(stems = 7)
+            self.assertEqual(os.environ[STEM_CACHE_SIZE_VARIABLE], "7")
+            self.assertEqual(cache_statistics("stems")["capacity"], 7)
+        set_cache_size(capacity, stems)
+
+    def test_search_budget(self):
+
+        # A search which exceeds the budget gives an explicit status, and is not cached.
+        clear_cache()
+        search_statistics(reset=True)
+        set_search_budget(steps=1)
+        try:
+            result = check_word("Malsanulejestrejo")
+        finally:
+            set_search_budget()
+        self.assertEqual((result.word, result.valid, result.status),
+                         ("Malsanulejestrejo", False, BUDGET_EXCEEDED))
+        result = check_word("Malsanulejestrejo")
+        self.assertEqual((result.valid, result.status), (True, "valid"))
+        self.assertEqual(check_word("hundqkato").status, "invalid")
+        statistics = search_statistics()
+        self.assertEqual((statistics["searches"], statistics["exceeded"]), (3, 1))
+        self.assertEqual(sum(statistics["histogram"].values()), 3)
+        self.assertEqual(statistics["steps"], 10000)
+        clear_cache()
+
+        # best_divisions() counts the states which it expands, and analyze_nbest()
+        # keeps the candidates which need no search when the budget is exceeded.
+        stem, ending = "malsanulejestrej", get_ending("malsanulejestrejo")
+        search_statistics(reset=True)
+        divisions = best_divisions(stem, get_dictionary(), ending, 5)
+        statistics = search_statistics()
+        self.assertEqual(statistics["searches"], 1)
+        self.assertGreater(statistics["max_steps"], len(stem) + len(divisions))
+        set_search_budget(steps=statistics["max_steps"] - 1)
+        try:
+            with self.assertRaises(SearchBudgetExceeded):
+                best_divisions(stem, get_dictionary(), ending, 5)
+            set_search_budget(steps=1)
+            self.assertEqual(analyze_nbest("hundqkato"), [])
+            self.assertEqual([a.word for a in analyze_nbest("hundo")], ["hund.o"])
+        finally:
+            set_search_budget()
+        self.assertEqual(search_statistics()["exceeded"], 3)
+
+        # Every thread records its own searches; statistics() adds them up.
+        search_statistics(reset=True)
+        with ThreadPoolExecutor(4) as pool:
+            divisions = list(pool.map(lambda _: divide_compound(stem, get_dictionary(), ending),
+                                      range(40)))
+        self.assertEqual(set(divisions), {"mal.san.ul.ej.estr.ej"})
+        statistics = search_statistics(reset=True)
+        self.assertEqual((statistics["searches"], sum(statistics["histogram"].values())), (40, 40))
+        self.assertEqual(search_statistics()["searches"], 0)
+
+    def test_plain_dictionary(self):
+
+        # Any mapping of entries can replace the dictionary. It has no trie, so
+        # the morphemes of a compound word are found by probing substrings.
+        lexicon = get_dictionary()
+        words = ["malsanulejo", "barbarbarbarbarbarbarbarbaro", "hundqkato"]
+        expected = [check_word(word).word for word in words]
+        nbest = [analysis.word for analysis in analyze_nbest("malsanulejo")]
+        set_dictionary(dict(lexicon.items()))
+        try:
+            self.assertEqual([check_word(word).word for word in words], expected)
+            self.assertEqual([analysis.word for analysis in analyze_nbest("malsanulejo")], nbest)
+            morpheme_list = MorphemeList(get_ending("malsanulejo"))
+            self.assertTrue(find_morpheme("malsanulej", get_dictionary(), 0, morpheme_list))
+            self.assertEqual(morpheme_list.display_form(), "mal.san.ul.ej.o")
+        finally:
+            set_dictionary(lexicon)
+        clear_cache()
+
+    def test_analysis_context(self):
+
+        # The separators are shared, and the search context is reused from word to word.
+        self.assertIs(EspDictEntry.new_separator("o"), EspDictEntry.new_separator("o"))
+        self.assertIsNone(EspDictEntry.new_separator("i"))
+        dictionary = get_dictionary()
+        stems = (("malsanulejestr", "o"), ("hundqkat", "o"), ("ruĝaĉ", "a"), ("fingromontr", "i"))
+        first = [divide_word(stem, dictionary, get_ending(stem + ending)) for stem, ending in stems]
+        for (stem, ending), division in zip(stems, first):
+            found = find_division(stem, dictionary, get_ending(stem + ending))
+            self.assertEqual(found and ".".join(entry.morpheme for entry in found),
+                             division and division.stem_form())
+        self.assertEqual([d and d.display_form() for d in first],
+                         ["mal.san.ul.ej.estr.o", None, "ruĝ.aĉ.a", "fingr.o.montr.i"])
+
+        # Capitals are restored when the word is read.
+        self.assertEqual(check_word("MALSANULEJESTREJO").word, "MAL.SAN.UL.EJ.ESTR.EJ.O")
+        self.assertEqual(restore_capitals("Hundoj", "hund.oj"), "Hund.oj")
+        self.assertEqual(restore_capitals("Ab", "a.bc"), "A.bc")
+
+    def test_disk_cache(self):
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "analyses.sqlite3")
+            try:
+                disk_cache = enable_disk_cache(path)
+                clear_cache()
+                self.assertEqual(check_word("Birdojn").word, "Bird.ojn")
+                self.assertEqual(disk_cache.statistics()["misses"], 1)
+                disable_disk_cache()
+
+                # A new run finds the analysis in the database.
+                disk_cache = enable_disk_cache(path)
+                clear_cache()
+                self.assertEqual(check_word("birdojn").word, "bird.ojn")
+                self.assertEqual(disk_cache.statistics()["hits"], 1)
+                self.assertEqual(len(disk_cache), 1)
+
+                # It is bypassed when the dictionary is modified.
+                lexicon = get_dictionary()
+                modified = Lexicon.from_entries(lexicon)
+                modified["bird"] = lexicon["bird"]
+                set_dictionary(modified)
+                self.assertIsNone(active_disk_cache(lexicon_version()))
+                set_dictionary(lexicon)
+                disable_disk_cache()
+
+                # Rows from other versions of the sources are deleted.
+                self.assertEqual(len(DiskCache(path, "another key")), 0)
+
+                # A batch made from older data is not written after another
+                # process has replaced the key, and the cache is no longer used.
+                older = DiskCache(path, "older key")
+                older.put("hundoj", ("hund.oj", True))
+                newer = DiskCache(path, "newer key")
+                older.flush()
+                self.assertEqual(older.statistics()["dropped"], 1)
+                self.assertFalse(older.usable(lexicon_version()))
+                self.assertIsNone(newer.get("hundoj"))
+                older.close()
+                newer.close()
+
+                # While another connection holds the write lock, a batch is
+                # kept in memory, and written by the next flush.
+                locked = DiskCache(path, "locked key", timeout = 0.05)
+                locked.put("katoj", ("kat.oj", True))
+                blocker = sqlite3.connect(path)
+                blocker.execute("BEGIN EXCLUSIVE")
+                try:
+                    locked.flush()
+                finally:
+                    blocker.rollback()
+                    blocker.close()
+                statistics = locked.statistics()
+                self.assertEqual((statistics["errors"], statistics["pending"],
+                                  statistics["writes"]), (1, 1, 0))
+                locked.flush()
+                statistics = locked.statistics()
+                self.assertEqual((statistics["pending"], statistics["writes"]), (0, 1))
+                self.assertEqual(locked.get("katoj"), ("kat.oj", True))
+                locked.close()
+            finally:
+                disable_disk_cache()
+
+    def test_thread_safety(self):
+
+        # The dictionary is frozen, and its entries are read-only.
+        lexicon = get_dictionary()
+        self.assertTrue(lexicon.frozen)
+        with self.assertRaises(TypeError):
+            lexicon["hund"] = lexicon["hund"]
+        # A copy can be modified; the dictionary is unchanged.
+        copy = lexicon.copy()
+        self.assertFalse(copy.frozen)
+        self.assertEqual(len(copy), len(lexicon))
+        copy["hundq"] = lexicon["hund"]
+        self.assertEqual(copy["hundq"].morpheme, "hund")
+        self.assertEqual(copy.full_form("hundqoj"), ("hund.oj", False))
+        self.assertNotIn("hundq", lexicon)
+        acx = lexicon["aĉ"]
+        with self.assertRaises(AttributeError):
+            acx.part_of_speech = POS.Adjective
+        overlay = EntryOverlay(acx)
+        overlay.part_of_speech = POS.Adjective
+        overlay.meaning = Meaning.PERSONO
+        self.assertEqual((overlay.part_of_speech, overlay.meaning), (POS.Adjective, Meaning.PERSONO))
+        self.assertEqual((overlay.morpheme, overlay.synthesis), (acx.morpheme, acx.synthesis))
+        self.assertEqual(acx.part_of_speech, POS.Suffix)
+
+        def legacy_division(word):
+            ending = get_ending(word)
+            if ending is None: return None
+            morpheme_list = MorphemeList(ending)
+            if find_morpheme_at(word[:len(word) - ending.length], 0, lexicon, 0, morpheme_list):
+                return morpheme_list.display_form()
+            return None
+
+        def analyze(words):
+            return [(check_word(word).word, legacy_division(word)) for word in words]
+
+        words = list(load_pejvo_decompositions())[::40]
+        words += ["ruĝaĉa", "hundaĉetoj", "malsanulejestrejo", "lernejestro", "fiŝaĵo"]
+        clear_cache()
+        expected = analyze(words)
+        columns = [bytes(column) for column in lexicon._columns()]
+
+        # Threads analyze the words at the same time, each in another order.
+        results = {}
+        def worker(number):
+            order = words[number:] + words[:number]
+            results[number] = dict(zip(order, analyze(order)))
+        clear_cache()
+        threads = [threading.Thread(target=worker, args=(n * 97,)) for n in range(8)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual(len(results), 8)
+        for result in results.values():
+            self.assertEqual([result[word] for word in words], expected)
+        self.assertEqual([bytes(column) for column in lexicon._columns()], columns)
+
+    def test_lexicon_image(self):
+
+        lexicon = get_dictionary()
+        pejvo_map = {"aviadanto": "aviad.ant.o", "ĉiutage": "ĉiu.tag.e"}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            image_path = os.path.join(tmp_dir, "lexicon.img")
+            build_image(image_path, lexicon, pejvo_map, "vortaro", "pejvo")
+            # The image is unmapped before its directory is deleted.
+            with LexiconImage(image_path) as image:
+                mapped = image.lexicon
+                self.assertEqual(len(mapped), len(lexicon))
+                for key in ("hund", "ĉirkaŭ", "aĉ", "n-roj", "ul"):
+                    self.assertEqual(mapped[key].morpheme, lexicon[key].morpheme)
+                    self.assertEqual(mapped[key].meaning, lexicon[key].meaning)
+                    self.assertEqual(mapped[key].synthesis, lexicon[key].synthesis)
+                    self.assertEqual(mapped[key].rule, lexicon[key].rule)
+                self.assertIsNone(mapped.get("xyzzy"))
+                self.assertEqual(mapped.full_form("hundojn"), lexicon.full_form("hundojn"))
+                self.assertIsNone(mapped.full_form("hundx"))
+                self.assertFalse("xyzzy" in mapped)
+                self.assertEqual(set(mapped), set(lexicon))
+                self.assertEqual(image.pejvo.get("ĉiutage"), "ĉiu.tag.e")
+                self.assertIsNone(image.pejvo.get("hundo"))
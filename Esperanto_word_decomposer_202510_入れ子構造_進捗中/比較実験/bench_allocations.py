@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the memory which check_word() allocates per word, with tracemalloc.
+
+For each word, the script records the peak of traced memory during the call,
+above the memory traced before it (the result is included). The words are:
+
+1. cached: the words of the example sentences, with a warm word cache
+   (the usual case in a long text),
+2. uncached: the same words, with the word and stem caches disabled
+   (set_cache_size(0, 0)), so that every word is analyzed,
+3. compound: the compound words of PEJVO, uncached.
+
+The time per word (best of 3, without tracemalloc) is also given.
+
+To compare with another version, give the directory which contains its
+literumilo package, eg. a worktree of an earlier commit:
+  git worktree add /tmp/before <commit>
+  python 比較実験/bench_allocations.py /tmp/before/<...>/literumilo
+
+Usage:
+  python 比較実験/bench_allocations.py [directory of the package]
+"""
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = Path(sys.argv[1]).resolve() if len(sys.argv) > 1 else ROOT / 'literumilo'
+sys.path.insert(0, str(PACKAGE))
+from literumilo import check_word, clear_cache, set_cache_size, warm_up  # type: ignore
+from literumilo.literumilo_cache import DEFAULT_CACHE_SIZE, DEFAULT_STEM_CACHE_SIZE  # type: ignore
+from literumilo.literumilo_ending import get_ending  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+from literumilo.literumilo_utils import is_word_char  # type: ignore
+
+TEXT = ROOT / 'エスペラント例文(語根分解精度のチェックに用いる).txt'
+REPEAT = 3
+
+
+def text_words() -> list[str]:
+    words = []
+    collected = []
+    for ch in TEXT.read_text(encoding='utf-8') + ' ':
+        if is_word_char(ch):
+            collected.append(ch)
+        elif collected:
+            words.append(''.join(collected))
+            collected = []
+    return words
+
+
+def compound_words() -> list[str]:
+    dictionary = get_dictionary()
+    words = []
+    for word in load_pejvo_decompositions():
+        word = word.replace('-', '')
+        ending = get_ending(word)
+        if ending is not None and word[:len(word) - ending.length] not in dictionary:
+            words.append(word)
+    return words
+
+
+def measure(words: list[str]) -> tuple[float, int]:
+    """Return the mean and the maximum peak, in bytes."""
+    peaks = 0
+    largest = 0
+    tracemalloc.start()
+    try:
+        for word in words:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            result = check_word(word)
+            peak = tracemalloc.get_traced_memory()[1] - current
+            peaks += peak
+            largest = max(largest, peak)
+            del result
+    finally:
+        tracemalloc.stop()
+    return peaks / len(words), largest
+
+
+def timing(words: list[str]) -> float:
+    best = None
+    for _ in range(REPEAT):
+        began = time.perf_counter()
+        for word in words:
+            check_word(word)
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6 / len(words)
+
+
+def main() -> int:
+    warm_up()
+    words = text_words()
+    compounds = compound_words()
+    print(f'package: {PACKAGE}')
+    print(f'{"words":22}{"peak B":>9}{"max B":>9}{"us/word":>9}')
+    for name, cases, cached in (('cached', words, True), ('uncached', words, False),
+                                ('compound', compounds, False)):
+        if cached:
+            set_cache_size(DEFAULT_CACHE_SIZE, DEFAULT_STEM_CACHE_SIZE)
+            for word in cases:
+                check_word(word)
+        else:
+            set_cache_size(0, 0)
+            clear_cache()
+        us = timing(cases)
+        mean_peak, largest = measure(cases)
+        print(f'{name + " (" + str(len(cases)) + ")":22}{mean_peak:>9.0f}{largest:>9,}{us:>9.2f}')
+    set_cache_size(DEFAULT_CACHE_SIZE, DEFAULT_STEM_CACHE_SIZE)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
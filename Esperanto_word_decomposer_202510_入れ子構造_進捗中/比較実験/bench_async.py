@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the async functions (literumilo_async.py): how long the event loop
+is blocked, and how far the input is read ahead of a slow consumer.
+
+1. Latency. The text (比較実験/wiki_esperanto.txt, repeated) is divided into
+   morphemes while a heartbeat task sleeps 1 ms in a loop. The script
+   reports the total time and the delays of the heartbeat (p50, p99 and
+   maximum, in ms) when analyze_string() is called in a coroutine
+   (blocking), and when analyze_text_async() is used with each executor.
+   The word caches are cleared before each run. The results must be
+   identical to that of analyze_string().
+
+2. Backpressure. analyze_stream() reads the text in 16 KB blocks, and the
+   consumer sleeps 5 ms per piece. The script reports the maximum number
+   of blocks which were read but not yet output.
+
+Usage:
+  python 比較実験/bench_async.py [repetitions] [jobs]
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import analyze_string, clear_cache, warm_up  # type: ignore
+from literumilo.literumilo_async import analyze_stream, analyze_text_async, close_executor, set_executor  # type: ignore
+
+TEXT = ROOT / '比較実験' / 'wiki_esperanto.txt'
+BLOCK = 1 << 14
+
+
+async def heartbeat(delays: list[float]) -> None:
+    while True:
+        began = time.perf_counter()
+        await asyncio.sleep(0.001)
+        delays.append(time.perf_counter() - began - 0.001)
+
+
+async def timed(work) -> tuple[float, list[float], str]:
+    delays: list[float] = []
+    beat = asyncio.ensure_future(heartbeat(delays))
+    await asyncio.sleep(0.01)
+    began = time.perf_counter()
+    result = await work()
+    elapsed = time.perf_counter() - began
+    await asyncio.sleep(0.01)    # the heartbeat records the last delay
+    beat.cancel()
+    return elapsed, sorted(delays) or [0.0], result
+
+
+class Reader:
+    """Gives the text in blocks, and counts the characters read."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.position = 0
+
+    async def read(self, size: int) -> str:
+        block = self.text[self.position:self.position + size]
+        self.position += len(block)
+        return block
+
+
+async def backpressure(text: str) -> tuple[int, int]:
+    reader = Reader(text)
+    output = 0
+    ahead = 0
+    async for piece in analyze_stream(reader, True, chunk_size=BLOCK):
+        output += len(piece)
+        # Morpheme mode adds periods; the input consumed is at most 'output'.
+        ahead = max(ahead, reader.position - min(output, reader.position))
+        await asyncio.sleep(0.005)
+    return ahead, output
+
+
+async def run(text: str, jobs: int | None) -> int:
+    expected = analyze_string(text, True)
+    differences = 0
+    print(f'characters: {len(text):,}')
+    print(f'{"":10}{"seconds":>9}{"p50 ms":>8}{"p99 ms":>8}{"max ms":>8}')
+
+    async def blocking() -> str:
+        return analyze_string(text, True)
+
+    for name in ('blocking', 'inline', 'thread', 'process'):
+        if name != 'blocking':
+            set_executor(name, jobs)
+            await analyze_text_async('hundo', True)    # start the pool
+        clear_cache()
+        work = blocking if name == 'blocking' else (lambda: analyze_text_async(text, True))
+        elapsed, delays, result = await timed(work)
+        differences += result != expected
+        p50 = delays[len(delays) // 2] * 1e3
+        p99 = delays[len(delays) * 99 // 100] * 1e3
+        print(f'{name:10}{elapsed:>9.2f}{p50:>8.2f}{p99:>8.2f}{delays[-1] * 1e3:>8.1f}')
+    close_executor()
+
+    set_executor('thread', jobs)
+    ahead, output = await backpressure(text)
+    close_executor()
+    set_executor()
+    print(f'slow consumer: at most {ahead:,} characters ({ahead / BLOCK:.1f} blocks) read ahead of the output')
+    return differences
+
+
+def main() -> int:
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    warm_up()
+    text = TEXT.read_text(encoding='utf-8') * repetitions
+    differences = asyncio.run(run(text, jobs))
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure batch mode (analyze_directory(), literumilo_batch.py) against one
+process per file (python -m literumilo.literumilo -m file).
+
+比較実験/wiki_esperanto.txt is cut into small files (one paragraph group
+each, in a few subdirectories). The script reports the wall time of:
+
+1. one process per file, which loads the dictionary every time,
+2. the first batch run, which analyzes every file,
+3. a second batch run, which skips every file (nothing changed),
+4. a third run, after one file was changed.
+
+The output of each file must be identical to that of the command line
+program (which prints one more newline at the end).
+
+Usage:
+  python 比較実験/bench_batch.py [number of files] [jobs]
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo.literumilo_batch import analyze_directory  # type: ignore
+
+TEXT = ROOT / '比較実験' / 'wiki_esperanto.txt'
+
+
+def run_program(path: Path) -> str:
+    return subprocess.run([sys.executable, '-m', 'literumilo.literumilo', '-m', str(path)],
+                          cwd=ROOT / 'literumilo', check=True, capture_output=True, text=True).stdout
+
+
+def make_files(directory: Path, count: int) -> list[Path]:
+    lines = TEXT.read_text(encoding='utf-8').splitlines(keepends=True)
+    size = max(1, len(lines) // count)
+    paths = []
+    for number in range(count):
+        path = directory / f'part{number % 4}' / f'{number:04}.txt'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(''.join(lines[number * size:(number + 1) * size]) or 'vorto\n', encoding='utf-8')
+        paths.append(path)
+    return paths
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    differences = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'source'
+        target = Path(tmp) / 'target'
+        paths = make_files(source, count)
+
+        began = time.perf_counter()
+        expected = {}
+        for path in paths:
+            expected[path] = run_program(path)
+        per_process = time.perf_counter() - began
+
+        rows = [('process per file', per_process, count, 0)]
+        for name in ('batch, first run', 'batch, second run', 'batch, one changed'):
+            if name == 'batch, one changed':
+                with open(paths[0], 'a', encoding='utf-8') as file:
+                    file.write('Nova frazo.\n')
+                expected[paths[0]] = run_program(paths[0])
+            began = time.perf_counter()
+            manifest = analyze_directory(str(source), str(target), True, jobs)
+            rows.append((name, time.perf_counter() - began, manifest['analyzed'], manifest['skipped']))
+
+        for path in paths:
+            output = target / path.relative_to(source)
+            if output.read_text(encoding='utf-8') + '\n' != expected[path]:
+                differences += 1
+        tokens = sum(entry['tokens'] for entry in manifest['files'].values())
+
+    print(f'files: {count}, words: {tokens:,}, jobs: {jobs or os.cpu_count()}')
+    print(f'{"":20}{"seconds":>9}{"analyzed":>10}{"skipped":>9}')
+    for name, seconds, analyzed, skipped in rows:
+        print(f'{name:20}{seconds:>9.2f}{analyzed:>10}{skipped:>9}')
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
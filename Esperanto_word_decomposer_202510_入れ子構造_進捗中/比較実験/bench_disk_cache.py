@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the persistent analysis cache (literumilo_disk_cache.py) on a
+batch job: the PIV candidate words and the PEJVO words.
+
+1. "no cache": every word is analyzed.
+2. "first run": the words are analyzed and written to an empty database.
+3. "second run": a new run (empty memory cache) reads every analysis
+   from the database.
+
+The results of the three runs must be identical.
+
+Usage:
+  python 比較実験/bench_disk_cache.py [number_of_words]
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import check_word, warm_up  # type: ignore
+from literumilo.literumilo_cache import clear_cache, set_cache_size  # type: ignore
+from literumilo.literumilo_disk_cache import disable_disk_cache, enable_disk_cache  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+
+PIV_WORDS = ROOT / 'PIV2020_PEJVO候補_valid_words.txt'
+
+
+def batch_words(count: int) -> list[str]:
+    lines = PIV_WORDS.read_text(encoding='utf-8').splitlines()[1:]
+    words = [line.split('\t')[1] for line in lines if '\t' in line]
+    words += list(load_pejvo_decompositions())
+    return words[:count]
+
+
+def run(words: list[str]) -> tuple[float, list]:
+    clear_cache()
+    began = time.perf_counter()
+    results = [(result.word, result.valid) for result in map(check_word, words)]
+    return time.perf_counter() - began, results
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    warm_up()
+    words = batch_words(count)
+    set_cache_size(0)    # only the disk cache
+
+    print(f'words: {len(words)}')
+    print(f'{"run":12}{"seconds":>10}{"words/s":>12}')
+    uncached_time, expected = run(words)
+    print(f'{"no cache":12}{uncached_time:>10.3f}{len(words) / uncached_time:>12,.0f}')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'analyses.sqlite3')
+        for name in ('first run', 'second run'):
+            disk_cache = enable_disk_cache(path)
+            elapsed, results = run(words)
+            disk_cache.flush()
+            assert results == expected, 'the disk cache changed the analysis'
+            print(f'{name:12}{elapsed:>10.3f}{len(words) / elapsed:>12,.0f}')
+            disable_disk_cache()
+        print(f'database size: {os.path.getsize(path) / 1024:,.0f} KB')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
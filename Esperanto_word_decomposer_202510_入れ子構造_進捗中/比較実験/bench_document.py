@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure analyze_document() (literumilo_document.py), which analyzes each
+distinct word of a document once, against analyze_string(), which analyzes
+every occurrence.
+
+For each text (比較実験/wiki_esperanto.txt, 比較実験/wikisource_udhr.txt,
+the example sentences, and all of them repeated 5 times), the script
+reports the number of words (tokens) and of distinct words (types), the
+type/token ratio, the time of both functions in morpheme mode (best of 3,
+with the analysis caches emptied before each run), the time saved, and the
+saving estimated by analyze_document(measure=True). The outputs must be
+identical.
+
+Usage:
+  python 比較実験/bench_document.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import analyze_string, clear_cache, warm_up  # type: ignore
+from literumilo.literumilo_document import analyze_document  # type: ignore
+
+TEXTS = (('wiki', ROOT / '比較実験' / 'wiki_esperanto.txt'),
+         ('udhr', ROOT / '比較実験' / 'wikisource_udhr.txt'),
+         ('examples', ROOT / 'エスペラント例文(語根分解精度のチェックに用いる).txt'))
+REPEAT = 3
+
+
+def best(function, text: str):
+    fastest = None
+    for _ in range(REPEAT):
+        clear_cache()
+        began = time.perf_counter()
+        result = function(text)
+        elapsed = time.perf_counter() - began
+        fastest = elapsed if fastest is None else min(fastest, elapsed)
+    return fastest, result
+
+
+def main() -> int:
+    warm_up()
+    texts = [(name, path.read_text(encoding='utf-8')) for name, path in TEXTS]
+    texts.append(('all x5', ''.join(text for _, text in texts) * 5))
+    differences = 0
+    print(f'{"text":10}{"tokens":>9}{"types":>8}{"ratio":>7}{"string s":>10}{"document s":>12}'
+          f'{"saved s":>9}{"estimate":>10}')
+    for name, text in texts:
+        string_time, expected = best(lambda t: analyze_string(t, True), text)
+        document_time, document = best(analyze_document, text)
+        if document.text != expected:
+            differences += 1
+        estimate = analyze_document(text, True, measure = True).saved_seconds
+        print(f'{name:10}{document.tokens:>9,}{document.types:>8,}{document.type_token_ratio:>7.3f}'
+              f'{string_time:>10.3f}{document_time:>12.3f}{string_time - document_time:>9.3f}'
+              f'{estimate:>10.3f}')
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
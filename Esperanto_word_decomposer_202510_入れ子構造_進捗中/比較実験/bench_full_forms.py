@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the table of full forms (Lexicon.full_form(), literumilo_lexicon.py):
+words which are a single root with an ending, or a word without ending,
+divided with one lookup.
+
+1. Size of the table, the time to build it, and its memory, compared with
+   the rest of the Lexicon.
+2. analyze_word() on the tokens of the example sentences, and on every word
+   of the table, with and without the table (the word cache is not used),
+   in microseconds per word. The results must be identical.
+
+Usage:
+  python 比較実験/bench_full_forms.py
+"""
+from __future__ import annotations
+
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import warm_up  # type: ignore
+from literumilo.literumilo_check_word import analyze_word  # type: ignore
+from literumilo.literumilo_ending import ENDINGS  # type: ignore
+from literumilo.literumilo_lexicon import Lexicon, FULL_FORM_CODE_MASK  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+
+TEXT = ROOT / 'エスペラント例文(語根分解精度のチェックに用いる).txt'
+
+
+def table_words(lexicon) -> list[str]:
+    """Decode every word of the table of full forms."""
+    words = []
+    for slot in lexicon.full_forms:
+        if slot:
+            code = (slot & FULL_FORM_CODE_MASK) - 1
+            number = (code >> 1) & 31
+            words.append(lexicon.keys_by_row[code >> 6] + (ENDINGS[number - 1].ending if number else ''))
+    return words
+
+
+def timed(words: list[str], lexicon, repeat: int = 5) -> tuple[float, list]:
+    """Best of several runs, in microseconds per word."""
+    best = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        results = [analyze_word(word, lexicon) for word in words]
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6 / max(1, len(words)), results
+
+
+def without_table(words: list[str], lexicon, repeat: int = 5) -> tuple[float, list]:
+    full_form = Lexicon.full_form
+    Lexicon.full_form = None    # analyze_word() reads the dictionary instead
+    try:
+        return timed(words, lexicon, repeat)
+    finally:
+        Lexicon.full_form = full_form
+
+
+def main() -> int:
+    warm_up()
+    lexicon = get_dictionary()
+    began = time.perf_counter()
+    lexicon.build_full_forms()
+    build_time = time.perf_counter() - began
+    table_size = lexicon.full_forms.nbytes
+    words = table_words(lexicon)
+    print(f'full forms: {len(words):,}, slots: {len(lexicon.full_forms):,}, '
+          f'build: {build_time:.2f} s')
+    print(f'memory: table {table_size / 1024:,.0f} KB, '
+          f'whole lexicon {lexicon.memory_usage() / 1024:,.0f} KB')
+
+    text = TEXT.read_text(encoding='utf-8')
+    tokens = [token.lower() for token in re.findall(r'[^\W\d_]+', text)]
+    found = {token: lexicon.full_form(token) for token in set(tokens)}
+    common = [token for token in tokens if found[token] and found[token][1]]
+    other = [token for token in tokens if found[token] and not found[token][1]]
+    rest = [token for token in tokens if not found[token]]
+    print(f'tokens of the example sentences: {len(tokens)}, in the table: '
+          f'{(len(common) + len(other)) / len(tokens):.1%}, common (PEJVO skipped): '
+          f'{len(common) / len(tokens):.1%}')
+
+    print(f'{"words":26}{"count":>8}{"table us":>10}{"no table us":>13}')
+    differences = 0
+    samples = (('sentences, all tokens', tokens), ('sentences, common forms', common),
+               ('sentences, other forms', other), ('sentences, not in table', rest),
+               ('every full form', words))
+    for name, sample in samples:
+        table_time, results = timed(sample, lexicon, 1 if sample is words else 5)
+        plain_time, expected = without_table(sample, lexicon, 1 if sample is words else 5)
+        differences += sum(1 for a, b in zip(results, expected) if a != b)
+        print(f'{name:26}{len(sample):>8}{table_time:>10.2f}{plain_time:>13.2f}')
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
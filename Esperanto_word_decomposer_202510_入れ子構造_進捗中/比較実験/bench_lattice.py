@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare the two engines which divide compound words:
+  - "backtracking": find_morpheme_at() (literumilo_check_word.py)
+  - "lattice":      divide_word() (literumilo_lattice.py)
+
+1. Every PEJVO word which needs a morphological analysis is divided by
+   both engines. The divisions must be identical. Speed in words/s.
+2. Words with many possible divisions (a root repeated several times)
+   show the difference in the worst case: the number of recursive calls
+   (backtracking) or search states (lattice), and the time per word.
+
+Usage:
+  python 比較実験/bench_lattice.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import literumilo_check_word, literumilo_lattice, warm_up  # type: ignore
+from literumilo.literumilo_ending import get_ending  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_morpheme_list import MorphemeList  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+
+REPEATED = [('', 'bar'), ('ĉi', 'bar'), ('', 'moskit'), ('ĉi', 'elater'), ('', 'sunas')]
+
+
+def backtracking(stem: str, dictionary, ending):
+    morpheme_list = MorphemeList(ending)
+    if literumilo_check_word.find_morpheme_at(stem, 0, dictionary, 0, morpheme_list):
+        return morpheme_list.display_form()
+    return None
+
+
+def lattice(stem: str, dictionary, ending):
+    morpheme_list = literumilo_lattice.divide_word(stem, dictionary, ending)
+    return morpheme_list.display_form() if morpheme_list else None
+
+
+def compound_stems(dictionary) -> list:
+    stems = []
+    for word in load_pejvo_decompositions():
+        word = word.lower().replace('-', '')
+        ending = get_ending(word)
+        if ending is None:
+            continue
+        stem = word[:len(word) - ending.length]
+        if stem not in dictionary:
+            stems.append((stem, ending))
+    return stems
+
+
+def timed(engine, stems, dictionary) -> tuple[float, list]:
+    began = time.perf_counter()
+    results = [engine(stem, dictionary, ending) for stem, ending in stems]
+    return time.perf_counter() - began, results
+
+
+def count_calls(stem: str, dictionary, ending) -> tuple[int, int]:
+    """Recursive calls of find_morpheme_at(), and states solved by divide_word()."""
+    original = literumilo_check_word.find_morpheme_at
+    calls = 0
+
+    def counting(*args):
+        nonlocal calls
+        calls += 1
+        return original(*args)
+
+    literumilo_check_word.find_morpheme_at = counting
+    try:
+        counting(stem, 0, dictionary, 0, MorphemeList(ending))
+    finally:
+        literumilo_check_word.find_morpheme_at = original
+    search = literumilo_lattice._Search(stem, dictionary, ending)
+    search.solve(0, 0, None, None, 0, ())
+    return calls, len(search.memo)
+
+
+def main() -> int:
+    warm_up()
+    dictionary = get_dictionary()
+    stems = compound_stems(dictionary)
+
+    backtracking_time, expected = timed(backtracking, stems, dictionary)
+    lattice_time, results = timed(lattice, stems, dictionary)
+    differences = sum(1 for a, b in zip(expected, results) if a != b)
+    print(f'PEJVO compound words: {len(stems)}, differences: {differences}')
+    print(f'{"engine":14}{"seconds":>10}{"words/s":>12}')
+    print(f'{"backtracking":14}{backtracking_time:>10.3f}{len(stems) / backtracking_time:>12,.0f}')
+    print(f'{"lattice":14}{lattice_time:>10.3f}{len(stems) / lattice_time:>12,.0f}')
+
+    print()
+    ending = get_ending('hundo')
+    print(f'{"word":52}{"calls":>8}{"states":>8}{"back ms":>10}{"lattice ms":>12}')
+    for prefix, root in REPEATED:
+        for times in (2, 4, 8):
+            stem = prefix + root * times + 'q'   # 'q' makes every division fail
+            calls, states = count_calls(stem, dictionary, ending)
+            back_ms = timed(backtracking, [(stem, ending)], dictionary)[0] * 1000
+            lattice_ms = timed(lattice, [(stem, ending)], dictionary)[0] * 1000
+            print(f'{stem:52}{calls:>8}{states:>8}{back_ms:>10.2f}{lattice_ms:>12.2f}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare the memory used by the dictionary in its two forms:
+  - the legacy map of EspDictEntry objects (make_dictionary)
+  - the column-oriented Lexicon (literumilo_lexicon.py)
+
+Two measurements are shown for each: the bytes allocated while building
+it (tracemalloc), and the structural estimate from sys.getsizeof.
+
+Usage:
+  python 比較実験/bench_lexicon_memory.py
+"""
+from __future__ import annotations
+
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import literumilo_load  # type: ignore
+from literumilo.literumilo_lexicon import Lexicon, dictionary_memory_usage  # type: ignore
+
+
+def traced(build):
+    """Run build() and return its result and the bytes it left allocated."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main() -> int:
+    path = literumilo_load.dictionary_path()
+    lines = [line.strip() for line in open(path)]
+
+    legacy, legacy_traced = traced(lambda: literumilo_load.make_dictionary(lines))
+    lexicon, lexicon_traced = traced(lambda: Lexicon.from_entries(legacy))
+    snapshot, snapshot_traced = traced(literumilo_load.load_dictionary)
+
+    print(f'entries: {len(legacy)}')
+    print(f'{"":28}{"tracemalloc":>14}{"getsizeof":>14}')
+    print(f'{"EspDictEntry map":28}{legacy_traced:>14,}{dictionary_memory_usage(legacy):>14,}')
+    print(f'{"Lexicon (built from map)":28}{lexicon_traced:>14,}{lexicon.memory_usage():>14,}')
+    print(f'{"Lexicon (from snapshot)":28}{snapshot_traced:>14,}{snapshot.memory_usage():>14,}')
+    ratio = dictionary_memory_usage(legacy) / snapshot.memory_usage()
+    print(f'reduction: {ratio:.1f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
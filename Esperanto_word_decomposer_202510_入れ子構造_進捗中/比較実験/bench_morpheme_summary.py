@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the summary of the morpheme list (MorphemeList.summary_after(),
+literumilo_morpheme_list.py).
+
+The prefix checks (mal-, ne-, ge-, kun-, sin-...) ask whether a verb, a
+person, a transitive morpheme... follows the prefix. With the summary, the
+bits of the list are combined once, after the last put(). Without it, every
+check scans the rest of the list, as before.
+
+1. scan_morphemes() on the divisions of the PEJVO words which have a prefix
+   (the morphemes are put again before every scan), in microseconds per scan.
+2. divide_word() on the compound words of PEJVO, in microseconds per word.
+
+The results must be identical.
+
+Usage:
+  python 比較実験/bench_morpheme_summary.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import warm_up  # type: ignore
+from literumilo.literumilo_entry import Synthesis  # type: ignore
+from literumilo.literumilo_ending import get_ending  # type: ignore
+from literumilo.literumilo_lattice import divide_word  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_morpheme_list import MorphemeList, summary_bits  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+from literumilo.literumilo_scan_morphemes import scan_morphemes  # type: ignore
+
+summary_after = MorphemeList.summary_after
+
+
+def scanning_summary_after(self, index):
+    """The former checks: scan the rest of the list on every call."""
+    bits = 0
+    for position in range(index + 1, self.last_index + 1):
+        bits |= summary_bits(self.morphemes[position])
+    return bits
+
+
+def divide(word: str, dictionary):
+    ending = get_ending(word)
+    if ending is None or word[:len(word) - ending.length] in dictionary:
+        return None
+    return divide_word(word[:len(word) - ending.length], dictionary, ending)
+
+
+def scan_all(divisions: list, repeat: int = 20) -> tuple[float, list]:
+    best = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        results = []
+        for division in divisions:
+            for index in range(division.last_index + 1):
+                division.put(index, division.morphemes[index])
+            results.append(scan_morphemes(division))
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6 / len(divisions), results
+
+
+def divide_all(words: list[str], dictionary, repeat: int = 3) -> tuple[float, list]:
+    best = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        results = [divide(word, dictionary) for word in words]
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6 / len(words), [r.display_form() if r else None for r in results]
+
+
+def main() -> int:
+    warm_up()
+    dictionary = get_dictionary()
+    words = list(load_pejvo_decompositions())
+    divisions = [division for division in map(lambda w: divide(w, dictionary), words)
+                 if division is not None and
+                 any(division.get(index).synthesis == Synthesis.Prefix
+                     for index in range(division.last_index + 1))]
+    differences = 0
+
+    summary_us, results = scan_all(divisions)
+    MorphemeList.summary_after = scanning_summary_after
+    try:
+        scanning_us, expected = scan_all(divisions)
+        scanning_divide_us, expected_divisions = divide_all(words, dictionary)
+    finally:
+        MorphemeList.summary_after = summary_after
+    summary_divide_us, divisions_results = divide_all(words, dictionary)
+    differences += sum(1 for a, b in zip(results, expected) if a != b)
+    differences += sum(1 for a, b in zip(divisions_results, expected_divisions) if a != b)
+
+    print(f'{"":34}{"scan us":>9}{"summary us":>12}')
+    print(f'{"scan_morphemes, " + str(len(divisions)) + " with prefixes":34}'
+          f'{scanning_us:>9.2f}{summary_us:>12.2f}')
+    print(f'{"divide_word, " + str(len(words)) + " PEJVO words":34}'
+          f'{scanning_divide_us:>9.2f}{summary_divide_us:>12.2f}')
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure analyze_nbest() / best_divisions() (literumilo_lattice.py).
+
+1. Time per word for k = 1, 5, 20 on a sample of PEJVO words.
+2. On long, ambiguous compounds: the number of valid divisions, and the
+   time to enumerate all of them, compared with the time the best-first
+   search needs to find the k cheapest.
+
+Usage:
+  python 比較実験/bench_nbest.py [number_of_words]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import analyze_nbest, warm_up  # type: ignore
+from literumilo.literumilo_ending import get_ending  # type: ignore
+from literumilo.literumilo_entry import Synthesis  # type: ignore
+from literumilo.literumilo_lattice import _Search, best_divisions  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_morpheme_list import MorphemeList  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+
+LONG_WORDS = ['barbarbarbarbarbaro', 'barbarbarbarbarbarbarbaro', 'malsanulejestrejo',
+              'ĉielaterelaterelaterelatero', 'moskitmoskitmoskitmoskito']
+
+
+def count_divisions(stem: str, dictionary, ending) -> int:
+    """Count every valid division, without memoization (exhaustive)."""
+    search = _Search(stem, dictionary, ending)
+    length = len(stem)
+    count = 0
+
+    def divide(start, index, previous, before_previous, separators, pending):
+        nonlocal count
+        if index >= MorphemeList.MAX_MORPHEMES:
+            return
+        for end, entry in search.moves(start, index):
+            placed = search.extend(entry, end, index, previous, before_previous, separators, pending)
+            if placed is None:
+                continue
+            entry, placed_separators, placed_pending = placed
+            if end == length:
+                count += 1
+            else:
+                limited = entry.synthesis in (Synthesis.Participle, Synthesis.Limited)
+                divide(end, index + 1, entry, previous if limited else None,
+                       placed_separators, placed_pending)
+
+    divide(0, 0, None, None, 0, ())
+    return count
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    warm_up()
+    dictionary = get_dictionary()
+    words = list(load_pejvo_decompositions())[:count]
+
+    print(f'{"k":>4}{"words":>8}{"ms/word":>10}')
+    for k in (1, 5, 20):
+        began = time.perf_counter()
+        for word in words:
+            analyze_nbest(word, k)
+        elapsed = time.perf_counter() - began
+        print(f'{k:>4}{len(words):>8}{elapsed * 1000 / len(words):>10.3f}')
+
+    print()
+    print(f'{"word":30}{"divisions":>10}{"all ms":>8}{"k=1 ms":>8}{"k=10 ms":>9}')
+    for word in LONG_WORDS:
+        ending = get_ending(word)
+        stem = word[:len(word) - ending.length]
+        began = time.perf_counter()
+        total = count_divisions(stem, dictionary, ending)
+        times = [time.perf_counter() - began]
+        for k in (1, 10):
+            began = time.perf_counter()
+            best_divisions(stem, dictionary, ending, k)
+            times.append(time.perf_counter() - began)
+        all_ms, best_ms, ten_ms = (t * 1000 for t in times)
+        print(f'{word:30}{total:>10}{all_ms:>8.2f}{best_ms:>8.2f}{ten_ms:>9.2f}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
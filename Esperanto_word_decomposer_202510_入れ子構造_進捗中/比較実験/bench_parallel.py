@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the parallel analysis of a file (analyze_file(..., jobs=N),
+literumilo_parallel.py) with 1 to N worker processes.
+
+比較実験/wiki_esperanto.txt is repeated to make a file of the given size
+(4 MB by default). The file is divided into morphemes serially, and then
+with 1 .. N workers (by default, at least 4, or one per processor). The
+script reports the time, including the start of the pool, and the speedup
+over the serial analysis. The outputs must be identical.
+
+Usage:
+  python 比較実験/bench_parallel.py [size in MB] [maximum number of workers]
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import analyze_file, clear_cache, warm_up  # type: ignore
+from literumilo.literumilo_parallel import analyze_parallel, default_jobs, new_pool, whitespace_chunks  # type: ignore
+
+TEXT = ROOT / '比較実験' / 'wiki_esperanto.txt'
+
+
+def main() -> int:
+    size = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else max(4, default_jobs())
+    warm_up()
+    text = TEXT.read_text(encoding='utf-8')
+    differences = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'corpus.txt'
+        with open(source, 'w') as file:
+            written = 0
+            while written < size * 1e6:
+                file.write(text)
+                written += len(text.encode('utf-8'))
+        print(f'file: {written / 1e6:.1f} MB, processors: {default_jobs()}')
+        print(f'{"jobs":>6}{"seconds":>9}{"speedup":>9}')
+        clear_cache()
+        began = time.perf_counter()
+        expected = analyze_file(str(source), True)
+        serial = time.perf_counter() - began
+        print(f'{"serial":>6}{serial:>9.2f}{1:>9.2f}')
+        for jobs in range(1, workers + 1):
+            clear_cache()
+            began = time.perf_counter()
+            if jobs > 1:
+                result = analyze_file(str(source), True, jobs=jobs)
+            else:
+                # One worker process (analyze_file() would not start a pool),
+                # to measure the cost of the pool itself.
+                with open(source) as file, new_pool(1) as pool:
+                    result = ''.join(analyze_parallel(whitespace_chunks(file), True, pool, 1))
+            elapsed = time.perf_counter() - began
+            if result != expected:
+                differences += 1
+            print(f'{jobs:>6}{elapsed:>9.2f}{serial / elapsed:>9.2f}')
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the early check of prefixes in the search (prefix_possible() in
+literumilo_rules.py, called by _Search.extend() in literumilo_lattice.py).
+
+A prefix is checked against the morphemes which follow it, so it can only be
+checked when the division is complete. When a prefix is placed, it is also
+checked with the best possible followers; if it fails even then, as 'mal'
+after another morpheme, the branch is cut at once.
+
+For the compound words of PEJVO and for the words of
+比較実験/invalid_plain_words.txt, the script divides the stems with
+divide_stem() (literumilo_check_word.py), which check_word() uses, with and
+without prefix_possible(). It reports the steps of the searches (see
+search_statistics()) and the time. The stem cache is emptied before each
+run. The divisions must be identical.
+
+Usage:
+  python 比較実験/bench_pruning.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import warm_up  # type: ignore
+from literumilo import literumilo_lattice  # type: ignore
+from literumilo.literumilo_cache import clear_cache  # type: ignore
+from literumilo.literumilo_check_word import divide_stem  # type: ignore
+from literumilo.literumilo_ending import get_ending  # type: ignore
+from literumilo.literumilo_lattice import search_statistics  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+
+INVALID_WORDS = ROOT / '比較実験' / 'invalid_plain_words.txt'
+
+
+def stems(words, dictionary) -> list:
+    """(stem, ending) of the words which are not a single morpheme."""
+    cases = []
+    for word in words:
+        word = word.lower().replace('-', '')
+        ending = get_ending(word)
+        if ending is None:
+            continue
+        stem = word[:len(word) - ending.length]
+        if stem and stem not in dictionary:
+            cases.append((stem, ending))
+    return cases
+
+
+def invalid_words() -> list[str]:
+    lines = INVALID_WORDS.read_text(encoding='utf-8').splitlines()[1:]
+    return [line.split('\t')[1] for line in lines if '\t' in line]
+
+
+def run(cases, dictionary, prune: bool) -> tuple[int, float, list]:
+    prefix_possible = literumilo_lattice.prefix_possible
+    if not prune:
+        literumilo_lattice.prefix_possible = lambda entry, index, morpheme_list: True
+    try:
+        clear_cache()
+        search_statistics(reset=True)
+        began = time.perf_counter()
+        results = [divide_stem(stem, dictionary, ending) for stem, ending in cases]
+        seconds = time.perf_counter() - began
+        statistics = search_statistics(reset=True)
+        return round(statistics['mean_steps'] * statistics['searches']), seconds, results
+    finally:
+        literumilo_lattice.prefix_possible = prefix_possible
+
+
+def main() -> int:
+    warm_up()
+    dictionary = get_dictionary()
+    differences = 0
+    print(f'{"words":22}{"steps":>11}{"pruned":>11}{"reduction":>11}{"seconds":>9}{"pruned":>8}')
+    for name, words in (('PEJVO', load_pejvo_decompositions()), ('invalid_plain', invalid_words())):
+        cases = stems(words, dictionary)
+        steps, seconds, results = run(cases, dictionary, False)
+        pruned_steps, pruned_seconds, pruned_results = run(cases, dictionary, True)
+        differences += sum(1 for a, b in zip(results, pruned_results) if a != b)
+        reduction = 1 - pruned_steps / steps if steps else 0
+        print(f'{name + " (" + str(len(cases)) + ")":22}{steps:>11,}{pruned_steps:>11,}'
+              f'{reduction:>11.1%}{seconds:>9.2f}{pruned_seconds:>8.2f}')
+    clear_cache()
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the reachability test of the lattice search (Lattice.finishes(),
+literumilo_lattice.py): the search does not follow an arc to a position from
+which the rest of the word cannot be covered by morphemes.
+
+divide_word() is run on the compound words of PEJVO and on the words of
+比較実験/invalid_plain_words.txt, with and without the test. The script
+reports the number of search states solved (_Search.solve() calls) and the
+time in microseconds per word (best of 7). The divisions must be identical.
+
+Usage:
+  python 比較実験/bench_reachability.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+sys.path.insert(0, str(ROOT / '比較実験'))
+from bench_pruning import invalid_words, stems  # type: ignore
+from literumilo import warm_up  # type: ignore
+from literumilo import literumilo_lattice  # type: ignore
+from literumilo.literumilo_lattice import Lattice, divide_word  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+
+REPEAT = 7
+
+
+def divide_all(cases, dictionary, gate: bool) -> tuple[float, list]:
+    finishes = Lattice.finishes
+    if not gate:
+        Lattice.finishes = lambda self, start: True
+    try:
+        began = time.perf_counter()
+        results = [divide_word(stem, dictionary, ending) for stem, ending in cases]
+        return time.perf_counter() - began, [r.display_form() if r else None for r in results]
+    finally:
+        Lattice.finishes = finishes
+
+
+def count_states(cases, dictionary, gate: bool) -> int:
+    solve = literumilo_lattice._Search.solve
+    calls = 0
+
+    def counting(self, *args):
+        nonlocal calls
+        calls += 1
+        return solve(self, *args)
+
+    literumilo_lattice._Search.solve = counting
+    try:
+        divide_all(cases, dictionary, gate)
+    finally:
+        literumilo_lattice._Search.solve = solve
+    return calls
+
+
+def main() -> int:
+    warm_up()
+    dictionary = get_dictionary()
+    differences = 0
+    print(f'{"words":22}{"states":>9}{"gated":>9}{"us/word":>9}{"gated":>8}')
+    for name, words in (('PEJVO', load_pejvo_decompositions()), ('invalid_plain', invalid_words())):
+        cases = stems(words, dictionary)
+        best = {False: None, True: None}
+        for _ in range(REPEAT):    # The two runs alternate, so that both see the same load.
+            for gate in best:
+                elapsed, results = divide_all(cases, dictionary, gate)
+                if best[gate] is None or elapsed < best[gate]:
+                    best[gate] = elapsed
+                if gate:
+                    differences += sum(1 for a, b in zip(results, expected) if a != b)
+                else:
+                    expected = results
+        plain_us, gated_us = (best[gate] * 1e6 / len(cases) for gate in (False, True))
+        calls, gated_calls = (count_states(cases, dictionary, gate) for gate in (False, True))
+        print(f'{name + " (" + str(len(cases)) + ")":22}{calls:>9,}{gated_calls:>9,}'
+              f'{plain_us:>9.2f}{gated_us:>8.2f}')
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the dispatch of prefix and suffix rules (literumilo_rules.py).
+
+Three ways to find the rule of an affix are compared:
+
+  chain  - compare the morpheme with every affix in turn, as the former
+           if-chains of check_suffix() and check_prefix() did
+  dict   - check_suffix() / check_prefix(): look up the morpheme
+  id     - check_affix(): the rule number stored in the entry
+
+1. Dispatch alone: every affix of the divisions of suffix-heavy words
+   ('mal.san.ul.ej.estr.o'...) is checked again, in nanoseconds per check.
+2. divide_word() on the same words, and on the compound words of PEJVO,
+   with the chain and with rule numbers, in microseconds per word.
+
+The results must be identical.
+
+Usage:
+  python 比較実験/bench_rule_dispatch.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import warm_up  # type: ignore
+from literumilo import literumilo_lattice  # type: ignore
+from literumilo.literumilo_entry import POS, Synthesis  # type: ignore
+from literumilo.literumilo_ending import get_ending  # type: ignore
+from literumilo.literumilo_lattice import divide_word  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+from literumilo.literumilo_rules import check_affix  # type: ignore
+from literumilo.literumilo_scan_morphemes import PREFIX_RULES, check_prefix  # type: ignore
+from literumilo.literumilo_suffix import SUFFIX_RULES, check_suffix  # type: ignore
+
+WORDS = ['malsanulejestro', 'malsanulejestrino', 'lernejestrinoj', 'malbonulaĉo',
+         'disvastigado', 'hundaĉetoj', 'ekbruligilo', 'malgrandigebla', 'senkulpigeblaj',
+         'neforgeseblaĵo', 'reeldonejo', 'kunlaborantaro', 'malfacilaĵoj', 'ĉefredaktistino',
+         'mallibereja', 'gelernantoj', 'eksedziniĝi', 'pranepoj', 'malamikeco', 'vendistinoj']
+
+
+def chain(entry, index, morpheme_list):
+    """The former dispatch: one string comparison per affix, until a match."""
+    if entry.synthesis == Synthesis.Suffix:
+        for suffix, rule in SUFFIX_RULES.items():
+            if entry.morpheme == suffix:
+                return rule(index, morpheme_list)
+        return False
+    if entry.part_of_speech == POS.TechPrefix:
+        return index == 0
+    for prefix, rule in PREFIX_RULES.items():
+        if entry.morpheme == prefix:
+            return rule(index, morpheme_list)
+    return False
+
+
+def by_name(entry, index, morpheme_list):
+    if entry.synthesis == Synthesis.Suffix:
+        return check_suffix(entry.morpheme, index, morpheme_list)
+    return check_prefix(entry.morpheme, index, morpheme_list)
+
+
+def divide(word: str, dictionary):
+    ending = get_ending(word)
+    if ending is None or word[:len(word) - ending.length] in dictionary:
+        return None
+    return divide_word(word[:len(word) - ending.length], dictionary, ending)
+
+
+def affix_checks(words: list[str], dictionary) -> list:
+    """(entry, index, morpheme list) of every affix of the divisions."""
+    checks = []
+    for word in words:
+        division = divide(word, dictionary)
+        if division is None:
+            continue
+        for index in range(division.get_last_index() + 1):
+            entry = division.get(index)
+            if entry.synthesis in (Synthesis.Suffix, Synthesis.Prefix):
+                checks.append((entry, index, division))
+    return checks
+
+
+def time_dispatch(dispatch, checks: list, repeat: int = 2000) -> tuple[float, list]:
+    results = [dispatch(*check) for check in checks]
+    began = time.perf_counter()
+    for _ in range(repeat):
+        for check in checks:
+            dispatch(*check)
+    return (time.perf_counter() - began) * 1e9 / (repeat * len(checks)), results
+
+
+def time_division(dispatch, words: list[str], dictionary, repeat: int) -> tuple[float, list]:
+    literumilo_lattice.check_affix = dispatch
+    try:
+        best = None
+        for _ in range(repeat):
+            began = time.perf_counter()
+            results = [divide(word, dictionary) for word in words]
+            elapsed = time.perf_counter() - began
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        literumilo_lattice.check_affix = check_affix
+    return best * 1e6 / len(words), [r.display_form() if r else None for r in results]
+
+
+def main() -> int:
+    warm_up()
+    dictionary = get_dictionary()
+    differences = 0
+
+    checks = affix_checks(WORDS, dictionary)
+    print(f'affixes in {len(WORDS)} suffix-heavy words: {len(checks)}')
+    print(f'{"dispatch":10}{"ns/check":>10}')
+    _, expected = time_dispatch(chain, checks, 1)
+    for name, dispatch in (('chain', chain), ('dict', by_name), ('id', check_affix)):
+        elapsed, results = time_dispatch(dispatch, checks)
+        differences += sum(1 for a, b in zip(results, expected) if a != b)
+        print(f'{name:10}{elapsed:>10.0f}')
+
+    pejvo = [word for word in load_pejvo_decompositions() if divide(word, dictionary)]
+    print(f'{"words":24}{"count":>7}{"chain us":>10}{"id us":>8}')
+    for name, words, repeat in (('suffix-heavy', WORDS, 200), ('PEJVO compounds', pejvo, 3)):
+        chain_time, expected = time_division(chain, words, dictionary, repeat)
+        id_time, results = time_division(check_affix, words, dictionary, repeat)
+        differences += sum(1 for a, b in zip(results, expected) if a != b)
+        print(f'{name:24}{len(words):>7}{chain_time:>10.2f}{id_time:>8.2f}')
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the search budget (set_search_budget(), literumilo_lattice.py).
+
+divide_word() is run on the compound words of PEJVO, on the words of
+比較実験/invalid_plain_words.txt, and on contrived words: long chains of
+prefixes ('malmalmal...', 'nenene...', 'rerere...') and of roots joined by
+separators ('hundokatohundo...'). For each group the script prints the
+distribution of search steps (search_statistics()), the latency per word
+(median, 99th percentile and maximum, in microseconds), and the number of
+searches which exceeded the budget, first with the default budget, then
+with a budget of 100 steps and 1 ms. The divisions of the searches which
+did not exceed the budget must be identical.
+
+Usage:
+  python 比較実験/bench_search_budget.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+sys.path.insert(0, str(ROOT / '比較実験'))
+from bench_pruning import invalid_words, stems  # type: ignore
+from literumilo import set_search_budget, search_statistics, warm_up  # type: ignore
+from literumilo.literumilo_lattice import SearchBudgetExceeded, divide_word  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+
+
+def contrived_words() -> list[str]:
+    words = []
+    for count in (4, 8, 16, 32, 64):
+        for chain in ('mal', 'ne', 're', 'hundo', 'hundokato', 'nemal'):
+            words.append(chain * count + 'hundo')
+            words.append(chain * count + 'ebla')
+    return words
+
+
+def run(cases, dictionary) -> tuple[list[float], int, dict, list]:
+    search_statistics(reset=True)
+    latencies = []
+    exceeded = 0
+    results = []
+    for stem, ending in cases:
+        began = time.perf_counter()
+        try:
+            division = divide_word(stem, dictionary, ending)
+            results.append(division.display_form() if division else None)
+        except SearchBudgetExceeded:
+            exceeded += 1
+            results.append(SearchBudgetExceeded)
+        latencies.append(time.perf_counter() - began)
+    return sorted(latencies), exceeded, search_statistics(reset=True), results
+
+
+def main() -> int:
+    warm_up()
+    dictionary = get_dictionary()
+    groups = (('PEJVO', stems(load_pejvo_decompositions(), dictionary)),
+              ('invalid_plain', stems(invalid_words(), dictionary)),
+              ('contrived', stems(contrived_words(), dictionary)))
+    differences = 0
+    expected = {}
+    for budget in ({}, {'steps': 100, 'seconds': 0.001}):
+        set_search_budget(**budget)
+        print(f'budget: {search_statistics()["steps"]} steps, {search_statistics()["seconds"]} s')
+        print(f'{"words":22}{"p50 us":>8}{"p99 us":>8}{"max us":>9}{"exceeded":>9}{"max steps":>10}  histogram')
+        for name, cases in groups:
+            latencies, exceeded, statistics, results = run(cases, dictionary)
+            if name not in expected:
+                expected[name] = results
+            differences += sum(1 for a, b in zip(results, expected[name])
+                               if a is not SearchBudgetExceeded and a != b)
+            p50 = latencies[len(latencies) // 2] * 1e6
+            p99 = latencies[len(latencies) * 99 // 100] * 1e6
+            histogram = ' '.join(f'{bound}:{count}' for bound, count in statistics['histogram'].items())
+            print(f'{name + " (" + str(len(cases)) + ")":22}{p50:>8.1f}{p99:>8.1f}{latencies[-1] * 1e6:>9.1f}'
+                  f'{exceeded:>9}{statistics["max_steps"]:>10}  {histogram}')
+    set_search_budget()
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure worker start-up time and memory when N worker processes each
+load their own dictionary + PEJVO map ("private"), versus when they all
+map the same lexicon image ("image", see literumilo_image.py).
+
+For each worker the script reports the initialization time, and the
+proportional set size (PSS: shared pages are divided among the processes
+that map them) read from /proc/self/smaps_rollup. The total PSS is the
+physical memory used by all the workers together.
+
+Usage:
+  python 比較実験/bench_shared_image.py [max_workers]
+"""
+from __future__ import annotations
+
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+
+WORDS = ['ĉirkaŭiris', 'birdojn', 'malsanulejestro', 'forgesitaj', 'aerodinamiko']
+
+
+def memory_kb(field: str) -> int:
+    for name in ('/proc/self/smaps_rollup', '/proc/self/status'):
+        try:
+            with open(name) as f:
+                for line in f:
+                    if line.startswith(field + ':'):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return 0
+
+
+def worker(mode: str, image_path: str, start, results) -> None:
+    start.wait()
+    from literumilo import check_word  # type: ignore
+    from literumilo import literumilo_image, literumilo_load, literumilo_pejvo  # type: ignore
+    base_pss = memory_kb('Pss')
+    began = time.perf_counter()
+    if mode == 'image':
+        literumilo_image.attach_image(image_path)
+    else:
+        literumilo_load.get_dictionary()
+        literumilo_pejvo.load_pejvo_decompositions()
+    for word in WORDS:
+        check_word(word)
+    elapsed = time.perf_counter() - began
+    results.put((elapsed, memory_kb('Pss'), memory_kb('Pss') - base_pss))
+    start.wait()     # Stay alive until every worker has measured its memory.
+
+
+def run(mode: str, workers: int, image_path: str) -> tuple[float, int, int]:
+    context = multiprocessing.get_context('spawn')
+    start = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, image_path, start, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    start.wait()
+    measured = [results.get() for _ in range(workers)]
+    start.wait()
+    for process in processes:
+        process.join()
+    mean_time = sum(m[0] for m in measured) / workers
+    return mean_time, sum(m[1] for m in measured), sum(m[2] for m in measured)
+
+
+def main() -> int:
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    from literumilo import literumilo_image  # type: ignore
+    image_path = literumilo_image.ensure_image()
+    print(f'image: {image_path}')
+    print(f'{"mode":8}{"workers":>8}{"init ms":>10}{"total PSS kB":>14}{"lexicon PSS kB":>16}')
+    for mode in ('private', 'image'):
+        for workers in range(1, max_workers + 1):
+            mean_time, total_pss, lexicon_pss = run(mode, workers, image_path)
+            print(f'{mode:8}{workers:>8}{mean_time * 1000:>10.1f}{total_pss:>14,}{lexicon_pss:>16,}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
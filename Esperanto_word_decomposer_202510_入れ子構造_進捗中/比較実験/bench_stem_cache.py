@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the cache of compound stems (stem_cache, literumilo_cache.py).
+
+Each compound stem of PEJVO is combined with the 16 grammatical endings,
+and every form is checked, once without the stem cache and once with it.
+(The word cache is disabled, so every form is analyzed.) The script reports
+the number of searches (find_division() calls), the time, and the memory of
+the stem cache. The results must be identical.
+
+Usage:
+  python 比較実験/bench_stem_cache.py [number_of_stems]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import check_word, literumilo_check_word, warm_up  # type: ignore
+from literumilo.literumilo_cache import cache_statistics, clear_cache, set_cache_size  # type: ignore
+from literumilo.literumilo_ending import ENDINGS, get_ending  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+
+
+def compound_stems(dictionary, count: int) -> list[str]:
+    stems = []
+    for word in load_pejvo_decompositions():
+        word = word.lower().replace('-', '')
+        ending = get_ending(word)
+        if ending is not None and word[:len(word) - ending.length] not in dictionary:
+            stems.append(word[:len(word) - ending.length])
+    return sorted(set(stems))[:count]
+
+
+def run(words: list[str]) -> tuple[float, int, list]:
+    find_division = literumilo_check_word.find_division
+    searches = 0
+
+    def counting(*args):
+        nonlocal searches
+        searches += 1
+        return find_division(*args)
+
+    literumilo_check_word.find_division = counting
+    clear_cache()
+    try:
+        began = time.perf_counter()
+        results = [check_word(word).word for word in words]
+        return time.perf_counter() - began, searches, results
+    finally:
+        literumilo_check_word.find_division = find_division
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    warm_up()
+    stems = compound_stems(get_dictionary(), count)
+    words = [stem + ending.ending for stem in stems for ending in ENDINGS]
+    print(f'stems: {len(stems)}, words: {len(words)}')
+    print(f'{"stem cache":12}{"searches":>10}{"seconds":>10}{"memory KB":>11}')
+
+    set_cache_size(0, stems=0)
+    plain_time, plain_searches, expected = run(words)
+    print(f'{"off":12}{plain_searches:>10,}{plain_time:>10.3f}{0:>11}')
+
+    set_cache_size(0, stems=len(words))
+    cached_time, cached_searches, results = run(words)
+    memory = cache_statistics('stems')['memory']
+    print(f'{"on":12}{cached_searches:>10,}{cached_time:>10.3f}{memory / 1024:>11,.0f}')
+    differences = sum(1 for a, b in zip(results, expected) if a != b)
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the memory of analyze_file() with and without streaming
+(analyze_chunks(), literumilo.py).
+
+比較実験/wiki_esperanto.txt is repeated to make files of several sizes. Each
+file is divided into morphemes in a new process, once returned as a string
+(the whole text and the whole result are in memory), and once written to a
+file piece by piece (analyze_file(..., output)). The script reports the
+maximum resident memory of the process (ru_maxrss) and the time. The
+outputs must be identical.
+
+Usage:
+  python 比較実験/bench_streaming.py [size in MB ...]
+"""
+from __future__ import annotations
+
+import filecmp
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+TEXT = ROOT / '比較実験' / 'wiki_esperanto.txt'
+
+
+def child(streamed: str, source: str, target: str) -> None:
+    from literumilo import analyze_file, warm_up  # type: ignore
+    warm_up()
+    began = time.perf_counter()
+    with open(target, 'w') as output:
+        if streamed == '1':
+            analyze_file(source, True, output)
+        else:
+            output.write(analyze_file(source, True))
+    elapsed = time.perf_counter() - began
+    print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def run(streamed: bool, source: Path, target: Path) -> tuple[float, int]:
+    output = subprocess.run([sys.executable, __file__, '--child', '1' if streamed else '0',
+                             str(source), str(target)],
+                            check=True, capture_output=True, text=True).stdout.split()
+    return float(output[0]), int(output[1])
+
+
+def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(*sys.argv[2:5])
+        return 0
+    sizes = [float(size) for size in sys.argv[1:]] or [1, 4, 16]
+    text = TEXT.read_text(encoding='utf-8')
+    differences = 0
+    print(f'{"MB":>5}{"string MB":>11}{"seconds":>9}{"streamed MB":>13}{"seconds":>9}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            source = Path(tmp) / 'corpus.txt'
+            with open(source, 'w') as file:
+                written = 0
+                while written < size * 1e6:
+                    file.write(text)
+                    written += len(text.encode('utf-8'))
+            string_time, string_rss = run(False, source, Path(tmp) / 'string.txt')
+            streamed_time, streamed_rss = run(True, source, Path(tmp) / 'streamed.txt')
+            if not filecmp.cmp(Path(tmp) / 'string.txt', Path(tmp) / 'streamed.txt', shallow=False):
+                differences += 1
+            print(f'{size:>5g}{string_rss / 1024:>11.0f}{string_time:>9.2f}'
+                  f'{streamed_rss / 1024:>13.0f}{streamed_time:>9.2f}')
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the suffix compatibility matrix (literumilo_rules.py).
+
+1. The time to resolve the suffix masks of every row of the lexicon (the
+   matrix is already filled, when the lexicon is loaded), and its size.
+2. A simple suffix rule (-ej, -il, -ul...), called as a function, and looked
+   up in the matrix, in nanoseconds per check.
+3. divide_word() on the compound words of PEJVO, with the matrix, and with
+   every suffix copied and checked by its rule, as before, in microseconds
+   per word.
+
+The results must be identical.
+
+Usage:
+  python 比較実験/bench_suffix_matrix.py
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import warm_up  # type: ignore
+from literumilo import literumilo_lattice, literumilo_rules  # type: ignore
+from literumilo.literumilo_ending import get_ending  # type: ignore
+from literumilo.literumilo_lattice import divide_word  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_morpheme_list import MorphemeList  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+from literumilo.literumilo_rules import RULES, SUFFIX_BITS, resolve_suffix_masks, suffix_compatible  # type: ignore
+
+
+def divide_all(words: list[str], dictionary, repeat: int = 3) -> tuple[float, list]:
+    best = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        results = []
+        for word in words:
+            ending = get_ending(word)
+            division = divide_word(word[:len(word) - ending.length], dictionary, ending)
+            results.append(division.display_form() if division else None)
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6 / len(words), results
+
+
+def main() -> int:
+    warm_up()
+    dictionary = get_dictionary()
+    began = time.perf_counter()
+    resolve_suffix_masks(dictionary)
+    fill_time = time.perf_counter() - began
+    matrix = literumilo_rules._matrix
+    filled = sum(1 for mask in matrix if mask >= 0)
+    print(f'matrix: {len(matrix):,} classes, {filled} filled, '
+          f'{matrix.itemsize * len(matrix) / 1024:.0f} KB, masks of every row: {fill_time * 1000:.1f} ms')
+
+    # Every (previous morpheme, simple suffix) pair of the lexicon.
+    morpheme_list = MorphemeList(get_ending('o'))
+    previous_entries = dictionary.values()[::20]
+    simple = [(rule, bit) for rule, bit in zip(RULES, SUFFIX_BITS) if bit]
+    repeat = 3
+    began = time.perf_counter()
+    expected = []
+    for _ in range(repeat):
+        expected = []
+        for previous in previous_entries:
+            morpheme_list.put(0, previous)
+            expected.extend(rule(1, morpheme_list) for rule, bit in simple)
+    rule_time = time.perf_counter() - began
+    began = time.perf_counter()
+    for _ in range(repeat):
+        results = []
+        for previous in previous_entries:
+            results.extend(suffix_compatible(bit, 1, previous) for rule, bit in simple)
+    matrix_time = time.perf_counter() - began
+    checks = repeat * len(expected)
+    differences = sum(1 for a, b in zip(results, expected) if a != b)
+    print(f'simple suffix checks: {len(expected):,}: rule {rule_time * 1e9 / checks:.0f} ns, '
+          f'matrix {matrix_time * 1e9 / checks:.0f} ns')
+
+    words = []
+    for word in load_pejvo_decompositions():
+        ending = get_ending(word)
+        if ending is not None and word[:len(word) - ending.length] not in dictionary:
+            words.append(word)
+    matrix_us, results = divide_all(words, dictionary)
+    literumilo_lattice.SUFFIX_BITS = literumilo_rules.SUFFIX_BITS = (0,) * len(SUFFIX_BITS)
+    try:
+        rules_us, expected = divide_all(words, dictionary)
+    finally:
+        literumilo_lattice.SUFFIX_BITS = literumilo_rules.SUFFIX_BITS = SUFFIX_BITS
+    differences += sum(1 for a, b in zip(results, expected) if a != b)
+    print(f'divide_word on {len(words)} compound words: matrix {matrix_us:.2f} us, '
+          f'copies and rules {rules_us:.2f} us')
+    print(f'differences: {differences}')
+    return 0 if differences == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
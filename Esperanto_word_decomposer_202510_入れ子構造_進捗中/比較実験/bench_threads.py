@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stress test of concurrent analysis: the PEJVO words are analyzed by one
+thread, and then by several threads at the same time, each thread in its
+own order. The word caches are disabled, so every word is divided by the
+synthesis rules. Both the results and the columns of the dictionary must
+be identical to those of the single thread.
+
+Usage:
+  python 比較実験/bench_threads.py [number_of_threads] [number_of_words]
+"""
+from __future__ import annotations
+
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import check_word, warm_up  # type: ignore
+from literumilo.literumilo_cache import set_cache_size  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+
+
+def analyze(words: list[str]) -> dict[str, tuple[str, bool]]:
+    return {word: (result.word, result.valid) for word, result in zip(words, map(check_word, words))}
+
+
+def main() -> int:
+    thread_count = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    warm_up()
+    set_cache_size(0, stems=0)
+    words = list(load_pejvo_decompositions())[:count]
+    lexicon = get_dictionary()
+    columns = [bytes(column) for column in lexicon._columns()]
+
+    began = time.perf_counter()
+    expected = analyze(words)
+    single_time = time.perf_counter() - began
+
+    results: list[dict] = [{} for _ in range(thread_count)]
+
+    def worker(number: int) -> None:
+        order = list(words)
+        random.Random(number).shuffle(order)
+        results[number] = analyze(order)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(thread_count)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    threaded_time = time.perf_counter() - began
+
+    differences = sum(1 for result in results for word in words if result[word] != expected[word])
+    modified = sum(1 for a, b in zip(columns, lexicon._columns()) if a != bytes(b))
+    print(f'words: {len(words)}, threads: {thread_count}')
+    print(f'one thread: {single_time:.2f} s, {thread_count} threads: {threaded_time:.2f} s '
+          f'({thread_count * len(words) / threaded_time:,.0f} words/s)')
+    print(f'differences: {differences}, modified columns: {modified}')
+    return 0 if differences == 0 and modified == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
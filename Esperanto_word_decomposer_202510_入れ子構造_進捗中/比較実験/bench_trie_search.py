@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare two ways of finding the morphemes which begin at a position of a
+compound word, during the division in find_morpheme_at():
+  - "slicing": look up every substring, from the longest to the shortest
+    (probe_morphemes_at, the former loop)
+  - "trie":    one walk through the character trie (Lexicon.morphemes_at)
+
+For each method the script reports the number of dictionary (hash) probes,
+the number of substrings created, and the speed in words per second.
+Both methods must give the same results.
+
+Usage:
+  python 比較実験/bench_trie_search.py [number_of_words]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import check_word, clear_cache, warm_up  # type: ignore
+from literumilo.literumilo_lexicon import Lexicon, TERMINAL, probe_morphemes_at  # type: ignore
+from literumilo.literumilo_load import get_dictionary  # type: ignore
+from literumilo.literumilo_pejvo import load_pejvo_decompositions  # type: ignore
+
+TRIE_MATCHES = Lexicon.morphemes_at
+MIN_LENGTH = 2    # as in find_morpheme_at()
+
+
+class Counter:
+    probes = 0
+    slices = 0
+
+
+class CountingDict(dict):
+    """A trie node (or index) which counts the lookups made on it."""
+
+    def get(self, key, default=None):
+        Counter.probes += 1
+        return dict.get(self, key, default)
+
+
+def counting_trie(node: dict) -> CountingDict:
+    counted = CountingDict()
+    for ch, child in node.items():
+        counted[ch] = child if ch == TERMINAL else counting_trie(child)
+    return counted
+
+
+def slicing_matches(lexicon, text, start, max_length):
+    stop = min(len(text), start + max_length)
+    Counter.slices += max(0, stop - (start + MIN_LENGTH) + 1)
+    return probe_morphemes_at(lexicon, text, start, max_length, MIN_LENGTH)
+
+
+def run(words: list[str]) -> tuple[float, list[bool]]:
+    clear_cache()    # every word is analyzed, not taken from the word cache
+    began = time.perf_counter()
+    results = [check_word(word).valid for word in words]
+    return time.perf_counter() - began, results
+
+
+def counted_run(lexicon, words: list[str]) -> tuple[int, int]:
+    clear_cache()
+    Counter.probes = Counter.slices = 0
+    for word in words:
+        check_word(word)
+    return Counter.probes, Counter.slices
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    warm_up()
+    words = list(load_pejvo_decompositions())[:count]
+    lexicon = get_dictionary()
+
+    # Speed, without counting.
+    Lexicon.morphemes_at = slicing_matches
+    slicing_time, slicing_results = run(words)
+    Lexicon.morphemes_at = TRIE_MATCHES
+    trie_time, trie_results = run(words)
+    assert slicing_results == trie_results, 'the two methods disagree'
+
+    # Probe counts: every lookup in the index (key -> row) and in the trie.
+    index, trie = lexicon.index, lexicon._trie
+    lexicon.index = CountingDict(index)
+    Lexicon.morphemes_at = slicing_matches
+    slicing_probes, slicing_slices = counted_run(lexicon, words)
+    Lexicon.morphemes_at = TRIE_MATCHES
+    lexicon._trie = counting_trie(trie)
+    trie_probes, trie_slices = counted_run(lexicon, words)
+    lexicon.index, lexicon._trie = index, trie
+
+    print(f'words: {len(words)}')
+    print(f'{"method":10}{"probes":>12}{"substrings":>12}{"words/s":>12}')
+    print(f'{"slicing":10}{slicing_probes:>12,}{slicing_slices:>12,}{len(words) / slicing_time:>12,.0f}')
+    print(f'{"trie":10}{trie_probes:>12,}{trie_slices:>12,}{len(words) / trie_time:>12,.0f}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
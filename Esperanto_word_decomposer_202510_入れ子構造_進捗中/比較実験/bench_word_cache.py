@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure the word analysis cache of check_word() (literumilo_cache.py)
+on real text: the example sentences, repeated several times.
+
+For several cache sizes (0 = no cache), the script reports the time of
+analyze_string(), the hit rate, the number of evictions and the estimated
+memory of the cache. The output must be identical for every size.
+
+Usage:
+  python 比較実験/bench_word_cache.py [repetitions]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'literumilo'))
+from literumilo import analyze_string, warm_up  # type: ignore
+from literumilo.literumilo_cache import cache_statistics, clear_cache, set_cache_size  # type: ignore
+
+TEXT = ROOT / 'エスペラント例文(語根分解精度のチェックに用いる).txt'
+
+
+def main() -> int:
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    warm_up()
+    text = TEXT.read_text(encoding='utf-8') * repetitions
+
+    expected = None
+    print(f'characters: {len(text):,}')
+    print(f'{"size":>7}{"seconds":>10}{"hit rate":>10}{"evictions":>11}{"memory KB":>11}')
+    for size in (0, 100, 1000, 20000):
+        set_cache_size(size)
+        clear_cache()
+        began = time.perf_counter()
+        result = analyze_string(text, 'morph')
+        elapsed = time.perf_counter() - began
+        if expected is None:
+            expected = result
+        assert result == expected, 'the cache changed the analysis'
+        stats = cache_statistics()
+        print(f'{size:>7}{elapsed:>10.3f}{stats["hit_rate"]:>10.1%}'
+              f'{stats["evictions"]:>11,}{stats["memory"] / 1024:>11,.0f}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -19,8 +19,8 @@ INV_PLAIN = ROOT / "比較実験" / "invalid_plain_words.txt"
 
 sys.path.insert(0, str(ROOT / 'literumilo'))
 from literumilo import check_word  # type: ignore
-from literumilo import literumilo_check_word  # type: ignore
 from literumilo.literumilo_entry import EspDictEntry  # type: ignore
+from literumilo.literumilo_load import get_dictionary, set_dictionary  # type: ignore
 
 
 def load_batch(batch_path: Path) -> list[list[str]]:
@@ -38,9 +38,10 @@ def load_batch(batch_path: Path) -> list[list[str]]:
 
 
 def inject_entries(rows: list[list[str]]) -> int:
-    """Create EspDictEntry objects and merge into the in-memory dictionary."""
+    """Create EspDictEntry objects and merge them into a copy of the in-memory
+    dictionary (which is frozen), then make check_word() use the copy."""
     counter = 0
-    dct = literumilo_check_word.esperanto_dictionary
+    dct = get_dictionary().copy()
     for r in rows:
         try:
             entry = EspDictEntry(r)
@@ -49,6 +50,7 @@ def inject_entries(rows: list[list[str]]) -> int:
         key = entry.morpheme.lower().replace('.', '')
         dct[key] = entry
         counter += 1
+    set_dictionary(dct)
     return counter
 
 